@@ -0,0 +1,74 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_question(question):
+    """'What's wrong with  PUMP_A?' and "what's wrong with pump_a" share a key."""
+    words = re.findall(r"[a-z0-9_.]+", question.lower().replace("'", ""))
+    return " ".join(w.strip(".") for w in words if w.strip("."))
+
+
+def sensor_fingerprint(readings, machines, status_of):
+    """
+    Coarse view of the sensor state: health band and anomaly flag per machine.
+    Raw values jitter every reading, bands only move when something happens.
+    """
+    return tuple(
+        (m, status_of(readings[m].get("health_score", 100)), bool(readings[m].get("is_anomaly")))
+        for m in sorted(machines)
+        if m in readings
+    )
+
+
+def chunks_fingerprint(chunks):
+    digest = hashlib.sha1()
+    for chunk in chunks:
+        digest.update(chunk["source"].encode())
+        digest.update(chunk["text"].encode())
+    return digest.hexdigest()
+
+
+class AnswerCache:
+    """Thread-safe LRU cache with a TTL and hit/miss counters."""
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
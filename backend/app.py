@@ -1,9 +1,103 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from groq import Groq
+from groq import Groq, AsyncGroq
+from jsonl_tail import LatestStateCache
+from live_feed import FleetFeed
+from document_store import DocumentStore
+from retriever import Retriever, format_chunks
+from answer_cache import AnswerCache, normalize_question, sensor_fingerprint, chunks_fingerprint
+from prompt_context import build_sensor_context, count_tokens
+import asyncio
 import json
 import os
+import sys
+import time
+import uuid
+# Pathway-free modules shared with the pipeline (history, compaction, metrics, SQLite, episodes, ingest, scoring)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pipeline"))
+from compaction import snapshot_path_for
+from history_store import HistoryStore
+from sqlite_store import SqliteStateStore
+from episodes import EpisodeStore
+from ingest import (
+    INGEST_ADDR, MAX_BATCH_ROWS, MAX_PENDING_ROWS, IngestBusy, IngestClient, IngestUnavailable,
+    encode_batch, parse_body, validate
+)
+from metrics import CONTENT_TYPE, REGISTRY, Callback, Counter, Histogram
+from scoring import PRESSURE_LIMIT, TEMPERATURE_LIMIT, VIBRATION_LIMIT
+
+# ── Metrics ──
+REQUEST_SECONDS = Histogram(
+    "failureguard_http_request_duration_seconds",
+    "Time to serve a request, until the last body byte (streams included)",
+    ["method", "path", "status"]
+)
+STATE_READ_SECONDS = Histogram(
+    "failureguard_state_read_duration_seconds",
+    "Time spent refreshing and reading live state",
+    ["function"]
+)
+QUERY_STEP_SECONDS = Histogram(
+    "failureguard_query_step_duration_seconds",
+    "Time per /query step: local retrieval and the Groq answer call",
+    ["endpoint", "step"]
+)
+PROMPT_TOKENS = Histogram(
+    "failureguard_query_prompt_tokens_estimated",
+    "Locally counted prompt tokens per /query call",
+    ["endpoint"],
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 8000, 16000)
+)
+INGEST_ROWS = Counter(
+    "failureguard_ingest_rows_total",
+    "Readings received by /ingest, by outcome (accepted, rejected, throttled, unavailable)",
+    ["outcome"]
+)
+LLM_TOKENS = Counter(
+    "failureguard_llm_tokens_total",
+    "Tokens reported by Groq, per endpoint and kind (prompt/completion)",
+    ["endpoint", "kind"]
+)
+
+read_readings_timer = STATE_READ_SECONDS.labels("read_latest_readings")
+read_documents_timer = STATE_READ_SECONDS.labels("read_documents")
+
+
+class MetricsMiddleware:
+    """
+    Records REQUEST_SECONDS per route template. Plain ASGI rather than
+    @app.middleware("http"), which would add a task and a body copy to
+    every request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status[0])
+            ).observe(time.perf_counter() - start)
+
 
 # ── Setup ──
 app = FastAPI(title="FailureGuard AI Backend")
@@ -14,6 +108,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+app.add_middleware(MetricsMiddleware)
 
 # ── Configure Groq ──
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -21,81 +116,117 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY is not set in environment variables")
 
+# GROQ_BASE_URL (read by the client) can point at benchmarks/fake_llm_server.py
 groq_client = Groq(api_key=GROQ_API_KEY)
+async_groq_client = AsyncGroq(api_key=GROQ_API_KEY)
+# Bounds concurrent streaming LLM calls so a burst of questions queues here
+query_semaphore = asyncio.Semaphore(int(os.getenv("QUERY_CONCURRENCY", "8")))
+LLM_MODEL = "llama-3.3-70b-versatile"
+RETRIEVAL_TOP_K = 4
+# Token budget of the sensor table in /query prompts, whatever the fleet size
+PROMPT_SENSOR_TOKENS = int(os.getenv("PROMPT_SENSOR_TOKENS", "1500"))
+# /stream: how often the state is checked for changes, and the idle heartbeat
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "0.25"))
+STREAM_KEEPALIVE_SECONDS = 15
 
 
 # ── Models ──
 class QueryRequest(BaseModel):
     question: str
 
+# ── Live State ──
+# Each sink is loaded as its compacted snapshot (if any) plus the live log
+def live_state(path, key="machine_id"):
+    return LatestStateCache(path, key=key, snapshot_path=snapshot_path_for(path))
+
+# STATE_DB: read latest state and history from the pipeline's SQLite sink,
+# which lets several uvicorn workers share one consistent view
+STATE_DB = os.getenv("STATE_DB", "")
+if STATE_DB:
+    latest_state = SqliteStateStore(STATE_DB, pool_size=int(os.getenv("STATE_DB_POOL_SIZE", "8")))
+else:
+    latest_state = live_state("data/processed_readings.jsonl")
+feature_state = live_state("data/machine_features.jsonl")
+episode_store = EpisodeStore(os.getenv("EPISODES_DB", "data/alert_episodes.db"))
+forecast_state = live_state("data/machine_forecast.jsonl")
+# Site / line / machine type aggregates maintained by the pipeline
+rollup_state = live_state("data/fleet_rollups.jsonl", key="group")
+history_store = HistoryStore(os.getenv("HISTORY_DIR", "data/history"))
+document_store = DocumentStore(
+    "data/documents_index.jsonl",
+    fallback_folder="documents",
+    snapshot_path=snapshot_path_for("data/documents_index.jsonl")
+)
+retriever = Retriever(document_store)
+# Distinguishes state versions across backend restarts in /snapshot ETags
+STATE_EPOCH = uuid.uuid4().hex[:8]
+
+def state_epoch():
+    # The SQLite store's versions are shared by all workers, so is its epoch
+    return getattr(latest_state, "epoch", None) or STATE_EPOCH
+snapshot_cache = (None, None)
+answer_cache = AnswerCache(
+    maxsize=int(os.getenv("QUERY_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", "300"))
+)
+Callback(
+    "failureguard_bytes_parsed_total",
+    "Bytes of Pathway JSONL sinks parsed by the backend",
+    lambda: {
+        ("processed_readings",): latest_state.bytes_parsed,
+        ("machine_features",): feature_state.bytes_parsed,
+        ("machine_forecast",): forecast_state.bytes_parsed,
+        ("fleet_rollups",): rollup_state.bytes_parsed,
+        ("documents_index",): document_store.bytes_parsed,
+    },
+    kind="counter",
+    labelnames=["sink"]
+)
+
 # ── Helper Functions ──
 def read_latest_readings():
-    filepath = "data/processed_readings.jsonl"
-
-    if not os.path.exists(filepath):
+    try:
+        with read_readings_timer.time():
+            return latest_state.readings()
+    except Exception as e:
+        print(f"Reading latest state failed: {e}")
         return {}
 
-    readings = {}
+def read_anomalous_readings():
+    """Latest readings of machines in alert; an indexed query with STATE_DB."""
     try:
-        with open(filepath, "r") as f:
-            lines = f.readlines()
-
-        for line in reversed(lines):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                data = json.loads(line)
-                machine_id = data.get("machine_id")
-                if machine_id and machine_id not in readings:
-                    readings[machine_id] = data
-            except:
-                continue
-    except:
+        if STATE_DB:
+            return latest_state.anomalous()
+        return {m: d for m, d in latest_state.readings().items() if d.get("is_anomaly")}
+    except Exception as e:
+        print(f"Reading alerts failed: {e}")
         return {}
 
-    return readings
-
 def read_documents():
     """
-    Try Pathway live document index first.
-    Falls back to reading files directly.
+    Pathway live document index, materialized in memory, as
+    (version, {filename: content}). Falls back to reading files directly.
     """
-    docs = {}
+    try:
+        with read_documents_timer.time():
+            return document_store.snapshot()
+    except Exception as e:
+        print(f"Reading documents failed: {e}")
+        return None, {}
 
-    # Try Pathway live index
-    pathway_index = "data/documents_index.jsonl"
-    if os.path.exists(pathway_index):
-        try:
-            with open(pathway_index, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    data = json.loads(line)
-                    path = data.get("path", "")
-                    content = data.get("content", "")
-                    if path and content:
-                        filename = os.path.basename(path)
-                        docs[filename] = content
-            if docs:
-                print(f"✅ Loaded {len(docs)} docs from Pathway index")
-                return docs
-        except Exception as e:
-            print(f"Pathway index failed, using fallback: {e}")
-
-    # Fallback — read files directly
-    doc_folder = "documents"
-    if os.path.exists(doc_folder):
-        for filename in os.listdir(doc_folder):
-            if filename.endswith(".txt"):
-                filepath = os.path.join(doc_folder, filename)
-                try:
-                    with open(filepath, "r") as f:
-                        docs[filename] = f.read()
-                except:
-                    continue
-    return docs
+def machines_in_question(question, readings):
+    return [m for m in readings if m.lower() in question.lower()]
+
+def retrieval_query(question, readings):
+    """
+    Adds the live alert text of the machines a question is about (or of every
+    anomalous machine when none is named), so "What's wrong with PUMP_A?"
+    retrieves the sections for PUMP_A's actual symptoms.
+    """
+    named = machines_in_question(question, readings)
+    machines = named or [m for m, d in readings.items() if d.get("is_anomaly")]
+    alerts = [readings[m].get("alert_message", "") for m in machines]
+    return " ".join([question] + [a for a in alerts if a])
 
 def get_health_status(score):
     if score >= 80:
@@ -107,19 +238,7 @@ def get_health_status(score):
     else:
         return "danger", "darkred"
 
-# ── API Endpoints ──
-
-@app.get("/")
-def root():
-    return {"message": "FailureGuard AI Backend Running ✅"}
-
-@app.get("/sensors")
-def get_sensor_data():
-    return read_latest_readings()
-
-@app.get("/alerts")
-def get_alerts():
-    readings = read_latest_readings()
+def build_alerts(readings):
     alerts = []
 
     for machine_id, data in readings.items():
@@ -136,9 +255,7 @@ def get_alerts():
 
     return alerts
 
-@app.get("/health")
-def get_machine_health():
-    readings = read_latest_readings()
+def build_health(readings):
     health_summary = {}
 
     for machine_id, data in readings.items():
@@ -155,10 +272,7 @@ def get_machine_health():
 
     return health_summary
 
-@app.get("/summary")
-def get_summary():
-    readings = read_latest_readings()
-
+def build_summary(readings):
     total = len(readings)
     anomalies = sum(
         1 for d in readings.values()
@@ -180,76 +294,468 @@ def get_summary():
         "average_health_score": round(avg_health, 1)
     }
 
-@app.post("/query")
-def query_assistant(request: QueryRequest):
-    readings = read_latest_readings()
-    documents = read_documents()
+def query_cache_key(question, readings, chunks):
+    """
+    Normalized question + health bands of the machines it names (all machines
+    when none is named) + the retrieved chunks, so an answer is reused until a
+    relevant machine changes band or a relevant document section is edited.
+    """
+    machines = machines_in_question(question, readings) or list(readings)
+    return (
+        normalize_question(question),
+        sensor_fingerprint(readings, machines, lambda score: get_health_status(score)[0]),
+        chunks_fingerprint(chunks)
+    )
 
-    sensor_context = json.dumps(readings, indent=2)
+# ── API Endpoints ──
 
-    all_docs = ""
-    for filename, content in documents.items():
-        all_docs += f"\n--- {filename} ---\n{content}\n"
+@app.get("/")
+def root():
+    return {"message": "FailureGuard AI Backend Running ✅"}
 
-    if not groq_client:
+@app.get("/sensors")
+def get_sensor_data():
+    return read_latest_readings()
+
+@app.get("/alerts")
+def get_alerts():
+    return build_alerts(read_anomalous_readings())
+
+EPISODE_STATUSES = ("open", "closed")
+
+@app.get("/alerts/episodes")
+def get_alert_episodes(status: str = None, start: str = None, end: str = None,
+                       machine_id: str = None, limit: int = 1000):
+    """
+    Alert episodes overlapping `start`..`end` ("YYYY-MM-DD HH:MM:SS", both
+    optional), newest first, from the pipeline's indexed episode table.
+    Open episodes show last_seen and readings as of their last escalation.
+    """
+    if status and status not in EPISODE_STATUSES:
+        raise HTTPException(status_code=400, detail="status must be open or closed")
+    return episode_store.query(status, start, end, machine_id, limit=max(1, limit))
+
+@app.get("/health")
+def get_machine_health():
+    return build_health(read_latest_readings())
+
+ROLLUP_LEVELS = ("fleet", "site", "line", "machine_type")
+
+def rollup_groups(level):
+    groups = [
+        {k: v for k, v in row.items() if k not in ("diff", "time")}
+        for row in rollup_state.readings().values()
+        if row.get("level") == level
+    ]
+    return sorted(groups, key=lambda g: g["group"])
+
+@app.get("/summary")
+def get_summary(group_by: str = None):
+    """
+    Fleet totals, or with `group_by` (fleet, site, line or machine_type)
+    per-group machine counts per health band, anomalies, mean and min
+    health. Both come from the pipeline's rollups, so the cost depends on
+    the number of groups rather than machines; without rollups the fleet
+    totals are computed from the latest readings.
+    """
+    if group_by is None:
+        fleet = rollup_groups("fleet")
+        if not fleet or not fleet[0]["machines"]:
+            return build_summary(read_latest_readings())
+        fleet = fleet[0]
         return {
-            "answer": "Demo mode — No API key set. PUMP_A shows critical anomalies.",
-            "sources": list(documents.keys())
+            "total_machines": fleet["machines"],
+            "healthy_machines": fleet["machines"] - fleet["anomalies"],
+            "anomaly_machines": fleet["anomalies"],
+            "average_health_score": fleet["mean_health"]
         }
+    if group_by not in ROLLUP_LEVELS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(ROLLUP_LEVELS)}")
+    return {"group_by": group_by, "groups": rollup_groups(group_by)}
+
+@app.get("/features")
+def get_machine_features(machine_id: str = None):
+    """Rolling-window features per machine from the Pathway pipeline."""
+    features = {
+        m: data.get("features", {})
+        for m, data in feature_state.readings().items()
+    }
+    if machine_id:
+        return {machine_id: features[machine_id]} if machine_id in features else {}
+    return features
+
+FORECAST_LEVELS = ("warning", "critical", "shutdown")
 
+@app.get("/forecast")
+def get_forecast(within_hours: float = None, level: str = "shutdown", machine_id: str = None):
+    """
+    Time-to-threshold forecasts per machine from the Pathway pipeline.
+    With `within_hours`, lists the machines expected to reach `level`
+    (warning, critical or shutdown) within that many hours, soonest first.
+    """
+    if level not in FORECAST_LEVELS:
+        raise HTTPException(status_code=400, detail=f"level must be one of {', '.join(FORECAST_LEVELS)}")
+    forecasts = {
+        m: data.get("forecast", {})
+        for m, data in forecast_state.readings().items()
+    }
+    if machine_id:
+        forecasts = {machine_id: forecasts[machine_id]} if machine_id in forecasts else {}
+    if within_hours is None:
+        return forecasts
+
+    machines = []
+    for m, forecast in forecasts.items():
+        hours = forecast.get(f"hours_to_{level}")
+        if hours is not None and hours <= within_hours:
+            machines.append({
+                "machine_id": m,
+                "hours": hours,
+                "signal": forecast.get(f"{level}_signal"),
+                "timestamp": forecast.get("timestamp"),
+            })
+    machines.sort(key=lambda x: x["hours"])
+    return {"level": level, "within_hours": within_hours, "machines": machines}
+
+@app.get("/history")
+def get_history(machine_id: str, start: str = None, end: str = None, limit: int = 10000):
+    """
+    Readings of one machine between `start` and `end` ("YYYY-MM-DD HH:MM:SS",
+    both optional and inclusive), served from the columnar history store.
+    """
+    if not machine_id or os.sep in machine_id or machine_id.startswith("."):
+        raise HTTPException(status_code=400, detail="Invalid machine_id")
     try:
-        # Step 1 — Smart retrieval using Groq
-        retrieval_response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a document retrieval system. Extract only the most relevant sections from the documents that relate to the question. Return only relevant excerpts."
-                },
-                {
-                    "role": "user",
-                    "content": f"Question: {request.question}\n\nDocuments:\n{all_docs}\n\nReturn only the most relevant sections."
-                }
-            ],
-            max_tokens=300
-        )
+        if STATE_DB:
+            return latest_state.history(machine_id, start, end, limit=max(1, limit))
+        return history_store.query(machine_id, start, end, limit=max(1, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {e}")
+
+@app.get("/snapshot")
+def get_snapshot(request: Request):
+    """
+    Health, sensors, alerts and summary built from one state version.
+    The ETag changes only when a new reading lands, so polling clients
+    sending If-None-Match get an empty 304 while the fleet is idle.
+    """
+    global snapshot_cache
+    version, readings = latest_state.snapshot()
+    etag = f'"{state_epoch()}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    if snapshot_cache[0] != etag:
+        snapshot_cache = (etag, {
+            "version": version,
+            "health": build_health(readings),
+            "sensors": readings,
+            "alerts": build_alerts(readings),
+            "summary": build_summary(readings)
+        })
+    return JSONResponse(snapshot_cache[1], headers=headers)
+
+def prepare_query(question, endpoint):
+    """
+    Shared by /query and /query/stream: retrieves document chunks locally
+    and returns (messages, sources, cache_key) for the single LLM call.
+    """
+    readings = read_latest_readings()
+
+    sensor_context, _, _ = build_sensor_context(
+        readings, machines_in_question(question, readings), PROMPT_SENSOR_TOKENS
+    )
 
-        relevant_context = retrieval_response.choices[0].message.content
-
-        # Step 2 — Final answer using sensor data + retrieved docs
-        final_response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert industrial maintenance technician assistant."
-                },
-                {
-                    "role": "user",
-                    "content": f"""LIVE SENSOR DATA:
+    # Step 1 — Local BM25 retrieval over document chunks
+    with QUERY_STEP_SECONDS.labels(endpoint, "retrieval").time():
+        chunks = retriever.search(
+            retrieval_query(question, readings),
+            k=RETRIEVAL_TOP_K,
+            snapshot=read_documents()
+        )
+    relevant_context = format_chunks(chunks)
+    sources = sorted({c["source"] for c in chunks})
+
+    # Step 2 — Final answer using sensor data + retrieved docs
+    messages = [
+        {
+            "role": "system",
+            "content": "You are an expert industrial maintenance technician assistant."
+        },
+        {
+            "role": "user",
+            "content": f"""LIVE SENSOR DATA (one machine per line, columns separated by |):
 {sensor_context}
 
 RELEVANT DOCUMENTATION:
 {relevant_context}
 
-QUESTION: {request.question}
+QUESTION: {question}
 
 Give a specific actionable answer based on sensor values and documentation."""
-                }
-            ],
-            max_tokens=500
+        }
+    ]
+    PROMPT_TOKENS.labels(endpoint).observe(sum(count_tokens(m["content"]) for m in messages))
+    return messages, sources, query_cache_key(question, readings, chunks)
+
+def sse_event(event, data, event_id=None):
+    prefix = f"id: {event_id}\n" if event_id else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def record_usage(endpoint, usage):
+    if usage is None:
+        return
+    LLM_TOKENS.labels(endpoint, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(endpoint, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+# ── Ingest (POST /ingest → pipeline's INGEST_ADDR) ──
+INGEST_MAX_BATCH = int(os.getenv("INGEST_MAX_BATCH", str(MAX_BATCH_ROWS)))
+# INGEST_ADDR="" turns ingest off here as in the pipeline: /ingest answers 503
+ingest_addr = os.getenv("INGEST_ADDR", INGEST_ADDR)
+ingest_client = IngestClient(
+    ingest_addr,
+    max_pending_rows=int(os.getenv("INGEST_MAX_PENDING_ROWS", str(MAX_PENDING_ROWS)))
+) if ingest_addr else None
+Callback(
+    "failureguard_ingest_pending_rows",
+    "Readings accepted by /ingest and not yet acknowledged by the pipeline",
+    lambda: ingest_client.pending_rows if ingest_client else 0
+)
+
+def prepare_ingest(body, content_type):
+    """Parses and validates one /ingest body; returns (total, accepted, errors, payload)."""
+    records = parse_body(body, content_type)
+    if len(records) > INGEST_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {INGEST_MAX_BATCH} readings per request")
+    columns, accepted, errors = validate(records)
+    return len(records), accepted, errors, encode_batch(columns) if accepted else None
+
+@app.post("/ingest")
+async def ingest_readings(request: Request):
+    """
+    Sensor readings as a JSON array or newline-delimited JSON, with the
+    fields of data/sensor_readings.csv. Valid readings are queued for the
+    sensor pipeline (202); invalid ones are counted and the first few
+    described. 429 when the queue to the pipeline is full, 503 when the
+    pipeline cannot be reached: retry after Retry-After seconds.
+    """
+    if ingest_client is None:
+        raise HTTPException(status_code=503, detail="Ingest is off (INGEST_ADDR is empty)")
+    body = await request.body()
+    try:
+        total, accepted, errors, payload = await asyncio.to_thread(
+            prepare_ingest, body, request.headers.get("content-type", "")
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not total:
+        raise HTTPException(status_code=400, detail="No readings in the request body")
+
+    rejected = total - accepted
+    INGEST_ROWS.labels("rejected").inc(rejected)
+    if not accepted:
+        return JSONResponse(status_code=422, content={"accepted": 0, "rejected": rejected, "errors": errors})
+
+    try:
+        ingest_client.submit(payload, accepted)
+    except IngestBusy as e:
+        INGEST_ROWS.labels("throttled").inc(accepted)
+        return JSONResponse(status_code=429, content={"detail": str(e)}, headers={"Retry-After": "1"})
+    except IngestUnavailable as e:
+        INGEST_ROWS.labels("unavailable").inc(accepted)
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "5"})
+    INGEST_ROWS.labels("accepted").inc(accepted)
+    return JSONResponse(status_code=202, content={"accepted": accepted, "rejected": rejected, "errors": errors})
+
+@app.post("/query")
+def query_assistant(request: QueryRequest):
+    messages, sources, cache_key = prepare_query(request.question, "query")
+
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    if not groq_client:
+        return {
+            "answer": "Demo mode — No API key set. PUMP_A shows critical anomalies.",
+            "sources": sources
+        }
+
+    try:
+        with QUERY_STEP_SECONDS.labels("query", "answer").time():
+            final_response = groq_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=messages,
+                max_tokens=500
+            )
+        record_usage("query", final_response.usage)
 
         answer = final_response.choices[0].message.content
+        answer_cache.put(cache_key, {"answer": answer, "sources": sources})
 
     except Exception as e:
         answer = f"Assistant error: {str(e)}"
 
     return {
         "answer": answer,
-        "sources": list(documents.keys())
+        "sources": sources,
+        "cached": False
     }
 
+@app.post("/query/stream")
+async def query_assistant_stream(request: QueryRequest):
+    """
+    Same answer as /query, streamed as server-sent events:
+    `token` events carry answer text as it is generated, then one `done`
+    event with the sources (or an `error` event).
+    """
+    # File parsing, retrieval and (STATE_DB) SQLite reads stay off the event loop
+    messages, sources, cache_key = await asyncio.to_thread(prepare_query, request.question, "query_stream")
+    cached = answer_cache.get(cache_key)
+
+    async def events():
+        if cached is not None:
+            yield sse_event("token", {"token": cached["answer"]})
+            yield sse_event("done", {"sources": cached["sources"], "cached": True})
+            return
+
+        parts = []
+        try:
+            async with query_semaphore:
+                start = time.perf_counter()
+                stream = await async_groq_client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=messages,
+                    max_tokens=500,
+                    stream=True
+                )
+                async for chunk in stream:
+                    token = chunk.choices[0].delta.content if chunk.choices else None
+                    if token:
+                        parts.append(token)
+                        yield sse_event("token", {"token": token})
+                    # Groq reports usage on the last chunk
+                    x_groq = getattr(chunk, "x_groq", None)
+                    record_usage("query_stream", getattr(x_groq, "usage", None))
+                QUERY_STEP_SECONDS.labels("query_stream", "answer").observe(time.perf_counter() - start)
+        except Exception as e:
+            yield sse_event("error", {"error": f"Assistant error: {str(e)}"})
+            return
+
+        answer_cache.put(cache_key, {"answer": "".join(parts), "sources": sources})
+        yield sse_event("done", {"sources": sources, "cached": False})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def alert_issues(row):
+    """Signals past the pipeline's alert thresholds, i.e. what an alert is about."""
+    return tuple(signal for signal, past in (
+        ("temperature", row.get("temperature", 0) > TEMPERATURE_LIMIT),
+        ("vibration", row.get("vibration", 0) > VIBRATION_LIMIT),
+        ("pressure", row.get("pressure", PRESSURE_LIMIT) < PRESSURE_LIMIT),
+    ) if past)
+
+fleet_feed = FleetFeed(latest_state, get_health_status, alert_issues)
+
+def parse_cursor(cursor):
+    """State version of a /stream cursor, or None if it is from another backend run."""
+    epoch, _, version = (cursor or "").partition("-")
+    if epoch != state_epoch() or not version.isdigit():
+        return None
+    return int(version)
+
+def stream_events(cursor):
+    """Returns (cursor, SSE text) with every change after `cursor` ("" when idle)."""
+    version, full, rows, transitions = fleet_feed.deltas(cursor)
+    if version == cursor:
+        return cursor, ""
+    event_id = f"{state_epoch()}-{version}"
+
+    if full:
+        return version, sse_event("snapshot", {
+            "version": version,
+            "health": build_health(rows),
+            "sensors": rows,
+            "alerts": build_alerts(rows)
+        }, event_id)
+
+    events = []
+    for machine_id, reading in rows.items():
+        health = build_health({machine_id: reading})[machine_id]
+        health.pop("latest_reading")  # already sent as "reading"
+        events.append(sse_event("reading", {
+            "machine_id": machine_id,
+            "reading": reading,
+            "health": health
+        }, event_id))
+        transition = transitions.get(machine_id)
+        if not transition:
+            continue
+        if transition["status"]:
+            previous, status = transition["status"]
+            events.append(sse_event("health", {
+                "machine_id": machine_id,
+                "status": status,
+                "previous": previous,
+                "health_score": reading.get("health_score", 100)
+            }, event_id))
+        if transition["alert"] == "raised":
+            events.append(sse_event("alert", build_alerts({machine_id: reading})[0], event_id))
+        elif transition["alert"] == "cleared":
+            events.append(sse_event("alert_cleared", {"machine_id": machine_id}, event_id))
+    return version, "".join(events)
+
+@app.get("/stream")
+async def stream_changes(request: Request, cursor: str = None):
+    """
+    Server-sent events with per-machine changes only:
+      snapshot       full fleet state, on connect or when the cursor is unknown
+      reading        a machine's new latest reading (with its health entry)
+      health         a machine moved to another health band
+      alert          a machine raised a new alert
+      alert_cleared  a machine's alert cleared
+    Every event id is a cursor. Reconnecting with it (Last-Event-ID header,
+    as EventSource does, or ?cursor=) resumes with the changes missed.
+    An idle fleet costs one keepalive comment every 15 s.
+    """
+    version = parse_cursor(request.headers.get("last-event-id") or cursor)
+
+    async def events():
+        nonlocal version
+        idle = 0.0
+        while True:
+            version, payload = await asyncio.to_thread(stream_events, version)
+            if payload:
+                idle = 0.0
+                yield payload
+            else:
+                idle += STREAM_POLL_SECONDS
+                if idle >= STREAM_KEEPALIVE_SECONDS:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+            await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/query/cache")
+def query_cache_stats():
+    return answer_cache.stats()
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of the backend's metrics."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,101 @@
+import os
+import threading
+
+from jsonl_tail import JsonlTail
+
+
+class DocumentStore:
+    """
+    Materialized view of the Pathway document index (documents_index.jsonl).
+
+    Replays the +1/-1 diffs of the jsonlines sink: an upsert is written as
+    a retraction of the old content and an insertion of the new one, in no
+    guaranteed order within the same `time`. A retraction only removes a
+    document if it still holds the retracted content, so the latest
+    version always wins. Only lines appended since the last call are
+    parsed, and an unchanged index costs one os.stat().
+    """
+
+    def __init__(self, index_path, fallback_folder=None, snapshot_path=None):
+        self.fallback_folder = fallback_folder
+        self.version = 0
+        self._tail = JsonlTail(index_path, snapshot_path)
+        self._current = {}
+        self._docs = {}
+        self._fallback_docs = {}
+        self._fallback_signature = None
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_parsed(self):
+        return self._tail.bytes_parsed
+
+    def _apply(self, data):
+        path = data.get("path", "")
+        if not path:
+            return False
+        content = data.get("content", "")
+        diff = data.get("diff", 1)
+        time = data.get("time", 0)
+        current = self._current.get(path)
+
+        if diff < 0:
+            if current is not None and current[0] == content:
+                del self._current[path]
+                return True
+            return False
+
+        if current is None or time >= current[1]:
+            self._current[path] = (content, time)
+            return current is None or current[0] != content
+        return False
+
+    def _refresh_index(self):
+        reset, records = self._tail.poll()
+        changed = reset
+        if reset:
+            self._current = {}
+        for data in records:
+            changed = self._apply(data) or changed
+        if changed:
+            self._docs = {
+                os.path.basename(path): content
+                for path, (content, _) in self._current.items()
+                if content
+            }
+            self.version += 1
+            print(f"✅ Loaded {len(self._docs)} docs from Pathway index")
+
+    def _refresh_fallback(self):
+        # Read files directly when the Pathway watcher has not written anything
+        folder = self.fallback_folder
+        if not folder or not os.path.isdir(folder):
+            return {}
+        entries = sorted(
+            (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+            for entry in os.scandir(folder)
+            if entry.name.endswith(".txt")
+        )
+        if entries != self._fallback_signature:
+            docs = {}
+            for filename, _, _ in entries:
+                try:
+                    with open(os.path.join(folder, filename), "r") as f:
+                        docs[filename] = f.read()
+                except OSError:
+                    continue
+            self._fallback_docs = docs
+            self._fallback_signature = entries
+            self.version += 1
+        return self._fallback_docs
+
+    def snapshot(self):
+        """Returns (version, {filename: content}). Do not mutate the dict."""
+        with self._lock:
+            self._refresh_index()
+            if self._docs:
+                return self.version, self._docs
+            return self.version, self._refresh_fallback()
+
+    def documents(self):
+        return self.snapshot()[1]
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Bytes compared at the start of the file to notice it was rewritten in place
+HEAD_BYTES = 256
+
+
+class JsonlTail:
+    """
+    Follows an append-only JSONL file (a Pathway jsonlines sink).
+    Remembers the byte offset already consumed and only parses lines
+    appended since the last poll. A changed inode, a shrinking file or a
+    different first line means the file was rotated/truncated, and the
+    tail starts over from the beginning.
+
+    With a `snapshot_path` (see pipeline/compaction.py), every start from
+    the beginning first replays the compacted snapshot, so the cost is
+    snapshot + live log rather than the whole history.
+    """
+
+    def __init__(self, path, snapshot_path=None):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.bytes_parsed = 0
+        self._offset = 0
+        self._inode = None
+        self._head = b""
+        self._signature = None
+        # Set until the snapshot has been replayed for the current file; the
+        # offset alone stays 0 while the log is still empty
+        self._from_start = True
+
+    def _reset(self):
+        self._offset = 0
+        self._inode = None
+        self._head = b""
+        self._signature = None
+        self._from_start = True
+
+    def poll(self):
+        """
+        Returns (reset, records). `reset` is True when previously returned
+        records are no longer valid and the caller must drop its state.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            was_open = self._inode is not None
+            self._reset()
+            return was_open, []
+
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            return False, []
+
+        reset = False
+        with open(self.path, "rb") as f:
+            head = f.read(HEAD_BYTES)
+            if (
+                stat.st_ino != self._inode
+                or stat.st_size < self._offset
+                or not head.startswith(self._head[:len(head)])
+            ):
+                reset = self._inode is not None
+                self._offset = 0
+                self._from_start = True
+            self._inode = stat.st_ino
+            self._head = head
+
+            from_start, self._from_start = self._from_start, False
+            f.seek(self._offset)
+            chunk = f.read(stat.st_size - self._offset)
+
+        self._signature = signature
+
+        records = []
+        if from_start and self.snapshot_path:
+            try:
+                with open(self.snapshot_path, "rb") as f:
+                    snapshot = f.read()
+                self.bytes_parsed += len(snapshot)
+                records.extend(self._parse(snapshot))
+            except OSError:
+                pass
+
+        # Only consume complete lines, a partially written one is picked up later
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return reset, records
+        chunk = chunk[:end + 1]
+        self._offset += len(chunk)
+        self.bytes_parsed += len(chunk)
+        records.extend(self._parse(chunk))
+        return reset, records
+
+    @staticmethod
+    def _parse(chunk):
+        records = []
+        for line in chunk.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+
+def _content(row):
+    """A sink row without the diff/time Pathway adds to every change."""
+    return {k: v for k, v in row.items() if k not in ("diff", "time")}
+
+
+class LatestStateCache:
+    """
+    Process-wide latest reading per machine, kept up to date by tailing
+    processed_readings.jsonl (or any per-machine Pathway sink, such as
+    machine_features.jsonl). Endpoints read the in-memory table, so a
+    request costs O(machines) instead of O(file size).
+
+    A machine whose latest row is retracted without a replacement (its
+    input rewritten without it) is dropped; the older rows it may still
+    have are not kept, so it comes back with its next reading.
+    """
+
+    def __init__(self, path, key="machine_id", snapshot_path=None):
+        self.key = key
+        self.version = 0
+        self._tail = JsonlTail(path, snapshot_path)
+        self._rows = {}
+        # key -> version of its last change, least recently changed first
+        self._changed = OrderedDict()
+        self._reset_version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_parsed(self):
+        return self._tail.bytes_parsed
+
+    def refresh(self):
+        with self._lock:
+            reset, records = self._tail.poll()
+            changed = reset
+            next_version = self.version + 1
+            if reset:
+                self._rows = {}
+                self._changed.clear()
+                self._reset_version = next_version
+
+            removed = set()
+            for data in records:
+                key = data.get(self.key)
+                if not key:
+                    continue
+                # diff -1 rows retract a previous version of an upserted row;
+                # only a retraction of the row held here removes the key
+                if data.get("diff", 1) < 0:
+                    current = self._rows.get(key)
+                    if current is not None and _content(current) == _content(data):
+                        del self._rows[key]
+                        removed.add(key)
+                    continue
+                # Pathway does not keep input order inside a batch,
+                # so the newest timestamp wins rather than the last line
+                current = self._rows.get(key)
+                if current is None or str(data.get("timestamp", "")) >= str(current.get("timestamp", "")):
+                    self._rows[key] = data
+                    self._changed[key] = next_version
+                    self._changed.move_to_end(key)
+                    removed.discard(key)
+                    changed = True
+
+            # Upserts retract and re-add within a batch; a key still gone
+            # afterwards is a removal, which deltas cannot carry, so clients
+            # have to start over
+            if removed:
+                for key in removed:
+                    del self._changed[key]
+                self._reset_version = next_version
+                changed = True
+
+            if changed:
+                self.version = next_version
+            return self.version
+
+    def snapshot(self):
+        """Returns (version, readings) taken under one lock."""
+        self.refresh()
+        with self._lock:
+            return self.version, dict(self._rows)
+
+    def readings(self):
+        return self.snapshot()[1]
+
+    def changes_since(self, version):
+        """
+        Returns (version, rows, full). `rows` holds the rows changed after
+        `version`, found by walking the change order from the newest end, so
+        the cost is O(changed rows). When `version` is None or predates a
+        reset of the file, every row is returned with full=True and the
+        caller must replace its state.
+        """
+        self.refresh()
+        with self._lock:
+            if version is None or version < self._reset_version or version > self.version:
+                return self.version, dict(self._rows), True
+            rows = {}
+            for key in reversed(self._changed):
+                if self._changed[key] <= version:
+                    break
+                rows[key] = self._rows[key]
+            return self.version, rows, False
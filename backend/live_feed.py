@@ -0,0 +1,78 @@
+import threading
+
+
+class FleetFeed:
+    """
+    Per-machine deltas over the versions of a LatestStateCache, for push
+    clients. Besides the rows changed after a client's cursor it tracks,
+    per machine, the version at which the health band and the alert state
+    last changed, so a resumed client is told about every machine whose
+    band moved or whose alert was raised or cleared since its cursor.
+
+    An alert is identified by `issues_of(row)` (which signals are out of
+    range), not by its message: the message quotes the raw values, so it
+    changes with every reading of an anomalous machine.
+    """
+
+    def __init__(self, state, status_of, issues_of):
+        self.state = state
+        self.status_of = status_of
+        self.issues_of = issues_of
+        self._version = None
+        self._machines = {}
+        self._lock = threading.Lock()
+
+    def _track(self, version, rows):
+        for machine_id, row in rows.items():
+            status = self.status_of(row.get("health_score", 100))[0]
+            alert = self.issues_of(row) if row.get("is_anomaly") else None
+            track = self._machines.get(machine_id)
+            if track is None:
+                self._machines[machine_id] = {
+                    "status": status, "previous_status": None, "status_version": version,
+                    # A machine that appears without an alert has nothing to clear
+                    "alert": alert, "alert_version": version if alert is not None else 0,
+                }
+                continue
+            if status != track["status"]:
+                track["previous_status"] = track["status"]
+                track["status"] = status
+                track["status_version"] = version
+            if alert != track["alert"]:
+                track["alert"] = alert
+                track["alert_version"] = version
+
+    def deltas(self, cursor):
+        """
+        Returns (version, full, rows, transitions) for a client that has
+        seen everything up to `cursor` (a state version, or None).
+        `transitions` maps machine_id to {"status": (previous, current) or
+        None, "alert": "raised" | "cleared" | None} for the changed machines
+        whose band or alert state moved after the cursor.
+        """
+        with self._lock:
+            version, rows, full = self.state.changes_since(self._version)
+            if full:
+                self._machines = {m: t for m, t in self._machines.items() if m in rows}
+            self._track(version, rows)
+            self._version = version
+
+            if cursor == version:
+                return version, False, {}, {}
+            version, rows, full = self.state.changes_since(cursor)
+            self._track(version, rows)
+            self._version = max(self._version, version)
+
+            transitions = {}
+            if not full:
+                for machine_id in rows:
+                    track = self._machines[machine_id]
+                    status = None
+                    if track["status_version"] > cursor:
+                        status = (track["previous_status"], track["status"])
+                    alert = None
+                    if track["alert_version"] > cursor:
+                        alert = "raised" if track["alert"] is not None else "cleared"
+                    if status or alert:
+                        transitions[machine_id] = {"status": status, "alert": alert}
+            return version, full, rows, transitions
@@ -0,0 +1,91 @@
+import heapq
+import re
+from datetime import datetime
+
+# Pieces the Llama 3 tokenizer usually keeps whole: digit runs are split
+# in groups of up to 3, letter runs cost about one token per 4 characters,
+# every other symbol is its own token. Leading spaces merge with the word.
+PIECE = re.compile(r"\d{1,3}|[^\W\d_]+|[^\s\w]|_")
+
+COLUMNS = "machine|health|temp_C|vib_mm_s|press_bar|age_s|alert"
+
+
+def count_tokens(text):
+    """
+    Local, slightly pessimistic estimate of the LLM's token count, so
+    prompts can be sized without a round trip or a tokenizer download.
+    """
+    tokens = 0
+    for piece in PIECE.findall(text):
+        tokens += -(-len(piece) // 4) if piece[0].isalpha() else 1
+    return tokens
+
+
+def _age(timestamp, newest):
+    try:
+        return int((newest - datetime.fromisoformat(timestamp)).total_seconds())
+    except (TypeError, ValueError):
+        return ""
+
+
+def _row(machine_id, data, newest):
+    alert = data.get("alert_message", "") or ""
+    # "ALERT: PUMP_A — High temp (91.2°C)": the machine and values are already in the row
+    issues = re.sub(r"\s*\([^)]*\)", "", alert.split("—", 1)[-1]).strip() if alert else ""
+    return "|".join(str(x) for x in (
+        machine_id,
+        data.get("health_score", ""),
+        data.get("temperature", ""),
+        data.get("vibration", ""),
+        data.get("pressure", ""),
+        _age(data.get("timestamp"), newest) if newest else "",
+        issues,
+    ))
+
+
+def build_sensor_context(readings, named, budget, max_rows=500):
+    """
+    Fleet summary plus a compact table of the machines most relevant to a
+    question, within `budget` tokens: the machines it names first, then
+    anomalous ones, then the lowest health scores. Only the top `max_rows`
+    candidates are ranked, so the cost does not grow with a full sort of
+    the fleet and the prompt size stays flat however many machines there
+    are. Returns (context, tokens, machines shown).
+    """
+    total = len(readings)
+    anomalies = sum(1 for d in readings.values() if d.get("is_anomaly"))
+    latest = max((d.get("timestamp") or "" for d in readings.values()), default="")
+    try:
+        newest = datetime.fromisoformat(latest)
+    except ValueError:
+        newest = None
+    named = [m for m in named if m in readings]
+    named_set = set(named)
+    ranked = named + [
+        m for m in heapq.nsmallest(
+            max_rows,
+            (m for m in readings if m not in named_set),
+            key=lambda m: (not readings[m].get("is_anomaly"), readings[m].get("health_score", 100), m)
+        )
+    ]
+
+    def summary(shown):
+        return (
+            f"Fleet: {total} machines, {anomalies} anomalous, newest reading {latest or 'n/a'} "
+            f"(age_s = seconds older than that). "
+            f"Showing {shown}: named in the question, then anomalous, then lowest health."
+        )
+
+    # Sized for the most rows that could be shown, which is never fewer tokens
+    tokens = count_tokens(summary(len(ranked))) + 1 + count_tokens(COLUMNS) + 1
+    lines = [COLUMNS]
+    for machine_id in ranked:
+        line = _row(machine_id, readings[machine_id], newest)
+        cost = count_tokens(line) + 1
+        if tokens + cost > budget:
+            break
+        lines.append(line)
+        tokens += cost
+
+    shown = len(lines) - 1
+    return summary(shown) + "\n" + "\n".join(lines), tokens, shown
@@ -0,0 +1,125 @@
+import math
+import re
+import threading
+from collections import Counter
+
+# ── Chunking ──
+# Paragraphs shorter than this are headers ("SYMPTOM: ...", "1. HIGH TEMPERATURE")
+# and get merged with the paragraph that follows them.
+MIN_CHUNK_CHARS = 120
+SEPARATOR = re.compile(r"^[\s=─-]+$")
+
+TOKEN = re.compile(r"[a-z0-9_]+(?:\.[0-9]+)?")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for",
+    "from", "how", "i", "if", "in", "is", "it", "my", "of", "on", "or",
+    "should", "the", "this", "to", "what", "when", "which", "why", "with",
+    "s", "wrong", "can", "we", "you",
+}
+
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def is_heading(line):
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) > 3 and all(c.isupper() for c in letters)
+
+
+def chunk_document(filename, content):
+    """
+    Splits a document into paragraph chunks, keeping headers with their body.
+    Sub-sections ("Immediate Actions:") are prefixed with the last section
+    heading seen ("2. HIGH VIBRATION"), so they stay retrievable.
+    """
+    chunks = []
+    pending = ""
+    heading = ""
+    for block in re.split(r"\n\s*\n", content):
+        lines = [line for line in block.splitlines() if not SEPARATOR.match(line)]
+        block = "\n".join(lines).strip()
+        if not block:
+            continue
+        first_line = block.splitlines()[0]
+        if is_heading(first_line):
+            heading = first_line.strip()
+        elif heading and not pending and first_line.rstrip().endswith(":"):
+            block = f"{heading}\n{block}"
+        block = f"{pending}\n{block}" if pending else block
+        if len(block) < MIN_CHUNK_CHARS:
+            pending = block
+            continue
+        chunks.append({"source": filename, "text": block})
+        pending = ""
+    if pending:
+        chunks.append({"source": filename, "text": pending})
+    return chunks
+
+
+# ── BM25 ──
+class BM25Index:
+    """Okapi BM25 over document chunks, backed by an inverted index."""
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.lengths = []
+
+        for i, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk["text"]))
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings.setdefault(term, []).append((i, tf))
+
+        n = len(chunks)
+        self.avg_length = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self.postings.items()
+        }
+
+    def search(self, query, k=4):
+        scores = {}
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for i, tf in plist:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_length)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [dict(self.chunks[i], score=round(score, 3)) for i, score in top]
+
+
+class Retriever:
+    """Keeps a BM25 index in sync with the DocumentStore, rebuilding on new versions."""
+
+    def __init__(self, document_store):
+        self.document_store = document_store
+        self._version = None
+        self._index = BM25Index([])
+        self._lock = threading.Lock()
+
+    def index(self, snapshot=None):
+        """`snapshot` is a (version, docs) the caller already read from the store."""
+        version, docs = snapshot or self.document_store.snapshot()
+        with self._lock:
+            if version != self._version:
+                chunks = []
+                for filename, content in sorted(docs.items()):
+                    chunks.extend(chunk_document(filename, content))
+                self._index = BM25Index(chunks)
+                self._version = version
+            return self._index
+
+    def search(self, query, k=4, snapshot=None):
+        return self.index(snapshot).search(query, k)
+
+
+def format_chunks(chunks):
+    return "\n\n".join(f"--- {c['source']} ---\n{c['text']}" for c in chunks)
@@ -0,0 +1,83 @@
+"""
+Throughput of pipeline/backfill.py per worker count on a generated
+archive: --files CSVs (think one per day) of simulator readings for
+--machines machines, --rows in total.
+
+Every run re-scores the whole archive from scratch; rows/s counts reading
+the CSVs, scoring and writing processed_readings rows. Speed-up is
+bounded by the cores available (printed first).
+
+    python benchmarks/bench_backfill.py [--rows 1000000] [--machines 1000] [--files 10]
+                                        [--workers 1,2,4,8] [--json results.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "pipeline"))
+sys.path.insert(0, os.path.join(BASE_DIR, "simulators"))
+
+from backfill import backfill
+from sensor_simulator import FIELDNAMES, FleetGenerator, machine_ids
+
+
+def write_archive(directory, rows, machines, files, seed):
+    """`files` CSVs of consecutive ticks (every machine once per second)."""
+    generator = FleetGenerator(machine_ids(machines), seed=seed)
+    start = datetime(2026, 1, 1)
+    per_file = -(-rows // files)
+    tick = 0
+    for i in range(files):
+        n = min(per_file, rows - i * per_file)
+        with open(os.path.join(directory, f"sensor_readings_{i:03d}.csv"), "w") as f:
+            f.write(",".join(FIELDNAMES) + "\n")
+            while n > 0:
+                count = min(machines, n)
+                f.writelines(generator.lines(count, (start + timedelta(seconds=tick)).strftime("%Y-%m-%d %H:%M:%S")))
+                n -= count
+                tick += 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--machines", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pm_backfill_")
+    archive = os.path.join(workdir, "archive")
+    os.makedirs(archive)
+    try:
+        write_archive(archive, args.rows, args.machines, args.files, args.seed)
+        print(f"{args.rows:,} readings, {args.machines:,} machines, {args.files} files, {os.cpu_count()} CPUs\n")
+        print(f"{'workers':>7}  {'rows/s':>10}  {'read s':>7}  {'score s':>8}  {'total s':>8}  {'speed-up':>8}")
+
+        results = []
+        for workers in (int(x) for x in args.workers.split(",")):
+            result = backfill(archive, os.path.join(workdir, "processed_readings.jsonl"), workers)
+            results.append(result)
+            speedup = result["rows_per_second"] / results[0]["rows_per_second"]
+            print(
+                f"{workers:>7}  {result['rows_per_second']:>10,}  {result['read_seconds']:>7}  "
+                f"{result['score_seconds']:>8}  {result['total_seconds']:>8}  {speedup:>7.2f}x"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "cpus": os.cpu_count(), "runs": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
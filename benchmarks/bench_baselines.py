@@ -0,0 +1,150 @@
+"""
+Cost of the per-machine EWMA baselines behind deviation_score, through
+the pipeline's own Pathway graph (score_stream in pathway_pipeline.py).
+
+  1. replay  - data/sensor_readings.csv in file order, committed to Pathway
+               in batches of --batch-size rows: rows/sec, the share of
+               scored readings above --threshold, and how many readings
+               were scored on the wrong side of warm-up (should be 0:
+               every machine's first --warmup readings by timestamp are
+               None, whatever order a batch is handed over in)
+  2. scale   - the same readings spread over --machines synthetic machine
+               IDs (each reading is remapped round-robin), so every machine
+               still gets enough readings to leave warm-up: rows/sec and
+               bytes of baseline state per machine
+
+    python benchmarks/bench_baselines.py [--csv data/sensor_readings.csv]
+                                         [--machines 1000,10000] [--rows 500000]
+                                         [--batch-size 5000]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+import pathway as pw
+from pathway.internals.parse_graph import G
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "pipeline"))
+
+import pathway_pipeline
+from baselines import MachineBaseline
+from pathway_pipeline import SensorSchema, score_stream
+
+
+def load_readings(path):
+    with open(path, newline="") as f:
+        return [
+            (r["machine_id"], r["timestamp"], float(r["temperature"]), float(r["vibration"]), float(r["pressure"]))
+            for r in csv.DictReader(f)
+        ]
+
+
+class ReplaySubject(pw.io.python.ConnectorSubject):
+    """Readings in list order, one Pathway commit per `batch_size` rows."""
+
+    def __init__(self, readings, batch_size):
+        super().__init__()
+        self.readings = readings
+        self.batch_size = batch_size
+
+    def run(self):
+        for i, (m, ts, t, v, p) in enumerate(self.readings, 1):
+            self.next(machine_id=m, timestamp=ts, temperature=t, vibration=v, pressure=p)
+            if i % self.batch_size == 0:
+                self.commit()
+
+
+def run_pipeline(readings, batch_size):
+    """Scores `readings` through score_stream; returns (seconds, scored rows)."""
+    G.clear()
+    stream = pw.io.python.read(
+        ReplaySubject(readings, batch_size), schema=SensorSchema, autocommit_duration_ms=None
+    )
+    scored = []
+    pw.io.subscribe(
+        score_stream(stream),
+        on_change=lambda key, row, time, is_addition: scored.append(
+            (row["machine_id"], row["timestamp"], row["temperature"], row["vibration"],
+             row["pressure"], row["deviation_score"])
+        )
+    )
+    t0 = time.perf_counter()
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+    return time.perf_counter() - t0, scored
+
+
+def misplaced_warmup(scored, warmup):
+    """Readings scored during their machine's warm-up, or left unscored after it."""
+    by_machine = defaultdict(list)
+    for m, *reading in scored:
+        by_machine[m].append(reading)
+    misplaced = 0
+    for rows in by_machine.values():
+        rows.sort(key=lambda r: r[:4])
+        misplaced += sum((r[4] is None) != (i < warmup) for i, r in enumerate(rows))
+    return misplaced
+
+
+def replay(readings, batch_size, warmup, threshold):
+    elapsed, scored = run_pipeline(readings, batch_size)
+    scores = [r[5] for r in scored if r[5] is not None]
+    above = sum(s > threshold for s in scores)
+    machines = len({r[0] for r in scored})
+    print(
+        f"replay       {len(readings):>9,} readings  {machines} machines  "
+        f"{len(readings) / elapsed:>12,.0f} rows/sec  "
+        f"scored {len(scores):,}  above {threshold:g}: {above:,} ({above / max(len(scores), 1):.1%})  "
+        f"warm-up misplaced: {misplaced_warmup(scored, warmup)}"
+    )
+
+
+def scale(readings, machines, rows, batch_size, alpha, warmup):
+    ids = [f"MACHINE_{i:06d}" for i in range(machines)]
+    stream = [(ids[i % machines],) + readings[i % len(readings)][1:] for i in range(rows)]
+    elapsed, _ = run_pipeline(stream, batch_size)
+
+    # A machine's state does not grow after its first reading, so one
+    # reading each measures it (tracing the timed run slows it down)
+    tracemalloc.start()
+    traced = [MachineBaseline(alpha, warmup) for _ in range(machines)]
+    for baseline, r in zip(traced, stream):
+        baseline.update(*r[2:])
+    state_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(
+        f"{machines:>9,} machines  {rows:>10,} rows  {rows / elapsed:>12,.0f} rows/sec  "
+        f"{state_bytes / machines:>6,.0f} B/machine  ({rows // machines} readings each)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=os.path.join(BASE_DIR, "data", "sensor_readings.csv"))
+    parser.add_argument("--machines", default="1000,10000")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--alpha", type=float, default=pathway_pipeline.BASELINE_ALPHA)
+    parser.add_argument("--warmup", type=int, default=pathway_pipeline.BASELINE_WARMUP)
+    parser.add_argument("--threshold", type=float, default=4.0)
+    args = parser.parse_args()
+
+    # Read by the BaselineAccumulators when a machine is first seen
+    pathway_pipeline.BASELINE_ALPHA = args.alpha
+    pathway_pipeline.BASELINE_WARMUP = args.warmup
+
+    readings = load_readings(args.csv)
+    replay(readings, args.batch_size, args.warmup, args.threshold)
+    for machines in (int(n) for n in args.machines.split(",")):
+        # Enough rows for every machine to get past warm-up
+        rows = max(args.rows, machines * (args.warmup + 10))
+        scale(readings, machines, rows, args.batch_size, args.alpha, args.warmup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+End-to-end latency and throughput of the sensor -> Pathway -> API path.
+
+For every fleet size it starts, in a scratch directory, the real
+pathway_pipeline.py and the FastAPI backend (with Groq pointed at
+fake_llm_server.py), then:
+
+  1. latency   - writes fleet readings at --rate rows/s for --duration s,
+                 interleaved with probe readings, and polls /alerts until
+                 each probe is visible (ingest-to-visible latency)
+  2. burst     - writes --burst-rows as fast as possible and times how long
+                 the pipeline takes to make the last one visible (throughput)
+  3. api       - times --api-requests calls to each read endpoint and /query
+
+Probe rows are ordinary CSV readings of the machines BENCH_PROBE_<n> that
+carry their own sequence ID and write time:
+    temperature = 1000 + seq           (always anomalous, so it is in /alerts)
+    pressure    = time.time() at write (epoch seconds, millisecond precision)
+The API only keeps the latest reading per machine, so consecutive probes
+rotate over PROBE_SLOTS machines and are not overwritten before a poll.
+
+    python benchmarks/bench_end_to_end.py [--fleet-sizes 100,1000,10000] [--rate 5000]
+                                          [--duration 10] [--json results.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BASE_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "simulators"))
+sys.path.insert(0, BASE_DIR)
+
+from fake_llm_server import start_in_thread
+from sensor_simulator import FIELDNAMES, FleetGenerator, machine_ids
+
+PROBE_PREFIX = "BENCH_PROBE_"
+PROBE_SLOTS = 64
+PROBE_BASE = 1000
+API_ENDPOINTS = ["/sensors", "/alerts", "/health", "/summary", "/snapshot"]
+STARTUP_TIMEOUT = 120
+
+
+def percentiles(values):
+    if not values:
+        return {"count": 0}
+    a = np.asarray(values)
+    return {
+        "count": len(values),
+        "p50": round(float(np.percentile(a, 50)), 2),
+        "p95": round(float(np.percentile(a, 95)), 2),
+        "p99": round(float(np.percentile(a, 99)), 2),
+        "max": round(float(a.max()), 2),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class SensorFile:
+    """The pipeline's input CSV, written from one thread at a time."""
+
+    def __init__(self, path):
+        self._f = open(path, "w", buffering=1 << 20)
+        self._f.write(",".join(FIELDNAMES) + "\n")
+        self._f.flush()
+        self._lock = threading.Lock()
+        self.seq = 0
+
+    def write(self, lines):
+        with self._lock:
+            self._f.writelines(lines)
+            self._f.flush()
+
+    def probe(self):
+        """Appends one probe reading and returns its sequence ID."""
+        with self._lock:
+            self.seq += 1
+            now = time.time()
+            timestamp = datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
+            machine = f"{PROBE_PREFIX}{self.seq % PROBE_SLOTS}"
+            self._f.write(f"{machine},{timestamp},{PROBE_BASE + self.seq},0.0,{now:.3f}\n")
+            self._f.flush()
+            return self.seq
+
+    def close(self):
+        self._f.close()
+
+
+class ProbeWatcher(threading.Thread):
+    """Polls /alerts and records when each probe sequence ID first becomes visible."""
+
+    def __init__(self, api, interval):
+        super().__init__(daemon=True)
+        self.api = api
+        self.interval = interval
+        self.seen = {}  # seq -> latency in ms
+        self._stop_event = threading.Event()
+        self._session = requests.Session()
+
+    def poll(self):
+        alerts = self._session.get(f"{self.api}/alerts", timeout=10).json()
+        now = time.time()
+        for alert in alerts:
+            if not alert.get("machine_id", "").startswith(PROBE_PREFIX):
+                continue
+            seq = int(round(alert["temperature"])) - PROBE_BASE
+            if seq not in self.seen:
+                self.seen[seq] = (now - alert["pressure"]) * 1000
+
+    def wait_for(self, seq, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if seq in self.seen:
+                return True
+            time.sleep(self.interval)
+        return False
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except (requests.RequestException, ValueError):
+                pass
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def wait_http(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=2)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up in {timeout} s")
+
+
+def start_stack(workdir, llm_url, log):
+    """Starts the sensor pipeline and the backend in `workdir`; returns (processes, api)."""
+    env = {
+        **os.environ,
+        "GROQ_API_KEY": "fake",
+        "GROQ_BASE_URL": llm_url,
+        "QUERY_CACHE_TTL": "0",
+        "PYTHONUNBUFFERED": "1",
+    }
+    port = free_port()
+    pipeline = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, "pipeline", "pathway_pipeline.py")],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", os.path.join(REPO_DIR, "backend"),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    api = f"http://127.0.0.1:{port}"
+    wait_http(f"{api}/", STARTUP_TIMEOUT)
+    return [pipeline, backend], api
+
+
+def stop_stack(processes):
+    for p in processes:
+        p.terminate()
+    for p in processes:
+        try:
+            p.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+def latency_phase(sensors, generator, watcher, rate, duration, probe_interval, batch_size):
+    """Paced fleet writes with a probe every `probe_interval` seconds."""
+    written = 0
+    probes = []
+    start = time.perf_counter()
+    next_probe = start
+    while True:
+        now = time.perf_counter()
+        if now - start >= duration:
+            break
+        if now >= next_probe:
+            probes.append(sensors.probe())
+            next_probe += probe_interval
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        sensors.write(generator.lines(batch_size, timestamp))
+        written += batch_size
+        ahead = start + written / rate - time.perf_counter()
+        if ahead > 0:
+            time.sleep(min(ahead, probe_interval))
+    elapsed = time.perf_counter() - start
+
+    # Drain: the last probe shows when the pipeline caught up with the writes
+    last = sensors.probe()
+    watcher.wait_for(last, timeout=60)
+    latencies = [watcher.seen[s] for s in probes if s in watcher.seen]
+    return {
+        "rows_written": written,
+        "write_rate_rows_s": round(written / elapsed),
+        "probes": len(probes),
+        "probes_missed": len(probes) - len(latencies),
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def burst_phase(sensors, generator, watcher, rows, batch_size):
+    """Unthrottled writes; throughput = rows / time until the closing probe is visible."""
+    start = time.time()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for offset in range(0, rows, batch_size):
+        sensors.write(generator.lines(min(batch_size, rows - offset), timestamp))
+    write_seconds = time.time() - start
+    last = sensors.probe()
+    visible = watcher.wait_for(last, timeout=300)
+    total = time.time() - start
+    return {
+        "rows": rows,
+        "write_seconds": round(write_seconds, 3),
+        "visible_seconds": round(total, 3) if visible else None,
+        "pipeline_throughput_rows_s": round(rows / total) if visible else None,
+    }
+
+
+def api_phase(api, requests_per_endpoint):
+    session = requests.Session()
+    results = {}
+    for endpoint in API_ENDPOINTS:
+        timings = []
+        for _ in range(requests_per_endpoint):
+            t0 = time.perf_counter()
+            session.get(f"{api}{endpoint}", timeout=30).raise_for_status()
+            timings.append((time.perf_counter() - t0) * 1000)
+        results[endpoint] = percentiles(timings)
+
+    timings = []
+    for _ in range(requests_per_endpoint):
+        t0 = time.perf_counter()
+        session.post(f"{api}/query", json={"question": "Why is PUMP_A vibrating?"}, timeout=60).raise_for_status()
+        timings.append((time.perf_counter() - t0) * 1000)
+    results["/query"] = percentiles(timings)
+    return results
+
+
+def run_fleet(machines, args, llm_url):
+    workdir = tempfile.mkdtemp(prefix="pm_e2e_")
+    os.makedirs(os.path.join(workdir, "data"))
+    shutil.copytree(os.path.join(REPO_DIR, "documents"), os.path.join(workdir, "documents"))
+    sensors = SensorFile(os.path.join(workdir, "data", "sensor_readings.csv"))
+    generator = FleetGenerator(machine_ids(machines), seed=args.seed)
+    batch_size = max(1, min(machines, int(args.rate / 50) or 1))
+
+    log = open(os.path.join(workdir, "stack.log"), "w")
+    processes, api = start_stack(workdir, llm_url, log)
+    watcher = ProbeWatcher(api, args.poll_interval)
+    watcher.start()
+    try:
+        # Warm-up: one pass over the fleet, and wait until the pipeline is live
+        sensors.write(generator.lines(machines, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        if not watcher.wait_for(sensors.probe(), timeout=STARTUP_TIMEOUT):
+            raise RuntimeError(f"pipeline produced nothing, see {log.name}")
+
+        result = {"machines": machines, "target_rate_rows_s": args.rate}
+        result["latency"] = latency_phase(
+            sensors, generator, watcher, args.rate, args.duration, args.probe_interval, batch_size
+        )
+        result["burst"] = burst_phase(sensors, generator, watcher, args.burst_rows, max(batch_size, 1000))
+        result["api_ms"] = api_phase(api, args.api_requests)
+        return result
+    finally:
+        watcher.stop()
+        stop_stack(processes)
+        sensors.close()
+        log.close()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fleet-sizes", default="100,1000,10000")
+    parser.add_argument("--rate", type=float, default=5000, help="rows/s during the latency phase")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--probe-interval", type=float, default=0.2)
+    parser.add_argument("--poll-interval", type=float, default=0.01)
+    parser.add_argument("--burst-rows", type=int, default=100_000)
+    parser.add_argument("--api-requests", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="write results to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directories")
+    args = parser.parse_args()
+
+    llm_server, llm_url = start_in_thread()
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "config": vars(args),
+        "runs": [],
+    }
+    try:
+        for machines in (int(n) for n in args.fleet_sizes.split(",")):
+            print(f"── {machines:,} machines ──")
+            run = run_fleet(machines, args, llm_url)
+            report["runs"].append(run)
+
+            latency, burst = run["latency"], run["burst"]
+            print(f"  latency   p50 {latency['latency_ms'].get('p50')} ms  p95 {latency['latency_ms'].get('p95')} ms  "
+                  f"p99 {latency['latency_ms'].get('p99')} ms  at {latency['write_rate_rows_s']:,} rows/s")
+            print(f"  burst     {burst['rows']:,} rows visible in {burst['visible_seconds']} s "
+                  f"= {burst['pipeline_throughput_rows_s']} rows/s")
+            for endpoint, stats in run["api_ms"].items():
+                print(f"  {endpoint:<10} p50 {stats['p50']:>7} ms  p95 {stats['p95']:>7} ms  p99 {stats['p99']:>7} ms")
+    finally:
+        llm_server.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Range-query latency of the columnar history store (GET /history).
+
+Writes a month of 2-second readings for one machine (~1.3M rows) plus a
+month for a few neighbours, then times queries over ranges from one hour
+to the whole month. Only the queried machine's day partitions are opened.
+
+    python benchmarks/bench_history.py [--days 30] [--other-machines 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "pipeline"))
+
+from features import TIMESTAMP_FORMAT
+from history_store import HistoryStore, HistoryWriter
+
+INTERVAL_SECONDS = 2
+START = datetime(2026, 1, 1)
+RUNS = 20
+
+
+def write_month(writer, machine_id, days):
+    t = START
+    end = START + timedelta(days=days)
+    while t < end:
+        writer.append({
+            "machine_id": machine_id,
+            "timestamp": t.strftime(TIMESTAMP_FORMAT),
+            "temperature": 70.0,
+            "vibration": 2.0,
+            "pressure": 4.0,
+            "health_score": 100.0,
+            "is_anomaly": False,
+        })
+        t += timedelta(seconds=INTERVAL_SECONDS)
+        if t.hour == 0 and t.minute == 0 and t.second == 0:
+            writer.flush()
+    writer.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--other-machines", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        writer = HistoryWriter(root)
+        t0 = time.perf_counter()
+        write_month(writer, "PUMP_A", args.days)
+        for i in range(args.other_machines):
+            write_month(writer, f"MACHINE_{i:03d}", args.days)
+        print(f"Wrote {args.other_machines + 1} machines x {args.days} days in {time.perf_counter() - t0:.1f} s\n")
+
+        store = HistoryStore(root)
+        ranges = [
+            ("1 hour", timedelta(hours=1)),
+            ("1 day", timedelta(days=1)),
+            ("7 days", timedelta(days=7)),
+            (f"{args.days} days", timedelta(days=args.days)),
+        ]
+        print(f"{'range':<10} {'matched':>10} {'returned':>9} {'p50 ms':>8} {'max ms':>8}")
+        for label, span in ranges:
+            start = START + timedelta(days=args.days / 2) - span / 2 if span < timedelta(days=args.days) else START
+            start_s = start.strftime(TIMESTAMP_FORMAT)
+            end_s = (start + span).strftime(TIMESTAMP_FORMAT)
+            timings = []
+            for _ in range(RUNS):
+                t0 = time.perf_counter()
+                result = store.query("PUMP_A", start_s, end_s, limit=2000)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            print(f"{label:<10} {result['count']:>10} {result['returned']:>9} {timings[RUNS // 2]:>8.2f} {timings[-1]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
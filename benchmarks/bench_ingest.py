@@ -0,0 +1,238 @@
+"""
+POST /ingest throughput into the real sensor pipeline.
+
+Starts pathway_pipeline.py and one backend process in a scratch
+directory, then posts --rows simulator readings in batches of
+--batch-size from --clients concurrent clients, as JSON arrays or NDJSON.
+Reports the rate the backend accepted readings at (429s are retried after
+a short pause and counted), the rate they came out of the pipeline
+(until the last one is in data/processed_readings.jsonl), and the cost
+of parsing + validating a batch on its own.
+
+    python benchmarks/bench_ingest.py [--rows 200000] [--batch-size 5000] [--clients 4]
+                                      [--format json|ndjson] [--json results.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BASE_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "pipeline"))
+sys.path.insert(0, os.path.join(REPO_DIR, "simulators"))
+
+from ingest import parse_body, validate
+from sensor_simulator import FleetGenerator, machine_ids
+
+MARKER = "BENCH_INGEST_MARKER"
+STARTUP_TIMEOUT = 120
+TIMEOUT = 600
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_batches(rows, machines, batch_size, fmt, seed):
+    """Encoded request bodies of simulator readings, one tick per second."""
+    generator = FleetGenerator(machine_ids(machines), seed=seed)
+    start = datetime(2026, 1, 1)
+    readings = []
+    tick = 0
+    while len(readings) < rows:
+        n = min(machines, rows - len(readings))
+        stamp = (start + timedelta(seconds=tick)).strftime("%Y-%m-%d %H:%M:%S")
+        for line in generator.lines(n, stamp):
+            m, ts, t, v, p = line.rstrip("\n").split(",")
+            readings.append({"machine_id": m, "timestamp": ts, "temperature": float(t),
+                             "vibration": float(v), "pressure": float(p)})
+        tick += 1
+    stamp = (start + timedelta(seconds=tick)).strftime("%Y-%m-%d %H:%M:%S")
+    readings.append({"machine_id": MARKER, "timestamp": stamp, "temperature": 70.0, "vibration": 1.5, "pressure": 4.0})
+
+    batches = []
+    for i in range(0, len(readings), batch_size):
+        chunk = readings[i:i + batch_size]
+        if fmt == "ndjson":
+            batches.append("\n".join(json.dumps(r) for r in chunk).encode())
+        else:
+            batches.append(json.dumps(chunk).encode())
+    return batches
+
+
+def wait_http(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=2)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up in {timeout} s")
+
+
+def wait_for_marker(path, timeout=TIMEOUT):
+    offset = 0
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                chunk = f.read()
+        except OSError:
+            chunk = b""
+        end = chunk.rfind(b"\n") + 1
+        if MARKER.encode() in chunk[:end]:
+            return
+        offset += end
+        time.sleep(0.05)
+    raise RuntimeError(f"{MARKER} not in {path} after {timeout} s")
+
+
+def post_all(api, batches, clients, content_type):
+    """Posts every batch once accepted; returns (seconds, 429 responses)."""
+    lock = threading.Lock()
+    queue = list(reversed(batches))
+    throttled = [0]
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with lock:
+                if not queue:
+                    return
+                body = queue.pop()
+            while True:
+                r = session.post(f"{api}/ingest", data=body, headers={"Content-Type": content_type}, timeout=60)
+                if r.status_code == 202:
+                    break
+                if r.status_code not in (429, 503):
+                    raise RuntimeError(f"/ingest returned {r.status_code}: {r.text[:200]}")
+                with lock:
+                    throttled[0] += 1
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, throttled[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--machines", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    content_type = "application/x-ndjson" if args.format == "ndjson" else "application/json"
+    batches = make_batches(args.rows, args.machines, args.batch_size, args.format, args.seed)
+
+    # Parse + validate alone, on one batch
+    body = batches[0]
+    runs = 20
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        validate(parse_body(body, content_type))
+    per_batch = (time.perf_counter() - t0) / runs
+    validate_rate = args.batch_size / per_batch
+
+    workdir = tempfile.mkdtemp(prefix="pm_ingest_")
+    os.makedirs(os.path.join(workdir, "data"))
+    with open(os.path.join(workdir, "data", "sensor_readings.csv"), "w") as f:
+        f.write("machine_id,timestamp,temperature,vibration,pressure\n")
+    port, ingest_port = free_port(), free_port()
+    env = {
+        **os.environ,
+        "GROQ_API_KEY": "fake",
+        "INGEST_ADDR": f"127.0.0.1:{ingest_port}",
+        "PIPELINE_METRICS_PORT": "",
+        "HISTORY_DIR": "",
+        "PYTHONUNBUFFERED": "1",
+    }
+    log = open(os.path.join(workdir, "services.log"), "w")
+    processes = []
+    try:
+        processes.append(subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, "pipeline", "pathway_pipeline.py")],
+            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+        ))
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", os.path.join(REPO_DIR, "backend"),
+             "--port", str(port), "--log-level", "warning"],
+            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+        ))
+        api = f"http://127.0.0.1:{port}"
+        wait_http(f"{api}/", STARTUP_TIMEOUT)
+        # Until the pipeline's ingest port is up, /ingest answers 503
+        deadline = time.time() + STARTUP_TIMEOUT
+        while requests.post(f"{api}/ingest", json=[], timeout=5).status_code != 400 or \
+                requests.get(f"{api}/metrics", timeout=5).text.find("failureguard_ingest_pending_rows") < 0:
+            if time.time() > deadline:
+                raise RuntimeError("backend did not come up")
+            time.sleep(0.2)
+        probe = {"machine_id": "WARMUP", "timestamp": "2026-01-01 00:00:00",
+                 "temperature": 70.0, "vibration": 1.5, "pressure": 4.0}
+        while requests.post(f"{api}/ingest", json=[probe], timeout=5).status_code == 503:
+            if time.time() > deadline:
+                raise RuntimeError("pipeline ingest port did not come up")
+            time.sleep(0.2)
+
+        start = time.perf_counter()
+        post_seconds, throttled = post_all(api, batches, args.clients, content_type)
+        wait_for_marker(os.path.join(workdir, "data", "processed_readings.jsonl"))
+        pipeline_seconds = time.perf_counter() - start
+    finally:
+        for p in processes:
+            p.terminate()
+        for p in processes:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        log.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    rows = args.rows + 1
+    result = {
+        "rows": rows,
+        "batch_size": args.batch_size,
+        "clients": args.clients,
+        "format": args.format,
+        "validate_rows_per_second": round(validate_rate),
+        "accepted_rows_per_second": round(rows / post_seconds),
+        "pipeline_rows_per_second": round(rows / pipeline_seconds),
+        "throttled_responses": throttled,
+    }
+    print(f"{rows:,} readings, {args.format}, batches of {args.batch_size:,}, {args.clients} clients")
+    print(f"  parse + validate      {result['validate_rows_per_second']:>10,} rows/s")
+    print(f"  accepted by /ingest   {result['accepted_rows_per_second']:>10,} rows/s  ({throttled} × 429/503 retried)")
+    print(f"  through the pipeline  {result['pipeline_rows_per_second']:>10,} rows/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "result": result}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
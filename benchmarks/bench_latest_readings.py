@@ -0,0 +1,100 @@
+"""
+Request latency of read_latest_readings as processed_readings.jsonl grows.
+
+Compares the old full-file scan with the tail-following LatestStateCache.
+Between two requests the simulator appends one tick (one row per machine),
+which is what a live deployment sees.
+
+    python benchmarks/bench_latest_readings.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "backend"))
+
+from jsonl_tail import LatestStateCache
+
+MACHINES = ["PUMP_A", "PUMP_B", "MOTOR_C", "COMPRESSOR_D"]
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+REQUESTS = 20
+
+
+def full_scan(filepath):
+    # The previous implementation, kept here for comparison
+    readings = {}
+    with open(filepath, "r") as f:
+        lines = f.readlines()
+    for line in reversed(lines):
+        line = line.strip()
+        if not line:
+            continue
+        data = json.loads(line)
+        machine_id = data.get("machine_id")
+        if machine_id and machine_id not in readings:
+            readings[machine_id] = data
+    return readings
+
+
+def make_row(i):
+    return json.dumps({
+        "machine_id": MACHINES[i % len(MACHINES)],
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(1_700_000_000 + i // len(MACHINES))),
+        "temperature": 70.0,
+        "vibration": 2.0,
+        "pressure": 4.0,
+        "health_score": 100.0,
+        "is_anomaly": False,
+        "alert_message": "",
+        "diff": 1,
+        "time": i,
+    }) + "\n"
+
+
+def append_tick(filepath, start):
+    with open(filepath, "a") as f:
+        for i in range(start, start + len(MACHINES)):
+            f.write(make_row(i))
+    return start + len(MACHINES)
+
+
+def time_requests(filepath, read, start):
+    timings = []
+    for _ in range(REQUESTS):
+        start = append_tick(filepath, start)
+        t0 = time.perf_counter()
+        read()
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "processed_readings.jsonl")
+        open(filepath, "w").close()
+        cache = LatestStateCache(filepath)
+        written = 0
+
+        print(f"{'rows':>10} {'full scan ms':>14} {'cache ms':>10}")
+        for size in SIZES:
+            with open(filepath, "a") as f:
+                while written < size:
+                    f.write(make_row(written))
+                    written += 1
+
+            # Warm the cache up to the current size, like a running backend
+            cache.refresh()
+
+            scan_ms, written = time_requests(filepath, lambda: full_scan(filepath), written)
+            cache_ms, written = time_requests(filepath, cache.readings, written)
+
+            assert full_scan(filepath) == cache.readings()
+            print(f"{written:>10} {scan_ms:>14.3f} {cache_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Sensor context of /query prompts as the fleet grows: the old
+json.dumps(readings, indent=2) of every machine against the
+token-budgeted table of prompt_context.build_sensor_context.
+
+Tokens are counted locally with prompt_context.count_tokens; the old
+format is only built up to --max-json-machines, past that it is
+extrapolated from the per-machine cost.
+
+    python benchmarks/bench_prompt_context.py [--fleet-sizes 4,100,1000,10000] [--budget 1500]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "backend"))
+sys.path.insert(0, os.path.join(BASE_DIR, "pipeline"))
+
+from prompt_context import build_sensor_context, count_tokens
+from scoring import score_reading
+
+QUESTION = "What's wrong with PUMP_A?"
+RUNS = 20
+
+
+def make_readings(n, anomaly_rate=0.05, seed=0):
+    # Same ranges as simulators/sensor_simulator.py, PUMP_A always faulty
+    rng = np.random.default_rng(seed)
+    names = ["PUMP_A", "PUMP_B", "MOTOR_C", "COMPRESSOR_D"]
+    names = names[:n] + [f"MACHINE_{i:05d}" for i in range(len(names), n)]
+    readings = {}
+    for i, machine_id in enumerate(names):
+        faulty = i == 0 or rng.random() < anomaly_rate
+        t = round(float(rng.uniform(82, 95) if faulty else rng.uniform(62, 74)), 2)
+        v = round(float(rng.uniform(3.2, 4.8) if faulty else rng.uniform(1.0, 2.4)), 3)
+        p = round(float(rng.uniform(2.0, 3.0) if faulty else rng.uniform(3.6, 4.8)), 2)
+        health, anomaly, alert = score_reading(machine_id, t, v, p)
+        readings[machine_id] = {
+            "machine_id": machine_id, "timestamp": "2026-10-18 08:00:00",
+            "temperature": t, "vibration": v, "pressure": p,
+            "health_score": health, "is_anomaly": anomaly, "alert_message": alert,
+        }
+    return readings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fleet-sizes", default="4,100,1000,10000")
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--max-json-machines", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'machines':>9}  {'json tokens':>12}  {'table tokens':>12}  {'shown':>6}  {'build ms':>9}")
+    for n in (int(x) for x in args.fleet_sizes.split(",")):
+        readings = make_readings(n)
+        sample = dict(list(readings.items())[:args.max_json_machines])
+        json_tokens = count_tokens(json.dumps(sample, indent=2)) * n / len(sample)
+
+        t0 = time.perf_counter()
+        for _ in range(RUNS):
+            context, tokens, shown = build_sensor_context(readings, ["PUMP_A"], args.budget)
+        elapsed = (time.perf_counter() - t0) / RUNS
+        assert count_tokens(context) <= args.budget
+
+        extrapolated = "~" if len(sample) < n else ""
+        print(f"{n:>9,}  {extrapolated + f'{json_tokens:,.0f}':>12}  {tokens:>12,}  {shown:>6}  {elapsed * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Offline comparison of /query retrieval: the old two-step Groq flow
+(every document sent to the LLM to extract "relevant sections") against
+local BM25 chunk retrieval feeding a single LLM call.
+
+No API calls are made. Prompt sizes are counted for both flows; the
+LLM-side latency of the old retrieval step is added from --llm-latency
+(seconds per Groq call, default 1.5) since it cannot be measured offline.
+
+    python benchmarks/bench_retrieval.py [--llm-latency 1.5] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "backend"))
+
+from document_store import DocumentStore
+from retriever import Retriever, format_chunks
+
+QUESTIONS = [
+    "What's wrong with PUMP_A?",
+    "How do I fix high vibration?",
+    "Which machine needs attention?",
+    "PUMP_A temperature is critical, what should I do?",
+    "When should bearings be replaced?",
+    "Pressure dropped below 2.5 bar on COMPRESSOR_D",
+]
+# Old flow: the retrieval step returned up to max_tokens=300 of excerpts
+EXCERPT_TOKENS = 300
+RUNS = 200
+
+
+def approx_tokens(text):
+    # ~4 characters per token for English text with the Llama tokenizer
+    return len(text) // 4
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency", type=float, default=1.5)
+    parser.add_argument("--json", action="store_true", help="also print raw results")
+    args = parser.parse_args()
+
+    store = DocumentStore(
+        os.path.join(BASE_DIR, "data/documents_index.jsonl"),
+        fallback_folder=os.path.join(BASE_DIR, "documents")
+    )
+    docs = store.documents()
+    retriever = Retriever(store)
+
+    t0 = time.perf_counter()
+    index = retriever.index()
+    build_ms = (time.perf_counter() - t0) * 1000
+    print(f"Indexed {len(docs)} documents into {len(index.chunks)} chunks in {build_ms:.2f} ms\n")
+
+    all_docs = ""
+    for filename, content in docs.items():
+        all_docs += f"\n--- {filename} ---\n{content}\n"
+
+    results = []
+    for question in QUESTIONS:
+        old_prompt = f"Question: {question}\n\nDocuments:\n{all_docs}\n\nReturn only the most relevant sections."
+
+        t0 = time.perf_counter()
+        for _ in range(RUNS):
+            chunks = retriever.search(question, k=4)
+        bm25_ms = (time.perf_counter() - t0) * 1000 / RUNS
+        context = format_chunks(chunks)
+
+        results.append({
+            "question": question,
+            "old_retrieval_prompt_tokens": approx_tokens(old_prompt),
+            "old_context_tokens": EXCERPT_TOKENS,
+            "old_retrieval_latency_ms": args.llm_latency * 1000,
+            "bm25_context_tokens": approx_tokens(context),
+            "bm25_retrieval_latency_ms": round(bm25_ms, 3),
+            "top_sources": [c["source"] for c in chunks],
+        })
+
+    print(f"{'question':<52} {'old in-tok':>10} {'bm25 ctx-tok':>12} {'old ms':>8} {'bm25 ms':>8}")
+    for r in results:
+        print(
+            f"{r['question'][:50]:<52} {r['old_retrieval_prompt_tokens']:>10} "
+            f"{r['bm25_context_tokens']:>12} {r['old_retrieval_latency_ms']:>8.0f} "
+            f"{r['bm25_retrieval_latency_ms']:>8.3f}"
+        )
+
+    old_total = sum(r["old_retrieval_prompt_tokens"] + r["old_context_tokens"] for r in results)
+    new_total = sum(r["bm25_context_tokens"] for r in results)
+    print(
+        f"\nTokens sent for retrieval + context, all questions: "
+        f"old {old_total}, bm25 {new_total} ({old_total / max(new_total, 1):.1f}x fewer)"
+    )
+    print("LLM calls per /query: old 2, bm25 1")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Cost of the fleet rollups as the fleet grows: one reading's update of
+pipeline/rollups.FleetRollup (O(depth), so flat) against regrouping the
+latest reading of every machine per request, which is what /summary did.
+
+Machines are spread over --sites sites with --lines lines each and four
+machine types.
+
+    python benchmarks/bench_rollups.py [--fleet-sizes 1000,10000,100000] [--sites 5] [--lines 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "pipeline"))
+
+from rollups import FleetRollup, health_band
+
+TYPES = ["pump", "motor", "compressor", "fan"]
+UPDATES = 200_000
+REGROUP_RUNS = 5
+
+
+def make_fleet(n, sites, lines, seed=0):
+    rng = np.random.default_rng(seed)
+    machines = [f"MACHINE_{i:06d}" for i in range(n)]
+    metadata = {
+        m: (f"SITE_{i % sites}", f"LINE_{(i // sites) % lines}", TYPES[i % len(TYPES)])
+        for i, m in enumerate(machines)
+    }
+    health = rng.uniform(30, 100, UPDATES).round(1).tolist()
+    anomaly = (rng.random(UPDATES) < 0.1).tolist()
+    picks = rng.integers(0, n, UPDATES).tolist()
+    return machines, metadata, health, anomaly, picks
+
+
+def regroup(latest, metadata):
+    """Per-line aggregates from the latest readings, recomputed from scratch."""
+    groups = {}
+    for m, (health, anomaly) in latest.items():
+        site, line, _ = metadata[m]
+        g = groups.setdefault((site, line), [0, 0, 0, 101.0, [0, 0, 0, 0]])
+        g[0] += 1
+        g[1] += anomaly
+        g[2] += health
+        g[3] = min(g[3], health)
+        g[4][health_band(round(health * 10))] += 1
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fleet-sizes", default="1000,10000,100000")
+    parser.add_argument("--sites", type=int, default=5)
+    parser.add_argument("--lines", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'machines':>9}  {'groups':>6}  {'update µs/reading':>17}  {'rollup rows ms':>14}  {'regroup ms':>10}")
+    for n in (int(x) for x in args.fleet_sizes.split(",")):
+        machines, metadata, health, anomaly, picks = make_fleet(n, args.sites, args.lines)
+        rollup = FleetRollup(metadata)
+        latest = {}
+        # Every machine has a reading before timing starts
+        for m in machines:
+            rollup.update(m, 100.0, False, "2026-01-01 00:00:00")
+            latest[m] = (100.0, False)
+
+        update = rollup.update
+        t0 = time.perf_counter()
+        for p, h, a in zip(picks, health, anomaly):
+            update(machines[p], h, a, "2026-01-01 00:00:01")
+        update_us = (time.perf_counter() - t0) / UPDATES * 1e6
+        for p, h, a in zip(picks, health, anomaly):
+            latest[machines[p]] = (h, a)
+
+        t0 = time.perf_counter()
+        for _ in range(REGROUP_RUNS):
+            rows = rollup.rows(list(rollup.groups))
+        rows_ms = (time.perf_counter() - t0) / REGROUP_RUNS * 1000
+
+        t0 = time.perf_counter()
+        for _ in range(REGROUP_RUNS):
+            regroup(latest, metadata)
+        regroup_ms = (time.perf_counter() - t0) / REGROUP_RUNS * 1000
+
+        print(f"{n:>9,}  {len(rows):>6}  {update_us:>17.2f}  {rows_ms:>14.3f}  {regroup_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Local stand-in for the Groq chat completions API, so /query and
+/query/stream can be exercised and benchmarked without network access.
+Streams the answer word by word with configurable delays.
+
+    python benchmarks/fake_llm_server.py --port 8900 --first-token-delay 0.3 --token-delay 0.02
+    GROQ_BASE_URL=http://127.0.0.1:8900 GROQ_API_KEY=fake python backend/app.py
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = (
+    "PUMP_A shows high temperature and vibration. Reduce load by 20%, check "
+    "coolant level and cooling fan, then inspect bearings and shaft alignment. "
+    "If vibration exceeds 4.0 mm/s replace the bearings before restarting."
+)
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Set on the server class by make_server()
+    answer = DEFAULT_ANSWER
+    first_token_delay = 0.0
+    token_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+        words = self.answer.split(" ")
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+        }
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+        }
+
+        time.sleep(self.first_token_delay)
+
+        if not body.get("stream"):
+            time.sleep(self.token_delay * len(words))
+            payload = json.dumps({
+                **base,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.answer},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send(data):
+            self.wfile.write(f"data: {data}\n\n".encode())
+            self.wfile.flush()
+
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.token_delay)
+            send(json.dumps({
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else " " + word},
+                    "finish_reason": None,
+                }],
+            }))
+        send(json.dumps({
+            **base,
+            "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"usage": usage},
+        }))
+        send("[DONE]")
+        self.close_connection = True
+
+
+def make_server(port=0, answer=DEFAULT_ANSWER, first_token_delay=0.0, token_delay=0.0):
+    handler = type("Handler", (FakeLLMHandler,), {
+        "answer": answer,
+        "first_token_delay": first_token_delay,
+        "token_delay": token_delay,
+    })
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def start_in_thread(**kwargs):
+    """Starts a fake server on a free port; returns (server, base_url)."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--answer", default=DEFAULT_ANSWER)
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.answer, args.first_token_delay, args.token_delay)
+    print(f"🤖 Fake LLM listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,36 @@
 import streamlit as st
 import requests
 import plotly.graph_objects as go
+import pandas as pd
 import time
-from datetime import datetime
+import json
+import os
+import threading
+from datetime import datetime, timedelta
 if "assistant_answer" not in st.session_state:
     st.session_state.assistant_answer = None
+if "snapshot" not in st.session_state:
+    st.session_state.snapshot = None
+    st.session_state.snapshot_etag = None
+if "trends" not in st.session_state:
+    st.session_state.trends = {}
 
 # ── Config ──
-API_URL = "https://predictive-maintenance-fa8i.onrender.com"
-MACHINE_ORDER = ["MOTOR_C", "PUMP_B", "PUMP_A", "COMPRESSOR_D"]
+API_URL = os.getenv("API_URL", "https://predictive-maintenance-fa8i.onrender.com")
+# Push mode: consume GET /stream instead of polling /snapshot every 3 s
+LIVE_STREAM_DEFAULT = os.getenv("DASHBOARD_LIVE_STREAM", "0") == "1"
+# A session's stream thread stops once its page has not run for this long
+LIVE_STREAM_IDLE_SECONDS = 90
+# Fragment refresh intervals: polling, push (a check for changes) and trend charts
+POLL_REFRESH_SECONDS = 3
+PUSH_REFRESH_SECONDS = 0.5
+TREND_REFRESH_SECONDS = 5
+# Gauges and trends are drawn for a bounded set of machines, so a refresh
+# costs the same with 4 or 500 machines; the rest are rows of the fleet table
+MAX_DETAIL_MACHINES = 6
+TREND_WINDOW_MINUTES = 15
+TREND_MAX_POINTS = 900
+TREND_SIGNALS = {"temperature": "🌡️ Temperature (°C)", "vibration": "📳 Vibration (mm/s)", "pressure": "💨 Pressure (bar)"}
 
 st.set_page_config(
     page_title="FailureGuard AI",
@@ -50,37 +72,151 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ── Helper Functions ──
-def get_health_data():
+def get_snapshot():
+    """
+    Health, sensors and alerts in one call. Sends the last ETag back so an
+    unchanged fleet costs an empty 304 and the previous payload is reused.
+    """
+    headers = {}
+    if st.session_state.snapshot_etag:
+        headers["If-None-Match"] = st.session_state.snapshot_etag
     try:
-        response = requests.get(f"{API_URL}/health", timeout=2)
-        return response.json()
+        response = requests.get(f"{API_URL}/snapshot", headers=headers, timeout=2)
+        if response.status_code == 200:
+            st.session_state.snapshot = response.json()
+            st.session_state.snapshot_etag = response.headers.get("ETag")
+        elif response.status_code != 304:
+            return {}
     except:
         return {}
-
-def get_sensor_data():
-    try:
-        response = requests.get(f"{API_URL}/sensors", timeout=2)
-        return response.json()
-    except:
-        return {}
-
-def get_alerts():
-    try:
-        response = requests.get(f"{API_URL}/alerts", timeout=2)
-        return response.json()
-    except:
-        return []
+    return st.session_state.snapshot or {}
+
+class LiveStream(threading.Thread):
+    """
+    Background consumer of the backend's /stream server-sent events for one
+    browser session. Applies snapshot/reading/alert deltas to a local copy
+    of the /snapshot payload and sets `changed`; the fleet fragment is only
+    redrawn once that is set (see get_live_snapshot). Reconnects with the
+    last event id, so a dropped connection resumes instead of starting
+    over. Stops once the session's page has not run for a while.
+    """
+
+    def __init__(self, api_url):
+        super().__init__(daemon=True)
+        self.api_url = api_url
+        self.changed = threading.Event()
+        self.last_seen = time.monotonic()
+        self.connected = False
+        self._cursor = None
+        self._lock = threading.Lock()
+        self._sensors = {}
+        self._health = {}
+        self._alerts = {}
+        self._notices = []
+
+    def snapshot(self):
+        """Same shape as GET /snapshot, plus the notices since the last call."""
+        self.last_seen = time.monotonic()
+        with self._lock:
+            notices, self._notices = self._notices, []
+            return {
+                "health": dict(self._health),
+                "sensors": dict(self._sensors),
+                "alerts": list(self._alerts.values()),
+            }, notices
+
+    def _apply(self, event, data):
+        with self._lock:
+            if event == "snapshot":
+                self._sensors = data["sensors"]
+                self._health = data["health"]
+                self._alerts = {a["machine_id"]: a for a in data["alerts"]}
+            elif event == "reading":
+                self._sensors[data["machine_id"]] = data["reading"]
+                self._health[data["machine_id"]] = data["health"]
+            elif event == "alert":
+                self._alerts[data["machine_id"]] = data
+                self._notices.append(("🚨", data.get("alert_message", "")))
+            elif event == "alert_cleared":
+                self._alerts.pop(data["machine_id"], None)
+                self._notices.append(("✅", f"{data['machine_id']} back to normal"))
+            elif event == "health" and data.get("previous"):
+                self._notices.append(("🩺", f"{data['machine_id']}: {data['previous']} → {data['status']}"))
+        self.changed.set()
+
+    def run(self):
+        while time.monotonic() - self.last_seen < LIVE_STREAM_IDLE_SECONDS:
+            headers = {"Last-Event-ID": self._cursor} if self._cursor else {}
+            try:
+                with requests.get(
+                    f"{self.api_url}/stream",
+                    headers=headers,
+                    stream=True,
+                    timeout=(3, 60)
+                ) as response:
+                    self.connected = True
+                    event = None
+                    for line in response.iter_lines(decode_unicode=True):
+                        if line.startswith("id:"):
+                            self._cursor = line[len("id:"):].strip()
+                        elif line.startswith("event:"):
+                            event = line[len("event:"):].strip()
+                        elif line.startswith("data:"):
+                            self._apply(event, json.loads(line[len("data:"):]))
+                        if time.monotonic() - self.last_seen >= LIVE_STREAM_IDLE_SECONDS:
+                            return
+            except Exception:
+                pass
+            self.connected = False
+            time.sleep(2)
+
+def get_live_snapshot():
+    """
+    The /snapshot payload as kept current by this session's LiveStream.
+    A timed fragment run with nothing new waits up to PUSH_REFRESH_SECONDS
+    for a change, and otherwise ends with a fragment rerun instead of
+    redrawing: a run that ends that way leaves the fragment's elements on
+    screen, where a completed run would replace them all.
+    """
+    stream = st.session_state.get("live_stream")
+    if stream is None or not stream.is_alive():
+        stream = LiveStream(API_URL)
+        stream.start()
+        st.session_state.live_stream = stream
+        # First connect: give the snapshot event a moment to arrive
+        stream.changed.wait(timeout=2)
+    elif st.session_state.live_fleet_drawn and not stream.changed.wait(timeout=PUSH_REFRESH_SECONDS):
+        stream.last_seen = time.monotonic()
+        st.rerun(scope="fragment")
+    stream.changed.clear()
+    st.session_state.live_fleet_drawn = True
+    snapshot, notices = stream.snapshot()
+    for icon, text in notices[-5:]:
+        st.toast(text, icon=icon)
+    st.session_state.live_snapshot = snapshot
+    return snapshot
 
 def ask_assistant(question):
+    """Yields the answer as the backend streams it (server-sent events)."""
     try:
-        response = requests.post(
-            f"{API_URL}/query",
+        with requests.post(
+            f"{API_URL}/query/stream",
             json={"question": question},
-            timeout=15
-        )
-        return response.json().get("answer", "No response")
+            stream=True,
+            timeout=(3, 30)
+        ) as response:
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data = json.loads(line[len("data:"):])
+                    if event == "token":
+                        yield data["token"]
+                    elif event == "error":
+                        yield data["error"]
     except:
-        return "Assistant unavailable. Make sure backend is running."
+        yield "Assistant unavailable. Make sure backend is running."
 
 def make_gauge(value, title, min_val, max_val, threshold):
     color = "red" if value > threshold else "green"
@@ -138,6 +274,56 @@ def make_pressure_gauge(value, title, min_val, max_val, threshold):
     )
     return fig
 
+# Figures are shared across reruns and sessions: a gauge whose value did
+# not change is not rebuilt (building one costs ~10 ms)
+@st.cache_resource(max_entries=4096, show_spinner=False)
+def cached_gauge(signal, value):
+    if signal == "temperature":
+        return make_gauge(value, "🌡️ Temperature (°C)", 0, 100, 80)
+    if signal == "vibration":
+        return make_gauge(value, "📳 Vibration (mm/s)", 0, 6, 3.0)
+    return make_pressure_gauge(value, "💨 Pressure (bar)", 0, 8, 3.0)
+
+def fetch_trend(machine_id):
+    """
+    Appends the history points newer than the last one received to the
+    session's trend buffer for `machine_id` (GET /history?start=last), so
+    each refresh transfers only new readings.
+    """
+    trend = st.session_state.trends.setdefault(machine_id, {
+        "last": None,
+        "points": {c: [] for c in ["timestamp", *TREND_SIGNALS]}
+    })
+    start = trend["last"] or (
+        datetime.now() - timedelta(minutes=TREND_WINDOW_MINUTES)
+    ).strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        response = requests.get(
+            f"{API_URL}/history",
+            params={"machine_id": machine_id, "start": start, "limit": TREND_MAX_POINTS},
+            timeout=2
+        )
+        points = response.json()["points"]
+    except:
+        return trend
+
+    # `start` is inclusive: skip what the buffer already holds
+    new = [i for i, ts in enumerate(points["timestamp"]) if trend["last"] is None or ts > trend["last"]]
+    if new:
+        for column, values in trend["points"].items():
+            values.extend(points[column][i] for i in new)
+            del values[:-TREND_MAX_POINTS]
+        trend["last"] = trend["points"]["timestamp"][-1]
+    return trend
+
+def detail_machines(health_data):
+    """The machines picked in the focus box, else the least healthy ones."""
+    focus = [m for m in st.session_state.get("focus", []) if m in health_data]
+    if focus:
+        return focus[:MAX_DETAIL_MACHINES]
+    worst = sorted(health_data, key=lambda m: (health_data[m].get("health_score", 100), m))
+    return worst[:min(MAX_DETAIL_MACHINES, 4)]
+
 def get_status_emoji(health_score):
     if health_score >= 80:
         return "🟢", "HEALTHY"
@@ -152,140 +338,182 @@ def get_status_emoji(health_score):
 st.markdown('<div class="main-header">🔧 FailureGuard AI</div>', unsafe_allow_html=True)
 st.markdown('<div class="subtitle">Real-Time Predictive Maintenance • Powered by Pathway</div>', unsafe_allow_html=True)
 
-# Live timestamp
-st.markdown(f"**Last updated:** {datetime.now().strftime('%H:%M:%S')}")
-
-st.divider()
-
-# ── Section 1: Machine Health Overview ──
-st.subheader("🏭 Machine Health Overview")
-
-health_data = get_health_data()
-
-if health_data:
-    cols = st.columns(4)
-    for i, machine_id in enumerate(MACHINE_ORDER):
-        if machine_id in health_data:
-            info = health_data[machine_id]
-            score = info.get("health_score", 100)
-            emoji, status = get_status_emoji(score)
-
-            with cols[i]:
-                st.metric(
-                    label=f"{emoji} {machine_id}",
-                    value=f"{score}%",
-                    delta=status
-                )
-else:
-    st.warning("⏳ Waiting for sensor data... Make sure simulator and pipeline are running!")
+live_mode = st.sidebar.toggle(
+    "⚡ Live push updates",
+    value=LIVE_STREAM_DEFAULT,
+    help="Receive only changed machines from the backend stream instead of polling every 3 seconds"
+)
 
 st.divider()
 
-# ── Section 2: Live Sensor Gauges ──
-st.subheader("📊 Live Sensor Readings")
-
-sensor_data = get_sensor_data()
-
-if sensor_data:
-    for machine_id in MACHINE_ORDER:
-        if machine_id in sensor_data:
-            data = sensor_data[machine_id]
-            score = data.get("health_score", 100)
-            emoji, status = get_status_emoji(score)
-
-            with st.expander(
-                f"{emoji} {machine_id} — Health: {score}% — {status}",
-                expanded=(score < 80)
-            ):
-                g1, g2, g3 = st.columns(3)
+# The live sections are fragments: each reruns on its own timer without
+# re-executing the page, so the assistant and static content stay put.
+def live_fleet():
+    snapshot = get_live_snapshot() if live_mode else get_snapshot()
+    health_data = snapshot.get("health", {})
+    sensor_data = snapshot.get("sensors", {})
+
+    # Live timestamp
+    st.markdown(f"**Last updated:** {datetime.now().strftime('%H:%M:%S')}")
+
+    # ── Section 1: Machine Health Overview ──
+    st.subheader("🏭 Machine Health Overview")
+
+    if not health_data:
+        st.warning("⏳ Waiting for sensor data... Make sure simulator and pipeline are running!")
+        return
+
+    scores = [info.get("health_score", 100) for info in health_data.values()]
+    anomalies = sum(1 for info in health_data.values() if info.get("is_anomaly"))
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Machines", len(health_data))
+    m2.metric("🟢 Healthy", len(health_data) - anomalies)
+    m3.metric("🚨 Anomalies", anomalies)
+    m4.metric("Average health", f"{sum(scores) / len(scores):.1f}%")
+
+    # One table element for the whole fleet, least healthy first
+    rows = []
+    for machine_id, info in health_data.items():
+        data = sensor_data.get(machine_id, {})
+        emoji, status = get_status_emoji(info.get("health_score", 100))
+        rows.append({
+            "Machine": machine_id,
+            "Status": f"{emoji} {status}",
+            "Health %": info.get("health_score", 100),
+            "Temp °C": data.get("temperature"),
+            "Vibration mm/s": data.get("vibration"),
+            "Pressure bar": data.get("pressure"),
+            "Last reading": data.get("timestamp", "N/A"),
+        })
+    fleet = pd.DataFrame(rows).sort_values(["Health %", "Machine"])
+    st.dataframe(fleet, hide_index=True, width="stretch", height=min(36 * (len(rows) + 1), 360))
+
+    st.divider()
+
+    # ── Section 2: Live Sensor Gauges ──
+    st.subheader("📊 Live Sensor Readings")
+    st.multiselect(
+        "Focus machines",
+        options=sorted(health_data),
+        key="focus",
+        max_selections=MAX_DETAIL_MACHINES,
+        placeholder="Least healthy machines"
+    )
 
-                with g1:
+    for machine_id in detail_machines(health_data):
+        data = sensor_data.get(machine_id, {})
+        score = data.get("health_score", 100)
+        emoji, status = get_status_emoji(score)
+
+        with st.expander(
+            f"{emoji} {machine_id} — Health: {score}% — {status}",
+            expanded=(score < 80)
+        ):
+            for column, signal in zip(st.columns(3), TREND_SIGNALS):
+                with column:
                     st.plotly_chart(
-                        make_gauge(
-                            data.get("temperature", 0),
-                            "🌡️ Temperature (°C)",
-                            0, 100, 80
-                        ),
-                        use_container_width="stretch",
-                        key=f"{machine_id}_temp"
+                        cached_gauge(signal, data.get(signal, 0)),
+                        width="stretch",
+                        key=f"{machine_id}_{signal}"
                     )
 
-                with g2:
-                    st.plotly_chart(
-                        make_gauge(
-                            data.get("vibration", 0),
-                            "📳 Vibration (mm/s)",
-                            0, 6, 3.0
-                        ),
-                        use_container_width="stretch",
-                        key=f"{machine_id}_vibration"
-                    )
+            st.caption(f"Last reading: {data.get('timestamp', 'N/A')}")
 
-                with g3:
-                    st.plotly_chart(
-                        make_pressure_gauge(
-                            data.get("pressure", 0),
-                            "💨 Pressure (bar)",
-                            0, 8, 3.0
-                        ),
-                        use_container_width="stretch",
-                        key=f"{machine_id}_pressure"
-                    )
+    st.divider()
 
-                st.caption(f"Last reading: {data.get('timestamp', 'N/A')}")
-else:
-    st.info("No sensor data yet")
+    # ── Section 3: Active Alerts ──
+    st.subheader("🚨 Active Alerts")
 
-st.divider()
+    alerts = sorted(snapshot.get("alerts", []), key=lambda a: a.get("health_score", 100))
 
-# ── Section 3: Active Alerts ──
-st.subheader("🚨 Active Alerts")
+    if alerts:
+        for alert in alerts[:20]:
+            score = alert.get("health_score", 100)
+            emoji, _ = get_status_emoji(score)
+            st.error(
+                f"{emoji} **{alert.get('machine_id')}** | "
+                f"Health: {score}% | "
+                f"{alert.get('alert_message', '')} | "
+                f"Time: {alert.get('timestamp', '')}"
+            )
+        if len(alerts) > 20:
+            st.caption(f"… and {len(alerts) - 20} more (see the fleet table)")
+    else:
+        st.success("✅ All machines operating normally — No active alerts")
+
+def trend_charts():
+    st.subheader("📈 Sensor Trends")
+    snapshot = st.session_state.get("live_snapshot" if live_mode else "snapshot") or {}
+    health_data = snapshot.get("health", {})
+    if not health_data:
+        st.info("No sensor history yet")
+        return
+
+    signal = st.radio(
+        "Signal",
+        options=list(TREND_SIGNALS),
+        format_func=TREND_SIGNALS.get,
+        horizontal=True,
+        key="trend_signal"
+    )
+    machines = detail_machines(health_data)
+    for column, machine_id in zip(st.columns(min(len(machines), 3)) * 2, machines):
+        trend = fetch_trend(machine_id)
+        with column:
+            st.caption(machine_id)
+            if trend["points"]["timestamp"]:
+                chart = pd.DataFrame({
+                    "time": pd.to_datetime(trend["points"]["timestamp"]),
+                    signal: trend["points"][signal],
+                }).set_index("time")
+                st.line_chart(chart, height=180)
+            else:
+                st.info("No readings in the last 15 minutes")
+
+# A full-page run always draws the fleet; only fragment runs can skip it
+st.session_state.live_fleet_drawn = False
+st.fragment(run_every=PUSH_REFRESH_SECONDS if live_mode else POLL_REFRESH_SECONDS)(live_fleet)()
 
-alerts = get_alerts()
+st.divider()
 
-if alerts:
-    for alert in alerts:
-        score = alert.get("health_score", 100)
-        emoji, _ = get_status_emoji(score)
-        st.error(
-            f"{emoji} **{alert.get('machine_id')}** | "
-            f"Health: {score}% | "
-            f"{alert.get('alert_message', '')} | "
-            f"Time: {alert.get('timestamp', '')}"
-        )
-else:
-    st.success("✅ All machines operating normally — No active alerts")
+st.fragment(run_every=TREND_REFRESH_SECONDS)(trend_charts)()
 
 st.divider()
 
 # ── Section 4: AI Technician Assistant ──
-st.subheader("🤖 AI Technician Assistant")
-st.caption("Ask anything about machine health, repairs, or maintenance procedures")
-
-# Show example questions
-st.markdown("**Example questions:**")
-ex1, ex2, ex3 = st.columns(3)
-with ex1:
-    st.code("What's wrong with PUMP_A?")
-with ex2:
-    st.code("How do I fix high vibration?")
-with ex3:
-    st.code("Which machine needs attention?")
-
-question = st.text_input(
-    "Your question:",
-    placeholder="e.g. PUMP_A temperature is critical, what should I do?"
-)
+@st.fragment
+def assistant():
+    st.subheader("🤖 AI Technician Assistant")
+    st.caption("Ask anything about machine health, repairs, or maintenance procedures")
+
+    # Show example questions
+    st.markdown("**Example questions:**")
+    ex1, ex2, ex3 = st.columns(3)
+    with ex1:
+        st.code("What's wrong with PUMP_A?")
+    with ex2:
+        st.code("How do I fix high vibration?")
+    with ex3:
+        st.code("Which machine needs attention?")
+
+    question = st.text_input(
+        "Your question:",
+        placeholder="e.g. PUMP_A temperature is critical, what should I do?"
+    )
 
-if st.button("🔍 Ask Assistant", type="primary"):
-    if question:
-        with st.spinner("Analyzing..."):
-            st.session_state.assistant_answer = ask_assistant(question)
-    else:
-        st.warning("Please type a question first")
+    if st.button("🔍 Ask Assistant", type="primary"):
+        if question:
+            streaming = st.empty()
+            with streaming.container():
+                st.session_state.assistant_answer = st.write_stream(ask_assistant(question))
+            streaming.empty()
+        else:
+            st.warning("Please type a question first")
 
-if st.session_state.assistant_answer:
-    st.info(f"🤖 {st.session_state.assistant_answer}")
+    if st.session_state.assistant_answer:
+        st.info(f"🤖 {st.session_state.assistant_answer}")
+
+assistant()
 
 st.divider()
 
@@ -295,7 +523,3 @@ st.markdown("""
     FailureGuard AI • Built with Pathway + Streamlit • Hack For Green Bharat 2024
 </div>
 """, unsafe_allow_html=True)
-
-# ── Auto Refresh ──
-time.sleep(3)
-st.rerun()
@@ -0,0 +1,109 @@
+# ── Defaults (overridable from the pipeline's environment) ──
+BASELINE_ALPHA  = 0.01   # EWMA weight of a new reading (half-life ~70 readings)
+BASELINE_WARMUP = 30     # readings before a machine gets a deviation score
+
+# Standard deviation floor per signal, about the sensors' resolution, so a
+# perfectly steady signal does not turn rounding noise into huge z-scores
+MIN_STD = {
+    "temperature": 0.05,
+    "vibration":   0.005,
+    "pressure":    0.05,
+}
+
+
+class EwmaBaseline:
+    """
+    Exponentially weighted mean and variance of one signal, O(1) memory.
+
+    During warm-up the weight is 1/n (a plain running mean/variance), so
+    the first readings are not dominated by the very first one; after
+    that it settles at `alpha`.
+    """
+
+    __slots__ = ("alpha", "min_std", "n", "mean", "var")
+
+    def __init__(self, min_std, alpha=BASELINE_ALPHA):
+        self.alpha = alpha
+        self.min_std = min_std
+        self.n = 0
+        self.mean = 0.0
+        self.var = 0.0
+
+    def observe(self, x):
+        """
+        Returns the absolute z-score of `x` against the baseline so far,
+        then folds `x` into it.
+        """
+        diff = x - self.mean
+        std = self.var ** 0.5
+        z = abs(diff) / (std if std > self.min_std else self.min_std)
+
+        self.n += 1
+        weight = 1.0 / self.n
+        if weight < self.alpha:
+            weight = self.alpha
+        increment = weight * diff
+        self.mean += increment
+        self.var = (1.0 - weight) * (self.var + diff * increment)
+        return z
+
+
+class MachineBaseline:
+    """
+    Baselines for every sensor signal of one machine, fed its readings in
+    timestamp order.
+
+    A reading folded into an EWMA cannot be taken back out again, so a
+    retraction only counts it as gone (its weight fades at `alpha` per
+    reading); once every reading has been retracted (e.g. the sensor CSV
+    was rewritten) the baseline starts over from warm-up.
+    """
+
+    __slots__ = ("alpha", "warmup", "live", "temperature", "vibration", "pressure")
+
+    def __init__(self, alpha=BASELINE_ALPHA, warmup=BASELINE_WARMUP):
+        self.alpha = alpha
+        self.warmup = warmup
+        self._reset()
+
+    def _reset(self):
+        self.live = 0
+        self.temperature = EwmaBaseline(MIN_STD["temperature"], self.alpha)
+        self.vibration = EwmaBaseline(MIN_STD["vibration"], self.alpha)
+        self.pressure = EwmaBaseline(MIN_STD["pressure"], self.alpha)
+
+    def update(self, temperature, vibration, pressure):
+        """
+        Scores the reading against the machine's baseline so far, then
+        folds it in. Returns the largest absolute z-score over the signals,
+        or None while the baseline is warming up.
+        """
+        warm = self.temperature.n >= self.warmup
+        self.live += 1
+        score = max(
+            self.temperature.observe(temperature),
+            self.vibration.observe(vibration),
+            self.pressure.observe(pressure),
+        )
+        return score if warm else None
+
+    def retract(self):
+        self.live -= 1
+        if self.live <= 0:
+            self._reset()
+
+
+class FleetBaselines:
+    """MachineBaseline per machine_id, created on first sight."""
+
+    def __init__(self, alpha=BASELINE_ALPHA, warmup=BASELINE_WARMUP):
+        self.alpha = alpha
+        self.warmup = warmup
+        self.machines = {}
+
+    def score(self, machine_id, temperature, vibration, pressure):
+        baseline = self.machines.get(machine_id)
+        if baseline is None:
+            baseline = self.machines[machine_id] = MachineBaseline(self.alpha, self.warmup)
+        score = baseline.update(temperature, vibration, pressure)
+        return None if score is None else round(score, 2)
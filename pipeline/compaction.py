@@ -0,0 +1,278 @@
+"""
+Compaction and rotation for the pipelines' JSONL sinks.
+
+A compacted log is three things:
+  data/<name>.snapshot.jsonl        latest state, one row per key, diffs applied
+  data/<name>.jsonl                 raw rows appended since the last rotation
+  data/segments/<name>.<stamp>.jsonl  older raw rows, kept for replay/audit
+
+Consumers load the snapshot plus the live log, so their startup cost is
+bounded by the rotation interval instead of the system's uptime. After
+every rotation, segments older than COMPACTION_SEGMENT_MAX_AGE_HOURS or
+beyond the newest COMPACTION_MAX_SEGMENTS are deleted (0 = no limit), so
+the disk use is bounded too.
+
+Pathway's own jsonlines writer keeps its file open without O_APPEND, so
+it cannot be truncated underneath it. While the pipelines run, rotation
+is done in-process by RotatingJsonlSink (enabled with
+COMPACTION_INTERVAL_SECONDS). Logs from a stopped pipeline can be
+compacted offline:
+
+    python pipeline/compaction.py data/processed_readings.jsonl --key machine_id
+    python pipeline/compaction.py data/documents_index.jsonl --key path --mode diff
+"""
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime
+from time import monotonic
+
+COMPACTION_INTERVAL_SECONDS = float(os.getenv("COMPACTION_INTERVAL_SECONDS", "0"))
+
+# ── Segment retention, applied after every rotation (0 = no limit) ──
+COMPACTION_MAX_SEGMENTS          = int(os.getenv("COMPACTION_MAX_SEGMENTS", "1000"))
+COMPACTION_SEGMENT_MAX_AGE_HOURS = float(os.getenv("COMPACTION_SEGMENT_MAX_AGE_HOURS", "168"))
+
+
+def snapshot_path_for(log_path):
+    root, ext = os.path.splitext(log_path)
+    return f"{root}.snapshot{ext}"
+
+
+def segment_path_for(log_path, when=None):
+    name, ext = os.path.splitext(os.path.basename(log_path))
+    stamp = (when or datetime.now()).strftime("%Y%m%d-%H%M%S")
+    segment = os.path.join(os.path.dirname(log_path), "segments", f"{name}.{stamp}{ext}")
+    n = 1
+    while os.path.exists(segment):
+        segment = os.path.join(os.path.dirname(log_path), "segments", f"{name}.{stamp}-{n}{ext}")
+        n += 1
+    return segment
+
+
+# ── Reducers: how a row updates the keyed state ──
+def _content(row):
+    return {k: v for k, v in row.items() if k not in ("diff", "time")}
+
+
+def apply_latest(state, key, row):
+    """
+    Upserted per-machine rows: the newest timestamp wins, a retraction only
+    removes the key if it still holds the retracted row (same rule as the
+    backend's LatestStateCache).
+    """
+    value = row.get(key)
+    if value is None:
+        return
+    current = state.get(value)
+    if row.get("diff", 1) < 0:
+        if current is not None and _content(current) == _content(row):
+            del state[value]
+    elif current is None or str(row.get("timestamp", "")) >= str(current.get("timestamp", "")):
+        state[value] = row
+
+
+def apply_diff(state, key, row):
+    """
+    Pathway +1/-1 diffs (documents): a retraction only removes the key if it
+    still holds the retracted content, an insertion wins if it is not older.
+    """
+    value = row.get(key)
+    if value is None:
+        return
+    current = state.get(value)
+    if row.get("diff", 1) < 0:
+        if current is not None and current.get("content") == row.get("content"):
+            del state[value]
+    elif current is None or row.get("time", 0) >= current.get("time", 0):
+        state[value] = row
+
+
+REDUCERS = {"latest": apply_latest, "diff": apply_diff}
+
+
+def read_jsonl(path):
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def write_snapshot(path, rows):
+    """Atomically replaces the snapshot file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def swap_in_empty_log(log_path):
+    """
+    Moves the current log into segments/ and puts an empty one in its place.
+    The log path never disappears: the old file is hard-linked into the
+    segment first and the new empty file replaces it atomically.
+    """
+    segment = None
+    if os.path.exists(log_path) and os.path.getsize(log_path):
+        segment = segment_path_for(log_path)
+        os.makedirs(os.path.dirname(segment), exist_ok=True)
+        os.link(log_path, segment)
+    tmp = f"{log_path}.tmp"
+    open(tmp, "w").close()
+    os.replace(tmp, log_path)
+    return segment
+
+
+def segments_for(log_path):
+    """Rotated segments of one log, oldest first."""
+    directory = os.path.join(os.path.dirname(log_path), "segments")
+    name, ext = os.path.splitext(os.path.basename(log_path))
+    pattern = re.compile(re.escape(name) + r"\.\d{8}-\d{6}(-\d+)?" + re.escape(ext))
+    try:
+        entries = [e for e in os.scandir(directory) if pattern.fullmatch(e.name)]
+    except FileNotFoundError:
+        return []
+    # A segment keeps the log's last write time, so mtime orders them
+    entries.sort(key=lambda e: (e.stat().st_mtime, e.name))
+    return [e.path for e in entries]
+
+
+def prune_segments(log_path, max_segments=None, max_age_hours=None):
+    """
+    Deletes the log's segments older than `max_age_hours` and all but the
+    newest `max_segments` (0 = no limit, None = the COMPACTION_* setting).
+    Returns the deleted paths.
+    """
+    if max_segments is None:
+        max_segments = COMPACTION_MAX_SEGMENTS
+    if max_age_hours is None:
+        max_age_hours = COMPACTION_SEGMENT_MAX_AGE_HOURS
+    segments = segments_for(log_path)
+    expired = []
+    if max_age_hours:
+        cutoff = time.time() - max_age_hours * 3600
+        expired = [path for path in segments if os.path.getmtime(path) < cutoff]
+    if max_segments and len(segments) > max_segments:
+        expired.extend(segments[:len(segments) - max_segments])
+    deleted = []
+    for path in dict.fromkeys(expired):
+        try:
+            os.remove(path)
+            deleted.append(path)
+        except FileNotFoundError:
+            pass
+    return deleted
+
+
+def compact_file(log_path, key, mode="latest"):
+    """Offline compaction of a log nothing is writing to. Returns the state size."""
+    apply = REDUCERS[mode]
+    snapshot = snapshot_path_for(log_path)
+    state = {}
+    for row in read_jsonl(snapshot):
+        apply(state, key, row)
+    for row in read_jsonl(log_path):
+        apply(state, key, row)
+    write_snapshot(snapshot, state.values())
+    swap_in_empty_log(log_path)
+    prune_segments(log_path)
+    return len(state)
+
+
+def _jsonable(value):
+    # pw.Json columns arrive wrapped, everything else we write is plain
+    return getattr(value, "value", value)
+
+
+class RotatingJsonlSink:
+    """
+    Drop-in replacement for pw.io.jsonlines.write (same row format, with
+    diff/time) that keeps the keyed latest state in memory. Every
+    `interval` seconds (0 = never) it writes the snapshot and rotates the
+    log. Like the Pathway writer, it starts from an empty log on startup,
+    unless `append` is set: then the state is loaded from the existing
+    snapshot and log, and new rows are appended (a pipeline resuming from
+    persisted state does not emit its earlier rows again).
+    """
+
+    def __init__(self, path, key, mode="latest", interval=COMPACTION_INTERVAL_SECONDS, append=False):
+        self.path = path
+        self.key = key
+        self.apply = REDUCERS[mode]
+        self.interval = interval
+        self.snapshot_path = snapshot_path_for(path)
+        self.state = {}
+        self._last_rotation = monotonic()
+
+        if append:
+            for row in read_jsonl(self.snapshot_path):
+                self.apply(self.state, key, row)
+            for row in read_jsonl(path):
+                self.apply(self.state, key, row)
+            self._file = open(path, "a")
+        else:
+            if os.path.exists(self.snapshot_path):
+                os.remove(self.snapshot_path)
+            self._file = open(path, "w")
+
+    def on_change(self, key, row, time, is_addition):
+        record = {name: _jsonable(value) for name, value in row.items()}
+        record["diff"] = 1 if is_addition else -1
+        record["time"] = time
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.apply(self.state, self.key, record)
+
+    def on_time_end(self, time):
+        self._file.flush()
+        if self.interval and monotonic() - self._last_rotation >= self.interval:
+            self.rotate()
+
+    def rotate(self):
+        # Snapshot first, so a reader that sees the new log also sees the state
+        write_snapshot(self.snapshot_path, self.state.values())
+        self._file.close()
+        swap_in_empty_log(self.path)
+        prune_segments(self.path)
+        self._file = open(self.path, "a")
+        self._last_rotation = monotonic()
+
+
+def write_jsonl(table, path, key, mode="latest", append=False):
+    """
+    pw.io.jsonlines.write, or a RotatingJsonlSink when
+    COMPACTION_INTERVAL_SECONDS is set or the output must be appended to.
+    """
+    import pathway as pw
+
+    if not COMPACTION_INTERVAL_SECONDS and not append:
+        pw.io.jsonlines.write(table, path)
+        return
+    sink = RotatingJsonlSink(path, key, mode, append=append)
+    pw.io.subscribe(table, on_change=sink.on_change, on_time_end=sink.on_time_end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact a JSONL sink of a stopped pipeline")
+    parser.add_argument("log_path")
+    parser.add_argument("--key", default="machine_id")
+    parser.add_argument("--mode", choices=sorted(REDUCERS), default="latest")
+    args = parser.parse_args()
+
+    size = compact_file(args.log_path, args.key, args.mode)
+    print(f"✅ Compacted {args.log_path}: {size} rows in {snapshot_path_for(args.log_path)}")
+
+
+if __name__ == "__main__":
+    main()
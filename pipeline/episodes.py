@@ -0,0 +1,281 @@
+"""
+Alert episodes: one record per stretch of trouble on a machine instead of
+one alert per reading.
+
+An episode opens once readings have stayed out of range for
+EPISODE_MIN_SECONDS, counted from the first one past a warning limit of
+documents/pump_manual.txt, and tracks its peak severity (the highest
+manual level reached and the lowest health score). Both ends use the
+same hysteresis margin: a stretch only counts as over, before or after
+it opened, once every signal is back inside its limit by that margin,
+and an open episode closes after EPISODE_CLEAR_SECONDS of that. Values
+hovering around a limit therefore extend one episode rather than
+flapping between many, and a single stray reading opens none.
+
+Episodes are written to the alert_episodes table (SQLite, WAL) only when
+one opens, escalates or closes, and read by the backend's
+/alerts/episodes from the same file.
+"""
+from features import parse_timestamp
+from forecast import LEVELS, load_limits
+from sqlite_store import SqliteReader, connect_writer, transaction
+
+# ── Defaults (overridable from the pipeline's environment) ──
+EPISODE_MIN_SECONDS   = 10   # seconds out of range before an episode opens
+EPISODE_CLEAR_SECONDS = 30   # seconds back in range before an episode closes
+
+# How far back inside a warning limit a signal must be to count as clear
+HYSTERESIS = {
+    "temperature": 2.0,
+    "vibration":   0.2,
+    "pressure":    0.2,
+}
+
+COLUMNS = [
+    "episode_id", "machine_id", "status", "started_at", "ended_at", "last_seen",
+    "peak_level", "peak_health_score", "signals", "alert_message", "readings",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_episodes (
+    episode_id        TEXT PRIMARY KEY,
+    machine_id        TEXT NOT NULL,
+    status            TEXT NOT NULL,
+    started_at        TEXT NOT NULL,
+    ended_at          TEXT,
+    last_seen         TEXT NOT NULL,
+    peak_level        TEXT NOT NULL,
+    peak_health_score REAL,
+    signals           TEXT NOT NULL,
+    alert_message     TEXT,
+    readings          INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alert_episodes_started_at ON alert_episodes (started_at);
+CREATE INDEX IF NOT EXISTS alert_episodes_status_started_at ON alert_episodes (status, started_at);
+CREATE INDEX IF NOT EXISTS alert_episodes_machine_started_at ON alert_episodes (machine_id, started_at);
+"""
+
+UPSERT_EPISODE = f"""
+INSERT INTO alert_episodes ({", ".join(COLUMNS)})
+VALUES ({", ".join("?" * len(COLUMNS))})
+ON CONFLICT (episode_id) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in COLUMNS[1:])}
+"""
+
+
+def reading_level(limits, temperature, vibration, pressure):
+    """
+    Highest manual level any signal is past (None when all are within the
+    warning limits), and the signals past their warning limit.
+    """
+    level = -1
+    signals = []
+    for signal, value in (("temperature", temperature), ("vibration", vibration), ("pressure", pressure)):
+        limit = limits[signal]
+        above = limit["direction"] == "above"
+        for i, name in enumerate(LEVELS):
+            if (value > limit[name]) if above else (value < limit[name]):
+                if i == 0:
+                    signals.append(signal)
+                level = max(level, i)
+    return (LEVELS[level] if level >= 0 else None), signals
+
+
+def is_clear(limits, temperature, vibration, pressure):
+    """True when every signal is inside its warning limit by HYSTERESIS."""
+    for signal, value in (("temperature", temperature), ("vibration", vibration), ("pressure", pressure)):
+        limit = limits[signal]
+        if limit["direction"] == "above":
+            if value > limit["warning"] - HYSTERESIS[signal]:
+                return False
+        elif value < limit["warning"] + HYSTERESIS[signal]:
+            return False
+    return True
+
+
+class EpisodeTracker:
+    """
+    Open episode per machine. `update` takes readings in timestamp order
+    and returns the episode when it has to be written (opened, escalated
+    or closed), else None. Until it has lasted `min_seconds` an episode
+    is pending: tracked like an open one, but not returned.
+    """
+
+    def __init__(self, limits=None, clear_seconds=EPISODE_CLEAR_SECONDS, min_seconds=EPISODE_MIN_SECONDS):
+        self.limits = limits or load_limits()
+        self.clear_seconds = clear_seconds
+        self.min_seconds = min_seconds
+        self.open = {}
+        # machine_id -> episode not yet open, with its start in epoch seconds
+        self._pending = {}
+        # machine_id -> (timestamp, epoch seconds) of the first clear reading
+        self._clear_since = {}
+
+    def update(self, machine_id, timestamp, temperature, vibration, pressure, health_score, alert_message):
+        level, signals = reading_level(self.limits, temperature, vibration, pressure)
+        episode = self.open.get(machine_id)
+
+        if episode is None:
+            return self._start(
+                machine_id, timestamp, level, signals, health_score, alert_message,
+                level is None and is_clear(self.limits, temperature, vibration, pressure)
+            )
+
+        episode["last_seen"] = timestamp
+        episode["readings"] += 1
+        if level is not None:
+            self._clear_since.pop(machine_id, None)
+            return episode if _escalate(episode, level, signals, health_score, alert_message) else None
+
+        if not is_clear(self.limits, temperature, vibration, pressure):
+            # Inside the warning limits but within the hysteresis band
+            self._clear_since.pop(machine_id, None)
+            return None
+        since = self._clear_since.setdefault(machine_id, (timestamp, parse_timestamp(timestamp)))
+        if parse_timestamp(timestamp) - since[1] < self.clear_seconds:
+            return None
+        del self.open[machine_id]
+        del self._clear_since[machine_id]
+        episode["status"] = "closed"
+        episode["ended_at"] = since[0]
+        return episode
+
+    def _start(self, machine_id, timestamp, level, signals, health_score, alert_message, clear):
+        pending = self._pending.get(machine_id)
+        if pending is None:
+            if level is None:
+                return None
+            episode = {
+                "episode_id": f"{machine_id}@{timestamp}",
+                "machine_id": machine_id,
+                "status": "open",
+                "started_at": timestamp,
+                "ended_at": None,
+                "last_seen": timestamp,
+                "peak_level": level,
+                "peak_health_score": health_score,
+                "signals": ",".join(signals),
+                "alert_message": alert_message,
+                "readings": 1,
+            }
+            pending = self._pending[machine_id] = (episode, parse_timestamp(timestamp))
+        elif clear:
+            # Over before it lasted min_seconds: a blip, not an episode
+            del self._pending[machine_id]
+            return None
+        else:
+            episode = pending[0]
+            episode["last_seen"] = timestamp
+            episode["readings"] += 1
+            if level is not None:
+                _escalate(episode, level, signals, health_score, alert_message)
+
+        if parse_timestamp(timestamp) - pending[1] < self.min_seconds:
+            return None
+        del self._pending[machine_id]
+        self.open[machine_id] = episode
+        return episode
+
+
+def _escalate(episode, level, signals, health_score, alert_message):
+    """Folds one out-of-range reading into the episode's peak; True if that changed it."""
+    changed = False
+    if LEVELS.index(level) > LEVELS.index(episode["peak_level"]):
+        episode["peak_level"] = level
+        changed = True
+    if health_score < episode["peak_health_score"]:
+        episode["peak_health_score"] = health_score
+        episode["alert_message"] = alert_message
+        changed = True
+    known = episode["signals"].split(",")
+    new = [s for s in signals if s not in known]
+    if new:
+        episode["signals"] = ",".join(known + new)
+        changed = True
+    return changed
+
+
+class EpisodeWriter:
+    """
+    pw.io.subscribe sink that runs an EpisodeTracker over processed
+    readings and upserts the episodes that changed in one transaction per
+    Pathway batch. Like the other sinks it starts from an empty table, since
+    a restarted pipeline replays its input, unless `resume` is set: then
+    the open episodes are picked up from the table.
+    """
+
+    def __init__(self, path, clear_seconds=EPISODE_CLEAR_SECONDS, min_seconds=EPISODE_MIN_SECONDS, resume=False):
+        self.conn = connect_writer(path, SCHEMA)
+        self.tracker = EpisodeTracker(clear_seconds=clear_seconds, min_seconds=min_seconds)
+        if resume:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM alert_episodes WHERE status = 'open'"
+            ).fetchall()
+            for r in rows:
+                episode = dict(zip(COLUMNS, r))
+                self.tracker.open[episode["machine_id"]] = episode
+        else:
+            with transaction(self.conn):
+                self.conn.execute("DELETE FROM alert_episodes")
+        self.readings = 0
+        self.writes = 0
+        self._buffer = []
+
+    def on_change(self, key, row, time, is_addition):
+        if is_addition:
+            self._buffer.append(row)
+
+    def on_time_end(self, time):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        # Pathway does not keep input order within a batch
+        rows.sort(key=lambda r: r["timestamp"])
+        changed = {}
+        for row in rows:
+            episode = self.tracker.update(
+                row["machine_id"], row["timestamp"], row["temperature"], row["vibration"],
+                row["pressure"], row["health_score"], row["alert_message"]
+            )
+            if episode is not None:
+                changed[episode["episode_id"]] = tuple(episode[c] for c in COLUMNS)
+        self.readings += len(rows)
+        if changed:
+            with transaction(self.conn):
+                self.conn.executemany(UPSERT_EPISODE, list(changed.values()))
+            self.writes += len(changed)
+
+
+class EpisodeStore(SqliteReader):
+    """Backend view of alert_episodes."""
+
+    def query(self, status=None, start=None, end=None, machine_id=None, limit=1000):
+        """
+        Episodes overlapping [start, end] ("YYYY-MM-DD HH:MM:SS", both
+        optional), optionally of one status and machine, newest first.
+        """
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if machine_id:
+            where.append("machine_id = ?")
+            params.append(machine_id)
+        if end:
+            where.append("started_at <= ?")
+            params.append(end)
+        if start:
+            where.append("(ended_at IS NULL OR ended_at >= ?)")
+            params.append(start)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM alert_episodes"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started_at DESC LIMIT ?"
+        rows = self._query(sql, params + [limit]) or []
+
+        episodes = []
+        for r in rows:
+            episode = dict(zip(COLUMNS, r))
+            episode["signals"] = episode["signals"].split(",") if episode["signals"] else []
+            episodes.append(episode)
+        return episodes
@@ -0,0 +1,197 @@
+from collections import deque
+from datetime import datetime
+
+SIGNALS = ("temperature", "vibration", "pressure")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_timestamp(timestamp):
+    # fromisoformat accepts TIMESTAMP_FORMAT and is much faster than strptime
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+class RollingWindow:
+    """
+    Rolling mean, standard deviation, min, max and least-squares slope of
+    one signal over the last `window_seconds` (sliding) or the current
+    `window_seconds` bucket (tumbling).
+
+    Every push is amortized O(1): sums are updated incrementally, evicted
+    samples are subtracted, and min/max come from monotonic deques.
+    Times are kept relative to an anchor that is moved forward (with one
+    pass over the window) every few windows, so the sums of squares never
+    lose precision on long-running streams.
+
+    A sample can be taken back out with `remove` (a retracted reading),
+    which costs one pass over the window. Samples already evicted are not
+    affected, and are not brought back either.
+    """
+
+    REANCHOR_AFTER = 10
+
+    def __init__(self, window_seconds=60, mode="sliding"):
+        if mode not in ("sliding", "tumbling"):
+            raise ValueError(f"Unknown window mode: {mode}")
+        self.window_seconds = window_seconds
+        self.mode = mode
+        self.samples = deque()
+        self._min = deque()
+        self._max = deque()
+        self._anchor = None
+        self._bucket = None
+        self._clear_sums()
+
+    def _clear_sums(self):
+        self.n = 0
+        self.sx = self.sxx = 0.0
+        self.st = self.stt = self.stx = 0.0
+
+    def _add(self, t, x, sign):
+        t -= self._anchor
+        self.n += sign
+        self.sx += sign * x
+        self.sxx += sign * x * x
+        self.st += sign * t
+        self.stt += sign * t * t
+        self.stx += sign * t * x
+
+    def _clear(self):
+        self.samples.clear()
+        self._min.clear()
+        self._max.clear()
+        self._clear_sums()
+
+    def _reanchor(self, t):
+        self._anchor = t
+        self._clear_sums()
+        for st, sx, _ in self.samples:
+            self._add(st, sx, 1)
+
+    def _push_extremes(self, sample):
+        x = sample[1]
+        while self._min and self._min[-1][1] > x:
+            self._min.pop()
+        self._min.append(sample)
+        while self._max and self._max[-1][1] < x:
+            self._max.pop()
+        self._max.append(sample)
+
+    def push(self, t, x, key=None):
+        """Adds a sample; `key` identifies it for `remove` (defaults to `t`)."""
+        if key is None:
+            key = t
+        if self.samples:
+            # Out-of-order readings are counted at the newest time seen
+            t = max(t, self.samples[-1][0])
+
+        if self.mode == "tumbling":
+            bucket = int(t // self.window_seconds)
+            if bucket != self._bucket:
+                self._clear()
+                self._bucket = bucket
+        else:
+            while self.samples and self.samples[0][0] <= t - self.window_seconds:
+                old = self.samples.popleft()
+                self._add(old[0], old[1], -1)
+                if self._min and self._min[0] is old:
+                    self._min.popleft()
+                if self._max and self._max[0] is old:
+                    self._max.popleft()
+
+        if self._anchor is None or not self.samples or t - self._anchor > self.REANCHOR_AFTER * self.window_seconds:
+            self._reanchor(t)
+
+        sample = (t, x, key)
+        self.samples.append(sample)
+        self._add(t, x, 1)
+        self._push_extremes(sample)
+
+    def remove(self, key, x):
+        """
+        Takes the sample pushed with `key` and value `x` out of the window.
+        Returns False when it is no longer there (evicted or never pushed).
+        """
+        for i, sample in enumerate(self.samples):
+            if sample[2] == key and sample[1] == x:
+                break
+        else:
+            return False
+        del self.samples[i]
+        self._add(sample[0], x, -1)
+        self._min.clear()
+        self._max.clear()
+        for sample in self.samples:
+            self._push_extremes(sample)
+        if not self.samples:
+            self._clear_sums()
+        return True
+
+    def mean(self):
+        return self.sx / self.n if self.n else None
+
+    def std(self):
+        if self.n < 2:
+            return 0.0 if self.n else None
+        variance = (self.sxx - self.sx * self.sx / self.n) / (self.n - 1)
+        return max(variance, 0.0) ** 0.5
+
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+    def slope(self):
+        """Least-squares trend in units per minute."""
+        if self.n < 2:
+            return 0.0 if self.n else None
+        denominator = self.n * self.stt - self.st * self.st
+        if denominator <= 1e-9:
+            return 0.0
+        return (self.n * self.stx - self.st * self.sx) / denominator * 60
+
+
+class MachineFeatures:
+    """Rolling windows for every sensor signal of one machine."""
+
+    def __init__(self, window_seconds=60, mode="sliding"):
+        self.windows = {s: RollingWindow(window_seconds, mode) for s in SIGNALS}
+        self.last_timestamp = None
+
+    def update(self, timestamp, temperature, vibration, pressure):
+        t = parse_timestamp(timestamp)
+        for signal, value in zip(SIGNALS, (temperature, vibration, pressure)):
+            self.windows[signal].push(t, value, timestamp)
+        if self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp = timestamp
+
+    def retract(self, timestamp, temperature, vibration, pressure):
+        """
+        Takes a retracted reading back out of the windows. window_end moves
+        back to the newest reading left in the window; an emptied window
+        keeps the last one it had.
+        """
+        for signal, value in zip(SIGNALS, (temperature, vibration, pressure)):
+            self.windows[signal].remove(timestamp, value)
+        samples = self.windows[SIGNALS[0]].samples
+        if timestamp == self.last_timestamp and samples:
+            self.last_timestamp = max(sample[2] for sample in samples)
+
+    def features(self):
+        window = self.windows[SIGNALS[0]]
+        result = {
+            "window_seconds": window.window_seconds,
+            "window_mode": window.mode,
+            "window_count": window.n,
+            "window_end": self.last_timestamp,
+        }
+        for signal, w in self.windows.items():
+            for name, value in (
+                ("mean", w.mean()),
+                ("std", w.std()),
+                ("min", w.min()),
+                ("max", w.max()),
+                ("slope", w.slope()),
+            ):
+                result[f"{signal}_{name}"] = None if value is None else round(value, 4)
+        return result
@@ -0,0 +1,227 @@
+"""
+Time-to-threshold forecasts: when each machine's signals will cross the
+warning, critical and shutdown limits of documents/pump_manual.txt if
+their current trend continues.
+
+Every signal (and the health score) has a linear trend fitted by least
+squares with exponential forgetting, which is what recursive least
+squares with a forgetting factor computes for a level + slope model.
+The fit is kept as five decayed sums, so a reading is an O(1) update and
+a forecast is a handful of divisions.
+"""
+import os
+import re
+
+from features import SIGNALS, parse_timestamp
+
+# ── Defaults (overridable from the pipeline's environment) ──
+FORECAST_HALF_LIFE_SECONDS = 900    # weight of a reading halves every 15 min
+FORECAST_MIN_READINGS      = 10     # readings before a machine gets a forecast
+FORECAST_HORIZON_HOURS     = 24 * 7 # crossings further out are reported as None
+
+LEVELS = ("warning", "critical", "shutdown")
+
+MANUAL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "documents", "pump_manual.txt")
+
+# documents/pump_manual.txt as shipped, used when it cannot be read or parsed
+DEFAULT_LIMITS = {
+    "temperature": {"direction": "above", "warning": 80.0, "critical": 90.0, "shutdown": 95.0},
+    "vibration":   {"direction": "above", "warning": 3.0,  "critical": 4.0,  "shutdown": 5.0},
+    "pressure":    {"direction": "below", "warning": 3.0,  "critical": 2.5,  "shutdown": 2.0},
+}
+
+# Health bands of the backend's get_health_status (warning < 80, critical
+# < 60, danger < 40); the health score is not in the manual
+HEALTH_LIMITS = {"direction": "below", "warning": 80.0, "critical": 60.0, "shutdown": 40.0}
+
+_SECTION = re.compile(r"^-\s*(\w+)\s*:", re.MULTILINE)
+_LIMIT = re.compile(r"^\s*(Warning|Critical|Immediate shutdown)\s+(above|below)\s+([\d.]+)", re.IGNORECASE | re.MULTILINE)
+_LEVEL_NAMES = {"warning": "warning", "critical": "critical", "immediate shutdown": "shutdown"}
+
+
+def parse_limits(text):
+    """
+    Limits per signal from the manual's NORMAL OPERATING RANGES, e.g.
+        - Temperature: 60-75°C
+          Warning above 80°C
+    Signals without all three levels are left out.
+    """
+    limits = {}
+    sections = list(_SECTION.finditer(text))
+    for i, section in enumerate(sections):
+        signal = section.group(1).lower()
+        if signal not in SIGNALS:
+            continue
+        end = sections[i + 1].start() if i + 1 < len(sections) else len(text)
+        found = {}
+        for match in _LIMIT.finditer(text, section.end(), end):
+            found["direction"] = match.group(2).lower()
+            found[_LEVEL_NAMES[match.group(1).lower()]] = float(match.group(3))
+        if all(level in found for level in LEVELS):
+            limits[signal] = found
+    return limits
+
+
+def load_limits(path=MANUAL_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            parsed = parse_limits(f.read())
+    except OSError:
+        parsed = {}
+    return {signal: parsed.get(signal, DEFAULT_LIMITS[signal]) for signal in SIGNALS}
+
+
+class LinearTrend:
+    """
+    Exponentially weighted least-squares fit of x = level + slope * t.
+
+    The decayed sums are kept relative to the latest reading's time, so
+    moving to a new reading shifts them by dt (exact, O(1)) and `level`
+    is the fitted value now.
+    """
+
+    __slots__ = ("half_life", "n", "w", "wt", "wtt", "wx", "wtx")
+
+    def __init__(self, half_life=FORECAST_HALF_LIFE_SECONDS):
+        self.half_life = half_life
+        self.n = 0
+        self.w = self.wt = self.wtt = self.wx = self.wtx = 0.0
+
+    def update(self, dt, x):
+        """Adds a reading `dt` seconds after the previous one."""
+        if dt:
+            decay = 0.5 ** (dt / self.half_life)
+            # Re-express the sums with t measured from the new reading
+            self.wtt = decay * (self.wtt - 2 * dt * self.wt + dt * dt * self.w)
+            self.wt = decay * (self.wt - dt * self.w)
+            self.wtx = decay * (self.wtx - dt * self.wx)
+            self.w *= decay
+            self.wx *= decay
+        self.n += 1
+        self.w += 1.0
+        self.wx += x
+
+    def retract(self, age, x):
+        """Takes back a reading that was added `age` seconds before the latest one."""
+        self.n -= 1
+        if self.n <= 0:
+            # Nothing left: start from exact zeros rather than rounding residue
+            self.n = 0
+            self.w = self.wt = self.wtt = self.wx = self.wtx = 0.0
+            return
+        weight = 0.5 ** (age / self.half_life)
+        # Its terms were weight * (1, t, t², x, t·x) with t = -age
+        self.w -= weight
+        self.wt += weight * age
+        self.wtt -= weight * age * age
+        self.wx -= weight * x
+        self.wtx += weight * age * x
+
+    def fit(self):
+        """(level now, slope per second), or None with fewer than two distinct times."""
+        if not self.w:
+            return None
+        denominator = self.w * self.wtt - self.wt * self.wt
+        if denominator <= 1e-9 * self.w * self.w:
+            return None
+        slope = (self.w * self.wtx - self.wt * self.wx) / denominator
+        level = (self.wx - slope * self.wt) / self.w
+        return level, slope
+
+
+def hours_to(level, slope, limit, direction, horizon_hours):
+    """Hours until a trend at `level` moving at `slope`/s crosses `limit`."""
+    past = level >= limit if direction == "above" else level <= limit
+    if past:
+        return 0.0
+    approaching = slope > 0 if direction == "above" else slope < 0
+    if not approaching:
+        return None
+    hours = (limit - level) / slope / 3600
+    return round(hours, 2) if hours <= horizon_hours else None
+
+
+class MachineForecast:
+    """Trends of one machine's signals and health score, updated per reading."""
+
+    def __init__(self, limits, half_life=FORECAST_HALF_LIFE_SECONDS,
+                 min_readings=FORECAST_MIN_READINGS, horizon_hours=FORECAST_HORIZON_HOURS):
+        self.limits = dict(limits, health_score=HEALTH_LIMITS)
+        self.trends = {name: LinearTrend(half_life) for name in self.limits}
+        self.min_readings = min_readings
+        self.horizon_hours = horizon_hours
+        self.last_t = None
+        self.last_timestamp = None
+
+    def update(self, timestamp, temperature, vibration, pressure, health_score):
+        t = parse_timestamp(timestamp)
+        # Out-of-order readings are counted at the newest time seen
+        dt = 0.0 if self.last_t is None or t <= self.last_t else t - self.last_t
+        if self.last_t is None or t > self.last_t:
+            self.last_t = t
+            self.last_timestamp = timestamp
+        values = {
+            "temperature": temperature, "vibration": vibration,
+            "pressure": pressure, "health_score": health_score,
+        }
+        for name, trend in self.trends.items():
+            trend.update(dt, values[name])
+
+    def retract(self, timestamp, temperature, vibration, pressure, health_score):
+        """
+        Takes a reading back out of the trends (e.g. the sensor CSV was
+        rewritten). Exact for a reading that arrived in timestamp order; a
+        late one was counted at the newest time seen then, but is taken
+        back at its own time. The trends stay anchored at the newest
+        time seen until every reading is gone.
+        """
+        if self.last_t is None:
+            return
+        age = max(0.0, self.last_t - parse_timestamp(timestamp))
+        values = {
+            "temperature": temperature, "vibration": vibration,
+            "pressure": pressure, "health_score": health_score,
+        }
+        for name, trend in self.trends.items():
+            trend.retract(age, values[name])
+        if not self.trends["health_score"].n:
+            self.last_t = None
+            self.last_timestamp = None
+
+    def forecast(self):
+        """
+        Per signal: fitted level, slope per hour and hours to each limit
+        (0 when already past it, None when not heading towards it or
+        further out than the horizon). The top-level hours_to_<level> is
+        the earliest crossing over all signals, with the signal that
+        causes it.
+        """
+        result = {
+            "timestamp": self.last_timestamp,
+            "readings": self.trends["health_score"].n,
+            "signals": {},
+        }
+        for level in LEVELS:
+            result[f"hours_to_{level}"] = None
+            result[f"{level}_signal"] = None
+
+        for name, trend in self.trends.items():
+            fit = trend.fit() if trend.n >= self.min_readings else None
+            if fit is None:
+                continue
+            level_now, slope = fit
+            limits = self.limits[name]
+            signal = {
+                "level": round(level_now, 4),
+                "slope_per_hour": round(slope * 3600, 4),
+                "hours_to": {},
+            }
+            for level in LEVELS:
+                hours = hours_to(level_now, slope, limits[level], limits["direction"], self.horizon_hours)
+                signal["hours_to"][level] = hours
+                earliest = result[f"hours_to_{level}"]
+                if hours is not None and (earliest is None or hours < earliest):
+                    result[f"hours_to_{level}"] = hours
+                    result[f"{level}_signal"] = name
+            result["signals"][name] = signal
+        return result
@@ -0,0 +1,219 @@
+import os
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from features import TIMESTAMP_FORMAT, parse_timestamp
+
+# One raw little-endian file per column, partitioned by machine and day:
+#   data/history/<machine_id>/<YYYY-MM-DD>/<column>.bin
+COLUMNS = {
+    "ts":           np.dtype("<i8"),
+    "temperature":  np.dtype("<f8"),
+    "vibration":    np.dtype("<f8"),
+    "pressure":     np.dtype("<f8"),
+    "health_score": np.dtype("<f8"),
+    "is_anomaly":   np.dtype("u1"),
+}
+
+
+def _partition_dir(root, machine_id, day):
+    return os.path.join(root, machine_id, day)
+
+
+def _column_path(partition, column):
+    return os.path.join(partition, f"{column}.bin")
+
+
+def clear_history(root):
+    """
+    Deletes every partition under `root`. Only the store's own column
+    files (and the directories they leave empty) are removed.
+    """
+    if not os.path.isdir(root):
+        return
+    for machine_id in os.listdir(root):
+        machine_dir = os.path.join(root, machine_id)
+        if not os.path.isdir(machine_dir):
+            continue
+        for day in os.listdir(machine_dir):
+            partition = os.path.join(machine_dir, day)
+            if not os.path.isdir(partition):
+                continue
+            for name in COLUMNS:
+                for path in (_column_path(partition, name), _column_path(partition, name) + ".tmp"):
+                    if os.path.exists(path):
+                        os.remove(path)
+            if not os.listdir(partition):
+                os.rmdir(partition)
+        if not os.listdir(machine_dir):
+            os.rmdir(machine_dir)
+
+
+class HistoryWriter:
+    """
+    Buffers processed readings and appends them to the columnar store.
+    Each partition stays sorted by timestamp: a batch that arrives out of
+    order relative to what is already on disk (rare, late readings) makes
+    that one partition get merged and rewritten.
+
+    Like the JSONL sinks, a fresh start begins from an empty store. With
+    `resume` (a pipeline restarted from persisted state) the partitions
+    are kept, and readings at or before the newest one a partition held
+    when it was first seen again are skipped, so replayed rows are
+    neither duplicated nor merged into the partition batch after batch.
+    """
+
+    def __init__(self, root, resume=False):
+        self.root = root
+        self.resume = resume
+        self._buffer = defaultdict(list)
+        self._last_ts = {}
+        # partition -> newest ts on disk when resuming
+        self._stored_ts = {}
+        if not resume:
+            clear_history(root)
+
+    def append(self, row):
+        timestamp = row["timestamp"]
+        self._buffer[(row["machine_id"], timestamp[:10])].append((
+            int(parse_timestamp(timestamp)),
+            row["temperature"],
+            row["vibration"],
+            row["pressure"],
+            row["health_score"],
+            bool(row["is_anomaly"]),
+        ))
+
+    def on_change(self, key, row, time, is_addition):
+        # pw.io.subscribe callback
+        if is_addition:
+            self.append(row)
+
+    def flush(self):
+        for (machine_id, day), rows in self._buffer.items():
+            rows.sort(key=lambda r: r[0])
+            partition = _partition_dir(self.root, machine_id, day)
+
+            last_ts = self._last_ts.get(partition)
+            if last_ts is None:
+                existing = read_partition(partition)
+                last_ts = int(existing["ts"][-1]) if existing and len(existing["ts"]) else None
+                if self.resume and last_ts is not None:
+                    self._stored_ts.setdefault(partition, last_ts)
+
+            stored_ts = self._stored_ts.get(partition)
+            if stored_ts is not None and rows[0][0] <= stored_ts:
+                rows = [r for r in rows if r[0] > stored_ts]
+                if not rows:
+                    self._last_ts[partition] = last_ts
+                    continue
+
+            os.makedirs(partition, exist_ok=True)
+            columns = {
+                name: np.array([r[i] for r in rows], dtype=dtype)
+                for i, (name, dtype) in enumerate(COLUMNS.items())
+            }
+
+            if last_ts is not None and rows[0][0] < last_ts:
+                existing = read_partition(partition)
+                merged = {name: np.concatenate([existing[name], columns[name]]) for name in COLUMNS}
+                order = np.argsort(merged["ts"], kind="stable")
+                for name in COLUMNS:
+                    tmp = _column_path(partition, name) + ".tmp"
+                    merged[name][order].tofile(tmp)
+                    os.replace(tmp, _column_path(partition, name))
+            else:
+                for name in COLUMNS:
+                    with open(_column_path(partition, name), "ab") as f:
+                        f.write(columns[name].tobytes())
+
+            self._last_ts[partition] = max(rows[-1][0], last_ts or rows[-1][0])
+        self._buffer.clear()
+
+
+def read_partition(partition):
+    """Memory-maps every column of one partition. Returns None if it does not exist."""
+    if not os.path.isdir(partition):
+        return None
+    sizes = {}
+    for name, dtype in COLUMNS.items():
+        path = _column_path(partition, name)
+        sizes[name] = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+    # A crash between column appends can leave columns of different length
+    n = min(sizes.values())
+    if n == 0:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+    return {
+        name: np.memmap(_column_path(partition, name), dtype=dtype, mode="r", shape=(n,))
+        for name, dtype in COLUMNS.items()
+    }
+
+
+class HistoryStore:
+    """Range queries over the columnar history of one machine."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def machines(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.listdir(self.root))
+
+    def query(self, machine_id, start=None, end=None, limit=10_000):
+        """
+        Readings of `machine_id` with start <= timestamp <= end (strings in
+        the pipeline's "%Y-%m-%d %H:%M:%S" format, or None for open ends).
+        Only the day partitions in range are opened; inside each one the
+        bounds are found by binary search on the memory-mapped ts column.
+        When more than `limit` points match they are evenly downsampled.
+        """
+        machine_dir = os.path.join(self.root, machine_id)
+        start_ts = parse_timestamp(start) if start else -np.inf
+        end_ts = parse_timestamp(end) if end else np.inf
+        days = sorted(
+            day for day in (os.listdir(machine_dir) if os.path.isdir(machine_dir) else [])
+            if (not start or day >= start[:10]) and (not end or day <= end[:10])
+        )
+
+        slices = []
+        for day in days:
+            columns = read_partition(os.path.join(machine_dir, day))
+            if not columns or not len(columns["ts"]):
+                continue
+            lo = np.searchsorted(columns["ts"], start_ts, side="left")
+            hi = np.searchsorted(columns["ts"], end_ts, side="right")
+            if hi > lo:
+                slices.append({name: col[lo:hi] for name, col in columns.items()})
+
+        count = sum(len(s["ts"]) for s in slices)
+        step = max(1, -(-count // limit)) if limit else 1
+        points = {name: [] for name in COLUMNS}
+        offset = 0
+        for s in slices:
+            first = (-offset) % step
+            for name in COLUMNS:
+                points[name].append(np.asarray(s[name][first::step]))
+            offset += len(s["ts"])
+
+        merged = {
+            name: (np.concatenate(parts) if parts else np.empty(0, dtype=COLUMNS[name]))
+            for name, parts in points.items()
+        }
+        timestamps = merged.pop("ts")
+        result = {
+            "timestamp": [
+                datetime.fromtimestamp(ts).strftime(TIMESTAMP_FORMAT)
+                for ts in timestamps.tolist()
+            ],
+            **{name: col.tolist() for name, col in merged.items()},
+        }
+        result["is_anomaly"] = [bool(x) for x in result["is_anomaly"]]
+        return {
+            "machine_id": machine_id,
+            "count": count,
+            "returned": len(timestamps),
+            "points": result,
+        }
@@ -0,0 +1,247 @@
+"""
+HTTP ingest into the sensor pipeline without going through the CSV file.
+
+The backend's POST /ingest validates a batch of readings column by
+column (NumPy / pandas masks, no per-row checks) and queues the valid
+ones for IngestClient, which streams them to the pipeline over one TCP
+connection per backend process. On the pipeline side IngestServer hands
+each batch to a pw.io.python ConnectorSubject, which feeds it into the
+same sensor stream as the CSV.
+
+Every batch travels as one line of JSON holding a list per column, and
+is acknowledged with "ok\\n" once the connector has taken it:
+
+    {"machine_id": [...], "timestamp": [...], "temperature": [...], ...}\\n
+
+Backpressure is end to end: the connector's backlog is bounded, so a
+busy engine holds back acknowledgements, the client stops draining its
+queue, and once MAX_PENDING_ROWS are queued the backend answers 429.
+While the pipeline cannot be reached it answers 503.
+"""
+import json
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ("machine_id", "timestamp", "temperature", "vibration", "pressure")
+SIGNALS = ("temperature", "vibration", "pressure")
+
+# ── Defaults (overridable from the backend's and pipeline's environment) ──
+INGEST_ADDR      = "127.0.0.1:9102"
+MAX_BATCH_ROWS   = 50_000    # readings per request
+MAX_PENDING_ROWS = 200_000   # readings queued per backend process before 429
+MAX_ERRORS       = 20        # rejected rows described in a response
+
+# Same rules as the history store's directory names: no separators, no leading dot
+MACHINE_ID_PATTERN = r"[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}"
+TIMESTAMP_PATTERN = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+FLOAT_MAX = np.finfo(np.float64).max
+
+
+class IngestBusy(Exception):
+    """The queue to the pipeline is full (429)."""
+
+
+class IngestUnavailable(Exception):
+    """The pipeline's ingest port cannot be reached (503)."""
+
+
+def parse_body(body, content_type=""):
+    """
+    Readings from a JSON array, a single JSON object or newline-delimited
+    JSON. NDJSON is joined into one array so it is parsed in one call.
+    Raises ValueError on malformed input.
+    """
+    text = body.decode("utf-8").strip()
+    if not text:
+        return []
+    if "ndjson" not in content_type and "jsonlines" not in content_type:
+        try:
+            records = json.loads(text)
+            return records if isinstance(records, list) else [records]
+        except ValueError:
+            if text[0] != "{":
+                raise
+    lines = [line for line in text.splitlines() if line.strip()]
+    return json.loads("[" + ",".join(lines) + "]")
+
+
+def _column(records, field):
+    return pd.Series([r.get(field) if type(r) is dict else None for r in records], dtype=object)
+
+
+def _matches(column, pattern):
+    # .str only works on a column that holds some strings, and would match "7" for 7
+    is_str = column.map(type).eq(str).to_numpy()
+    matched = column.where(is_str, "").astype(str).str.fullmatch(pattern).to_numpy(bool)
+    return is_str & matched
+
+
+def validate(records):
+    """
+    Checks readings against SensorSchema with one mask per column: a
+    machine_id string usable as a path component, a "YYYY-MM-DD HH:MM:SS"
+    timestamp string that is a real date, finite JSON numbers for the
+    signals. Values of the wrong type reject the row like malformed ones.
+    Returns (columns of the valid rows, number of valid rows, errors of
+    the first MAX_ERRORS rejected rows as {"index", "error"}).
+    """
+    n = len(records)
+    masks = {}
+
+    machine_id = _column(records, "machine_id")
+    masks["machine_id"] = _matches(machine_id, MACHINE_ID_PATTERN)
+
+    timestamp = _column(records, "timestamp")
+    well_formed = _matches(timestamp, TIMESTAMP_PATTERN)
+    parsed = pd.to_datetime(timestamp.where(well_formed), format=TIMESTAMP_FORMAT, errors="coerce")
+    masks["timestamp"] = well_formed & parsed.notna().to_numpy()
+
+    values = {}
+    for signal in SIGNALS:
+        column = _column(records, signal)
+        # Only JSON numbers: true/false would otherwise pass as 1/0, "70" as 70
+        is_number = column.map(type).isin((int, float)).to_numpy()
+        # JSON integers have no size limit; past float range they are out of range too
+        with np.errstate(invalid="ignore"):
+            in_range = np.abs(column.where(is_number, 0).to_numpy()) <= FLOAT_MAX
+        is_number = is_number & in_range.astype(bool)
+        values[signal] = pd.to_numeric(column.where(is_number), errors="coerce").to_numpy(np.float64)
+        masks[signal] = np.isfinite(values[signal]) & is_number
+
+    valid = np.ones(n, dtype=bool)
+    for mask in masks.values():
+        valid &= mask
+
+    errors = []
+    for i in np.flatnonzero(~valid)[:MAX_ERRORS].tolist():
+        if type(records[i]) is not dict:
+            errors.append({"index": i, "error": "not an object"})
+            continue
+        bad = [field for field in COLUMNS if not masks[field][i]]
+        errors.append({"index": i, "error": "invalid or missing " + ", ".join(bad)})
+
+    idx = np.flatnonzero(valid)
+    columns = {
+        "machine_id": machine_id.to_numpy()[idx].tolist(),
+        "timestamp": timestamp.to_numpy()[idx].tolist(),
+    }
+    for signal in SIGNALS:
+        columns[signal] = values[signal][idx].tolist()
+    return columns, len(idx), errors
+
+
+def encode_batch(columns):
+    return (json.dumps(columns, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def parse_addr(addr):
+    host, _, port = addr.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class IngestClient:
+    """
+    Backend side: a bounded queue of encoded batches and one thread that
+    writes them to the pipeline, reconnecting with backoff. A batch leaves
+    the queue only once acknowledged; one the connection dropped is sent
+    again after reconnecting (at least once).
+    """
+
+    def __init__(self, addr=INGEST_ADDR, max_pending_rows=MAX_PENDING_ROWS):
+        self.addr = parse_addr(addr)
+        self.max_pending_rows = max_pending_rows
+        self.connected = False
+        self.pending_rows = 0
+        self.rows_sent = 0
+        self.batches_sent = 0
+        self._queue = deque()
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, name="ingest-client", daemon=True).start()
+
+    def submit(self, payload, rows):
+        """Queues one encoded batch; raises IngestBusy or IngestUnavailable."""
+        with self._cond:
+            if not self.connected:
+                raise IngestUnavailable(f"pipeline ingest at {self.addr[0]}:{self.addr[1]} is not reachable")
+            # A batch is always accepted into an empty queue, however large
+            if self.pending_rows and self.pending_rows + rows > self.max_pending_rows:
+                raise IngestBusy(f"{self.pending_rows} readings already queued")
+            self._queue.append((payload, rows))
+            self.pending_rows += rows
+            self._cond.notify()
+
+    def wait_connected(self, timeout):
+        """True once connected, False if that takes longer than `timeout` s."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.connected, timeout=timeout)
+
+    def _connect(self):
+        delay = 0.1
+        while True:
+            try:
+                sock = socket.create_connection(self.addr, timeout=5)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                # Blocking sends: a full socket buffer is the pipeline's backpressure
+                sock.settimeout(None)
+                with self._cond:
+                    self.connected = True
+                    self._cond.notify_all()
+                return sock
+            except OSError:
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+    def _run(self):
+        sock = self._connect()
+        acks = sock.makefile("rb")
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                payload, rows = self._queue[0]
+            try:
+                sock.sendall(payload)
+                if acks.readline() != b"ok\n":
+                    raise ConnectionError("pipeline closed the ingest connection")
+            except OSError:
+                with self._cond:
+                    self.connected = False
+                acks.close()
+                sock.close()
+                sock = self._connect()
+                acks = sock.makefile("rb")
+                continue
+            with self._cond:
+                self._queue.popleft()
+                self.pending_rows -= rows
+                self.rows_sent += rows
+                self.batches_sent += 1
+
+
+class _BatchHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                columns = json.loads(line)
+            except ValueError:
+                # A batch cut off by a dropped connection
+                continue
+            self.server.on_batch(columns)
+            self.wfile.write(b"ok\n")
+
+
+class IngestServer(socketserver.ThreadingTCPServer):
+    """Pipeline side: calls `on_batch(columns)` for every batch received."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, addr, on_batch):
+        self.on_batch = on_batch
+        super().__init__(parse_addr(addr), _BatchHandler)
@@ -1,5 +1,56 @@
 import pathway as pw
+import itertools
 import os
+import time as clock
+from collections import deque
+
+from baselines import MachineBaseline
+from compaction import write_jsonl
+from episodes import EpisodeWriter
+from features import MachineFeatures, parse_timestamp
+from forecast import MachineForecast, load_limits
+from history_store import HistoryWriter
+from ingest import IngestServer
+from metrics import Callback, start_http_server
+from persistence import persistence_config
+from rollups import RollupWriter
+from scoring import compute_health_score, score_reading
+from sqlite_store import SqliteWriter
+
+# ── Windowed features ──
+FEATURE_WINDOW_SECONDS = int(os.getenv("FEATURE_WINDOW_SECONDS", "60"))
+FEATURE_WINDOW_MODE    = os.getenv("FEATURE_WINDOW_MODE", "sliding")
+
+# ── Per-machine EWMA baselines for the deviation score ──
+BASELINE_ALPHA  = float(os.getenv("BASELINE_ALPHA", "0.01"))
+BASELINE_WARMUP = int(os.getenv("BASELINE_WARMUP", "30"))
+
+# ── Time-to-threshold forecasts (limits from documents/pump_manual.txt) ──
+FORECAST_HALF_LIFE_SECONDS = float(os.getenv("FORECAST_HALF_LIFE_SECONDS", "900"))
+FORECAST_MIN_READINGS      = int(os.getenv("FORECAST_MIN_READINGS", "10"))
+FORECAST_HORIZON_HOURS     = float(os.getenv("FORECAST_HORIZON_HOURS", "168"))
+FORECAST_LIMITS            = load_limits()
+
+# ── Columnar history (set HISTORY_DIR="" to disable) ──
+HISTORY_DIR = os.getenv("HISTORY_DIR", "data/history")
+
+# ── SQLite (WAL) state for the backend, e.g. STATE_DB=data/state.db ("" = off) ──
+STATE_DB = os.getenv("STATE_DB", "")
+
+# ── Alert episodes table (SQLite) for /alerts/episodes ("" = off) ──
+EPISODES_DB           = os.getenv("EPISODES_DB", "data/alert_episodes.db")
+EPISODE_MIN_SECONDS   = float(os.getenv("EPISODE_MIN_SECONDS", "10"))
+EPISODE_CLEAR_SECONDS = float(os.getenv("EPISODE_CLEAR_SECONDS", "30"))
+
+# ── Site / line / machine type rollups for /summary?group_by= ──
+MACHINE_METADATA = os.getenv("MACHINE_METADATA", "data/machine_metadata.csv")
+
+# ── Readings POSTed to the backend's /ingest, received on INGEST_ADDR ("" = off) ──
+INGEST_ADDR        = os.getenv("INGEST_ADDR", "127.0.0.1:9102")
+INGEST_MAX_BACKLOG = int(os.getenv("INGEST_MAX_BACKLOG", "100000"))
+
+# ── Prometheus metrics on :PIPELINE_METRICS_PORT/metrics (set "" to disable) ──
+PIPELINE_METRICS_PORT = os.getenv("PIPELINE_METRICS_PORT", "9101")
 
 class SensorSchema(pw.Schema):
     machine_id:  str
@@ -8,32 +59,339 @@ class SensorSchema(pw.Schema):
     vibration:   float
     pressure:    float
 
-def compute_health_score(temperature, vibration, pressure):
-    score = 100.0
-    if temperature > 80:
-        score -= (temperature - 80) * 2.5
-    if vibration > 3.0:
-        score -= (vibration - 3.0) * 15
-    if pressure < 3.0:
-        score -= (3.0 - pressure) * 8
-    return max(0.0, min(100.0, round(score, 1)))
-
-def check_anomaly(temperature, vibration, pressure):
-    return bool(
-        temperature > 80.0 or
-        vibration   > 3.0  or
-        pressure    < 3.0
+class FeatureAccumulator(pw.BaseCustomAccumulator):
+    """
+    Keeps one MachineFeatures per machine_id group, so every new reading
+    is an O(1) window update instead of a re-aggregation of the group.
+    The state is handed to the engine by reference rather than pickled,
+    and `retract` takes a retracted reading (e.g. data/sensor_readings.csv
+    rewritten by a restarted simulator) back out of the windows, so
+    Pathway does not keep every row around for recomputation. Once every
+    reading of a machine is retracted, Pathway drops the state altogether.
+
+    `serialize` hands the engine a new accumulator around the same state
+    with the result taken there and then: the engine can still be reading
+    an earlier batch's result (a resumed pipeline replays its snapshot and
+    the new rows back to back), and that one must not change under it.
+    """
+
+    def __init__(self, row):
+        self.row = row
+        self.state = None
+        self.result = None
+
+    def _state(self):
+        if self.state is None:
+            self.state = MachineFeatures(FEATURE_WINDOW_SECONDS, FEATURE_WINDOW_MODE)
+            self.state.update(*self.row)
+        return self.state
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row)
+
+    @classmethod
+    def sort_by(cls, row):
+        return row[0]
+
+    def update(self, other):
+        self._state().update(*other.row)
+
+    def retract(self, other):
+        self._state().retract(*other.row)
+
+    def compute_result(self) -> pw.Json:
+        return pw.Json(self.result)
+
+    def serialize(self):
+        view = FeatureAccumulator(None)
+        view.state = self._state()
+        view.result = view.state.features()
+        return pw.wrap_py_object(view)
+
+    @classmethod
+    def deserialize(cls, val):
+        return val.value
+
+class ForecastAccumulator(pw.BaseCustomAccumulator):
+    """
+    One MachineForecast per machine_id group: every reading is an O(1)
+    update of the machine's trends, handed to the engine by reference
+    (with the result taken in `serialize`) like FeatureAccumulator. The
+    health score is computed here from the raw reading, so the reducer
+    runs on the sensor stream itself and sees its retractions.
+    """
+
+    def __init__(self, row):
+        self.row = row
+        self.state = None
+        self.result = None
+
+    def _state(self):
+        if self.state is None:
+            self.state = MachineForecast(
+                FORECAST_LIMITS, FORECAST_HALF_LIFE_SECONDS, FORECAST_MIN_READINGS, FORECAST_HORIZON_HOURS
+            )
+            self.state.update(*self.row, compute_health_score(*self.row[1:]))
+        return self.state
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row)
+
+    @classmethod
+    def sort_by(cls, row):
+        return row[0]
+
+    def update(self, other):
+        self._state().update(*other.row, compute_health_score(*other.row[1:]))
+
+    def retract(self, other):
+        # A rewritten CSV retracts its old readings: take them back out
+        self._state().retract(*other.row, compute_health_score(*other.row[1:]))
+
+    def compute_result(self) -> pw.Json:
+        return pw.Json(self.result)
+
+    def serialize(self):
+        view = ForecastAccumulator(None)
+        view.state = self._state()
+        view.result = view.state.forecast()
+        return pw.wrap_py_object(view)
+
+    @classmethod
+    def deserialize(cls, val):
+        return val.value
+
+# Numbers every BaselineAccumulator batch, across groups and a group's
+# restart, so a reading never comes out of two batches as the same row
+BATCH_NUMBERS = itertools.count()
+
+class BaselineAccumulator(pw.BaseCustomAccumulator):
+    """
+    One MachineBaseline per machine_id group, fed in timestamp order
+    (sort_by), so every reading is scored against the readings before it
+    whatever order Pathway hands a batch over in. The result is the
+    group's latest batch of readings, each with its deviation score, which
+    score_stream flattens back into one row per reading.
+
+    The baseline is shared by reference like FeatureAccumulator's state,
+    and `serialize` hands the engine a new accumulator holding just that
+    batch's readings, so the next batch cannot change a result that is
+    still being read.
+    """
+
+    def __init__(self, row):
+        self.row = row
+        self.state = None
+        self.batch = None
+        self.scored = []
+        self.result = ()
+
+    def _state(self):
+        if self.state is None:
+            self.state = MachineBaseline(BASELINE_ALPHA, BASELINE_WARMUP)
+            self.batch = next(BATCH_NUMBERS)
+            self._score(self.row)
+        return self.state
+
+    def _score(self, row):
+        score = self.state.update(*row[1:])
+        self.scored.append((*row, None if score is None else round(score, 2), self.batch))
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row)
+
+    @classmethod
+    def sort_by(cls, row):
+        # Readings sharing a timestamp are taken in a fixed order too
+        return tuple(row)
+
+    def update(self, other):
+        self._state()
+        self._score(other.row)
+
+    def retract(self, other):
+        self._state().retract()
+
+    def compute_result(self) -> tuple:
+        return self.result
+
+    def serialize(self):
+        view = BaselineAccumulator(None)
+        view.state = self._state()
+        view.batch = next(BATCH_NUMBERS)
+        view.result = tuple(self.scored)
+        return pw.wrap_py_object(view)
+
+    @classmethod
+    def deserialize(cls, val):
+        return val.value
+
+class IngestSubject(pw.io.python.ConnectorSubject):
+    """
+    Readings from the backend's POST /ingest, already validated there,
+    arriving as column batches on an IngestServer. `next` blocks while
+    the engine's backlog is full, which holds back the acknowledgement
+    to the backend and so pushes back on its queue.
+    """
+
+    def __init__(self, addr):
+        super().__init__()
+        self.addr = addr
+        self.rows = 0
+
+    @property
+    def _deletions_enabled(self) -> bool:
+        return False
+
+    def run(self):
+        server = IngestServer(self.addr, self.push)
+        print(f"📥 Ingest on {self.addr}")
+        server.serve_forever()
+
+    def push(self, columns):
+        next_row = self.next
+        for machine_id, timestamp, temperature, vibration, pressure in zip(
+            columns["machine_id"], columns["timestamp"],
+            columns["temperature"], columns["vibration"], columns["pressure"]
+        ):
+            next_row(
+                machine_id=machine_id, timestamp=timestamp,
+                temperature=temperature, vibration=vibration, pressure=pressure
+            )
+        self.rows += len(columns["machine_id"])
+
+class SinkMetrics:
+    """
+    pw.io.subscribe callbacks counting the rows written to one sink.
+    The callbacks only bump plain attributes; rates and lag are worked out
+    when /metrics is scraped.
+    """
+
+    RATE_WINDOW_SECONDS = 10
+    sinks = {}
+
+    def __init__(self, sink):
+        self.rows = 0
+        self.latest_timestamp = None
+        self._samples = deque([(clock.monotonic(), 0)])
+        SinkMetrics.sinks[sink] = self
+
+    def on_change(self, key, row, time, is_addition):
+        if is_addition:
+            self.rows += 1
+            timestamp = row["timestamp"]
+            if timestamp and (self.latest_timestamp is None or timestamp > self.latest_timestamp):
+                self.latest_timestamp = timestamp
+
+    def on_time_end(self, time):
+        now = clock.monotonic()
+        self._samples.append((now, self.rows))
+        while len(self._samples) > 2 and self._samples[1][0] <= now - self.RATE_WINDOW_SECONDS:
+            self._samples.popleft()
+
+    def write_rate(self):
+        """Rows/s over roughly the last RATE_WINDOW_SECONDS, 0 once the sink goes idle."""
+        (start, start_rows), (end, end_rows) = self._samples[0], self._samples[-1]
+        now = clock.monotonic()
+        if now - end > self.RATE_WINDOW_SECONDS:
+            return 0.0
+        return (end_rows - start_rows) / max(now - start, 1e-9)
+
+    def lag(self):
+        if self.latest_timestamp is None:
+            return None
+        return clock.time() - parse_timestamp(self.latest_timestamp)
+
+    def subscribe(self, table):
+        pw.io.subscribe(table, on_change=self.on_change, on_time_end=self.on_time_end)
+
+
+def start_metrics(port):
+    sinks = SinkMetrics.sinks
+    Callback(
+        "failureguard_pipeline_rows_processed_total",
+        "Sensor readings scored by the pipeline",
+        lambda: sinks["processed_readings"].rows,
+        kind="counter"
+    )
+    Callback(
+        "failureguard_pipeline_lag_seconds",
+        "Wall clock minus the newest reading timestamp processed",
+        lambda: sinks["processed_readings"].lag()
+    )
+    Callback(
+        "failureguard_pipeline_output_rows_total",
+        "Rows written per output sink",
+        lambda: {(name,): s.rows for name, s in sinks.items()},
+        kind="counter",
+        labelnames=["sink"]
+    )
+    Callback(
+        "failureguard_pipeline_write_rate_rows_per_second",
+        "Rows/s written per output sink over the last few seconds",
+        lambda: {(name,): s.write_rate() for name, s in sinks.items()},
+        labelnames=["sink"]
+    )
+    start_http_server(port)
+    print(f"📈 Metrics on http://0.0.0.0:{port}/metrics")
+
+def score_stream(sensor_stream):
+    """
+    Scored readings: health, anomaly and alert from the fixed limits, and
+    the deviation against the machine's own EWMA baseline.
+    """
+    # Per-machine EWMA baselines, updated in timestamp order. Each group
+    # holds its latest batch of scored readings; flattened and turned into
+    # a stream of upserts, those are every reading once, as it arrived.
+    # A retracted reading (rewritten CSV) has already been scored and
+    # written out, so only the reducer sees it.
+    batches = sensor_stream.groupby(pw.this.machine_id).reduce(
+        machine_id = pw.this.machine_id,
+        readings   = pw.reducers.udf_reducer(BaselineAccumulator)(
+            pw.this.timestamp,
+            pw.this.temperature,
+            pw.this.vibration,
+            pw.this.pressure
+        )
+    )
+    readings = batches.flatten(pw.this.readings).to_stream().filter(pw.this.is_upsert)
+    # The same position in the next batch is the same flattened row: key by batch too
+    readings = readings.with_id_from(pw.this.id, pw.this.readings[5]).select(
+        machine_id      = pw.this.machine_id,
+        timestamp       = pw.declare_type(str, pw.this.readings[0]),
+        temperature     = pw.declare_type(float, pw.this.readings[1]),
+        vibration       = pw.declare_type(float, pw.this.readings[2]),
+        pressure        = pw.declare_type(float, pw.this.readings[3]),
+        deviation_score = pw.declare_type(float | None, pw.this.readings[4])
     )
 
-def build_alert(machine_id, temperature, vibration, pressure):
-    issues = []
-    if temperature > 80:
-        issues.append(f"High temp ({temperature}°C)")
-    if vibration > 3.0:
-        issues.append(f"High vibration ({vibration} mm/s)")
-    if pressure < 3.0:
-        issues.append(f"Low pressure ({pressure} bar)")
-    return f"ALERT: {machine_id} — " + ", ".join(issues) if issues else ""
+    # One fused UDF call per row
+    scored = readings.select(
+        *pw.this,
+        scores = pw.apply(
+            score_reading,
+            pw.this.machine_id,
+            pw.this.temperature,
+            pw.this.vibration,
+            pw.this.pressure
+        )
+    )
+
+    return scored.select(
+        machine_id    = pw.this.machine_id,
+        timestamp     = pw.this.timestamp,
+        temperature   = pw.this.temperature,
+        vibration     = pw.this.vibration,
+        pressure      = pw.this.pressure,
+        health_score  = pw.this.scores[0],
+        is_anomaly    = pw.this.scores[1],
+        alert_message = pw.this.scores[2],
+        # Largest |z| against the machine's own EWMA baseline (None in warm-up)
+        deviation_score = pw.this.deviation_score
+    )
 
 def run():
     os.makedirs("data", exist_ok=True)
@@ -41,43 +399,112 @@ def run():
     print("✅ Pathway pipeline starting...")
     print("👀 Watching data/sensor_readings.csv")
 
+    # Opt-in (PATHWAY_PERSISTENCE_DIR): replay the persisted input without
+    # emitting its output again
+    persistence, resuming = persistence_config("sensor_pipeline")
+    if resuming:
+        print("♻️  Resuming from persisted state")
+
     sensor_stream = pw.io.csv.read(
         "data/sensor_readings.csv",
         schema=SensorSchema,
-        mode="streaming"
+        mode="streaming",
+        name="sensor_readings"
     )
 
-    processed = sensor_stream.select(
-        machine_id    = pw.this.machine_id,
-        timestamp     = pw.this.timestamp,
-        temperature   = pw.this.temperature,
-        vibration     = pw.this.vibration,
-        pressure      = pw.this.pressure,
-        health_score  = pw.apply(
-            compute_health_score,
-            pw.this.temperature,
-            pw.this.vibration,
-            pw.this.pressure
-        ),
-        is_anomaly    = pw.apply(
-            check_anomaly,
+    # Same stream, fed over HTTP instead of the CSV file
+    if INGEST_ADDR:
+        ingest = IngestSubject(INGEST_ADDR)
+        ingested = pw.io.python.read(
+            ingest,
+            schema=SensorSchema,
+            autocommit_duration_ms=100,
+            max_backlog_size=INGEST_MAX_BACKLOG,
+            name="sensor_ingest"
+        )
+        sensor_stream = sensor_stream.concat_reindex(ingested)
+        if PIPELINE_METRICS_PORT:
+            Callback(
+                "failureguard_pipeline_ingested_rows_total",
+                "Readings received from the backend's /ingest",
+                lambda: ingest.rows,
+                kind="counter"
+            )
+
+    processed = score_stream(sensor_stream)
+
+    write_jsonl(processed, "data/processed_readings.jsonl", key="machine_id", append=resuming)
+    if PIPELINE_METRICS_PORT:
+        SinkMetrics("processed_readings").subscribe(processed)
+
+    if STATE_DB:
+        state_db = SqliteWriter(STATE_DB, resume=resuming)
+        pw.io.subscribe(processed, on_change=state_db.on_change, on_time_end=state_db.on_time_end)
+
+    if EPISODES_DB:
+        episodes = EpisodeWriter(EPISODES_DB, EPISODE_CLEAR_SECONDS, EPISODE_MIN_SECONDS, resume=resuming)
+        pw.io.subscribe(processed, on_change=episodes.on_change, on_time_end=episodes.on_time_end)
+        if PIPELINE_METRICS_PORT:
+            Callback(
+                "failureguard_pipeline_alert_episode_writes_total",
+                "Alert episode rows written (opened, escalated or closed)",
+                lambda: episodes.writes,
+                kind="counter"
+            )
+
+    # Fleet → site → line and machine type aggregates, O(depth) per reading
+    rollups = RollupWriter(
+        "data/fleet_rollups.jsonl", MACHINE_METADATA,
+        processed_path="data/processed_readings.jsonl", resume=resuming
+    )
+    pw.io.subscribe(processed, on_change=rollups.on_change, on_time_end=rollups.on_time_end)
+
+    if HISTORY_DIR:
+        history = HistoryWriter(HISTORY_DIR, resume=resuming)
+        pw.io.subscribe(processed, on_change=history.on_change, on_time_end=lambda time: history.flush())
+
+    # Rolling per-machine features, one upserted row per machine
+    features = sensor_stream.groupby(pw.this.machine_id).reduce(
+        machine_id = pw.this.machine_id,
+        features   = pw.reducers.udf_reducer(FeatureAccumulator)(
+            pw.this.timestamp,
             pw.this.temperature,
             pw.this.vibration,
             pw.this.pressure
-        ),
-        alert_message = pw.apply(
-            build_alert,
-            pw.this.machine_id,
+        )
+    ).select(
+        machine_id = pw.this.machine_id,
+        timestamp  = pw.this.features["window_end"].as_str(),
+        features   = pw.this.features
+    )
+
+    write_jsonl(features, "data/machine_features.jsonl", key="machine_id", append=resuming)
+    if PIPELINE_METRICS_PORT:
+        SinkMetrics("machine_features").subscribe(features)
+
+    # Trend of every signal and the health score, extrapolated to the
+    # manual's limits, one upserted row per machine
+    forecasts = sensor_stream.groupby(pw.this.machine_id).reduce(
+        machine_id = pw.this.machine_id,
+        forecast   = pw.reducers.udf_reducer(ForecastAccumulator)(
+            pw.this.timestamp,
             pw.this.temperature,
             pw.this.vibration,
             pw.this.pressure
         )
+    ).select(
+        machine_id = pw.this.machine_id,
+        timestamp  = pw.this.forecast["timestamp"].as_str(),
+        forecast   = pw.this.forecast
     )
 
-    pw.io.jsonlines.write(processed, "data/processed_readings.jsonl")
+    write_jsonl(forecasts, "data/machine_forecast.jsonl", key="machine_id", append=resuming)
+    if PIPELINE_METRICS_PORT:
+        SinkMetrics("machine_forecast").subscribe(forecasts)
+        start_metrics(int(PIPELINE_METRICS_PORT))
 
     print("🚀 Pipeline running — processing live data")
-    pw.run()
+    pw.run(persistence_config=persistence)
 
 if __name__ == "__main__":
     run()
\ No newline at end of file
@@ -2,6 +2,9 @@ import pathway as pw
 import json
 import os
 
+from compaction import write_jsonl
+from persistence import persistence_config
+
 print("✅ Pathway Document Watcher Starting...")
 print("👀 Watching documents/ folder for live changes...")
 
@@ -11,6 +14,7 @@ class DocSchema(pw.Schema):
 
 def run():
     os.makedirs("data", exist_ok=True)
+    persistence, resuming = persistence_config("rag_server")
 
     # Pathway watches documents folder in streaming mode
     # When any file changes, Pathway reacts automatically
@@ -18,7 +22,8 @@ def run():
         "documents/",
         format="binary",
         mode="streaming",
-        with_metadata=True
+        with_metadata=True,
+        name="documents"
     )
 
     # Extract text and filename from each document
@@ -31,14 +36,17 @@ def run():
     )
 
     # Write to JSONL so backend can read it
-    pw.io.jsonlines.write(
+    write_jsonl(
         processed,
-        "data/documents_index.jsonl"
+        "data/documents_index.jsonl",
+        key="path",
+        mode="diff",
+        append=resuming
     )
 
     print("🚀 Document watcher running!")
     print("📝 Any changes to documents/ will be detected instantly")
-    pw.run()
+    pw.run(persistence_config=persistence)
 
 if __name__ == "__main__":
     run()
\ No newline at end of file
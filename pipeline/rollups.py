@@ -0,0 +1,243 @@
+"""
+Fleet rollups: health aggregates per site, production line and machine
+type, kept up to date as readings arrive.
+
+Machines are placed by a metadata file (MACHINE_METADATA, CSV with
+machine_id,site,line,machine_type); machines it does not list fall
+under "unassigned". Every group holds its machines' latest reading only:
+counts per health band, anomalies, mean and min health. A reading takes
+the machine's previous contribution out of the groups on its path
+(fleet, site, line, machine type) and puts the new one in, so it costs
+O(depth) however large the fleet is.
+
+Changed groups are written to data/fleet_rollups.jsonl, one upserted row
+per group, which the backend serves as /summary?group_by=.
+"""
+import csv
+import os
+
+from compaction import RotatingJsonlSink, apply_latest, read_jsonl, snapshot_path_for
+
+MACHINE_METADATA_PATH = "data/machine_metadata.csv"
+UNASSIGNED = "unassigned"
+
+# Levels a reading updates, from the top down
+LEVELS = ("fleet", "site", "line", "machine_type")
+
+# Same bands as the backend's get_health_status
+BANDS = ("healthy", "warning", "critical", "danger")
+
+
+def health_band(tenths):
+    """Index into BANDS of a health score given in tenths of a point."""
+    if tenths >= 800:
+        return 0
+    if tenths >= 600:
+        return 1
+    if tenths >= 400:
+        return 2
+    return 3
+
+
+def load_metadata(path=MACHINE_METADATA_PATH):
+    """machine_id -> (site, line, machine_type); empty when the file is missing."""
+    metadata = {}
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                machine_id = (row.get("machine_id") or "").strip()
+                if machine_id:
+                    metadata[machine_id] = (
+                        (row.get("site") or "").strip() or UNASSIGNED,
+                        (row.get("line") or "").strip() or UNASSIGNED,
+                        (row.get("machine_type") or "").strip() or UNASSIGNED,
+                    )
+    except OSError:
+        pass
+    return metadata
+
+
+class GroupStats:
+    """
+    Aggregates of one group. Health is kept in integer tenths, so adding
+    and removing readings never drifts; the minimum comes from a count
+    per distinct score (at most 1001 of them) and is only recomputed when
+    the last machine at the minimum leaves.
+    """
+
+    __slots__ = ("level", "name", "site", "machines", "bands", "anomalies",
+                 "health_sum", "health_counts", "_min", "timestamp")
+
+    def __init__(self, level, name, site=None):
+        self.level = level
+        self.name = name
+        self.site = site
+        self.machines = 0
+        self.bands = [0] * len(BANDS)
+        self.anomalies = 0
+        self.health_sum = 0
+        self.health_counts = {}
+        self._min = None
+        self.timestamp = ""
+
+    def add(self, tenths, band, anomaly, timestamp):
+        self.machines += 1
+        self.bands[band] += 1
+        self.anomalies += anomaly
+        self.health_sum += tenths
+        self.health_counts[tenths] = self.health_counts.get(tenths, 0) + 1
+        if self._min is not None and tenths < self._min:
+            self._min = tenths
+        if timestamp > self.timestamp:
+            self.timestamp = timestamp
+
+    def remove(self, tenths, band, anomaly):
+        self.machines -= 1
+        self.bands[band] -= 1
+        self.anomalies -= anomaly
+        self.health_sum -= tenths
+        count = self.health_counts[tenths] - 1
+        if count:
+            self.health_counts[tenths] = count
+        else:
+            del self.health_counts[tenths]
+            if tenths == self._min:
+                self._min = None
+
+    def min_tenths(self):
+        if self._min is None and self.health_counts:
+            self._min = min(self.health_counts)
+        return self._min
+
+    def row(self, key):
+        minimum = self.min_tenths()
+        row = {"group": key, "level": self.level, "name": self.name}
+        if self.site is not None:
+            row["site"] = self.site
+        row.update({
+            "machines": self.machines,
+            **dict(zip(BANDS, self.bands)),
+            "anomalies": self.anomalies,
+            "mean_health": round(self.health_sum / self.machines / 10, 1) if self.machines else None,
+            "min_health": minimum / 10 if minimum is not None else None,
+            "timestamp": self.timestamp,
+        })
+        return row
+
+
+class FleetRollup:
+    """Groups by level plus each machine's current contribution to them."""
+
+    def __init__(self, metadata=None):
+        self.metadata = metadata or {}
+        self.groups = {}
+        # machine_id -> (group keys, health tenths, band, anomaly, timestamp)
+        self.machines = {}
+
+    def _keys(self, machine_id):
+        site, line, machine_type = self.metadata.get(machine_id, (UNASSIGNED, UNASSIGNED, UNASSIGNED))
+        keys = ("fleet", f"site:{site}", f"line:{site}/{line}", f"machine_type:{machine_type}")
+        if keys[-1] not in self.groups:
+            self.groups[keys[-1]] = GroupStats("machine_type", machine_type)
+        for key, level, name in zip(keys[:3], LEVELS, (None, site, line)):
+            if key not in self.groups:
+                self.groups[key] = GroupStats(level, name or "fleet", site if level == "line" else None)
+        return keys
+
+    def update(self, machine_id, health_score, is_anomaly, timestamp):
+        """
+        Applies a machine's reading unless it is older than the one already
+        counted. Returns the keys of the groups that changed.
+        """
+        current = self.machines.get(machine_id)
+        if current is not None:
+            if timestamp < current[4]:
+                return ()
+            for key in current[0]:
+                self.groups[key].remove(*current[1:4])
+            keys = current[0]
+        else:
+            keys = self._keys(machine_id)
+        tenths = int(round(health_score * 10))
+        band = health_band(tenths)
+        anomaly = int(bool(is_anomaly))
+        for key in keys:
+            self.groups[key].add(tenths, band, anomaly, timestamp)
+        self.machines[machine_id] = (keys, tenths, band, anomaly, timestamp)
+        return keys
+
+    def set_metadata(self, metadata):
+        """
+        Switches to new metadata, moving the machines whose site, line or
+        type changed; the map replaces the old one, so machines it leaves
+        out move to "unassigned". Returns the keys of the groups that changed.
+        """
+        self.metadata = metadata
+        changed = set()
+        for machine_id, (keys, tenths, band, anomaly, timestamp) in list(self.machines.items()):
+            new_keys = self._keys(machine_id)
+            if new_keys == keys:
+                continue
+            # Groups on both paths (the fleet at least) keep the machine
+            left = [key for key in keys if key not in new_keys]
+            joined = [key for key in new_keys if key not in keys]
+            for key in left:
+                self.groups[key].remove(tenths, band, anomaly)
+            for key in joined:
+                self.groups[key].add(tenths, band, anomaly, timestamp)
+            self.machines[machine_id] = (new_keys, tenths, band, anomaly, timestamp)
+            changed.update(left, joined)
+        return changed
+
+    def rows(self, keys):
+        return [self.groups[key].row(key) for key in keys]
+
+
+class RollupWriter:
+    """
+    pw.io.subscribe sink over processed readings that keeps a FleetRollup
+    and writes the groups changed by each Pathway batch as JSONL rows
+    (same format as the other sinks, keyed on "group"). The metadata file
+    is re-read when it changes. When `resume` is set, the rollup is
+    seeded from the latest readings already in `processed_path`.
+    """
+
+    def __init__(self, path, metadata_path=MACHINE_METADATA_PATH, processed_path=None, resume=False):
+        self.metadata_path = metadata_path
+        self._metadata_mtime = self._mtime()
+        self.rollup = FleetRollup(load_metadata(metadata_path))
+        self.sink = RotatingJsonlSink(path, "group", append=resume)
+        self._buffer = []
+        if resume and processed_path:
+            latest = {}
+            for source in (snapshot_path_for(processed_path), processed_path):
+                for row in read_jsonl(source):
+                    apply_latest(latest, "machine_id", row)
+            for row in latest.values():
+                self.rollup.update(row["machine_id"], row["health_score"], row["is_anomaly"], row["timestamp"])
+
+    def _mtime(self):
+        try:
+            return os.stat(self.metadata_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def on_change(self, key, row, time, is_addition):
+        if is_addition:
+            self._buffer.append(row)
+
+    def on_time_end(self, time):
+        changed = set()
+        mtime = self._mtime()
+        if mtime != self._metadata_mtime:
+            self._metadata_mtime = mtime
+            changed.update(self.rollup.set_metadata(load_metadata(self.metadata_path)))
+
+        rows, self._buffer = self._buffer, []
+        for row in rows:
+            changed.update(self.rollup.update(
+                row["machine_id"], row["health_score"], row["is_anomaly"], row["timestamp"]
+            ))
+        for record in self.rollup.rows(sorted(changed)):
+            self.sink.on_change(None, record, time, True)
+        self.sink.on_time_end(time)
@@ -0,0 +1,103 @@
+import numpy as np
+
+# ── Thresholds (documents/pump_manual.txt warning levels) ──
+TEMPERATURE_LIMIT = 80.0
+VIBRATION_LIMIT   = 3.0
+PRESSURE_LIMIT    = 3.0
+
+
+def compute_health_score(temperature, vibration, pressure):
+    score = 100.0
+    if temperature > 80:
+        score -= (temperature - 80) * 2.5
+    if vibration > 3.0:
+        score -= (vibration - 3.0) * 15
+    if pressure < 3.0:
+        score -= (3.0 - pressure) * 8
+    return max(0.0, min(100.0, round(score, 1)))
+
+def check_anomaly(temperature, vibration, pressure):
+    return bool(
+        temperature > 80.0 or
+        vibration   > 3.0  or
+        pressure    < 3.0
+    )
+
+def build_alert(machine_id, temperature, vibration, pressure):
+    issues = []
+    if temperature > 80:
+        issues.append(f"High temp ({temperature}°C)")
+    if vibration > 3.0:
+        issues.append(f"High vibration ({vibration} mm/s)")
+    if pressure < 3.0:
+        issues.append(f"Low pressure ({pressure} bar)")
+    return f"ALERT: {machine_id} — " + ", ".join(issues) if issues else ""
+
+
+def score_reading(machine_id, temperature, vibration, pressure) -> tuple[float, bool, str]:
+    """
+    compute_health_score, check_anomaly and build_alert in one pass:
+    each threshold is compared once. Returns (health_score, is_anomaly, alert_message).
+    """
+    score = 100.0
+    issues = []
+    if temperature > TEMPERATURE_LIMIT:
+        score -= (temperature - TEMPERATURE_LIMIT) * 2.5
+        issues.append(f"High temp ({temperature}°C)")
+    if vibration > VIBRATION_LIMIT:
+        score -= (vibration - VIBRATION_LIMIT) * 15
+        issues.append(f"High vibration ({vibration} mm/s)")
+    if pressure < PRESSURE_LIMIT:
+        score -= (PRESSURE_LIMIT - pressure) * 8
+        issues.append(f"Low pressure ({pressure} bar)")
+
+    if not issues:
+        return 100.0, False, ""
+    health_score = max(0.0, min(100.0, round(score, 1)))
+    return health_score, True, f"ALERT: {machine_id} — " + ", ".join(issues)
+
+
+def score_batch(machine_ids, temperature, vibration, pressure):
+    """
+    Vectorized score_reading for backfill and bulk paths.
+    Returns (health_score, is_anomaly, alert_message) arrays with the same
+    values as the per-row functions: the threshold masks and penalties are
+    computed with NumPy, and only anomalous rows (the only ones whose score
+    is not exactly 100) go through Python's round() and string formatting.
+    """
+    temperature = np.asarray(temperature, dtype=np.float64)
+    vibration = np.asarray(vibration, dtype=np.float64)
+    pressure = np.asarray(pressure, dtype=np.float64)
+
+    hot = temperature > TEMPERATURE_LIMIT
+    shaky = vibration > VIBRATION_LIMIT
+    low = pressure < PRESSURE_LIMIT
+    is_anomaly = hot | shaky | low
+
+    # Same subtraction order as score_reading, so float results are identical
+    score = 100.0 - np.where(hot, (temperature - TEMPERATURE_LIMIT) * 2.5, 0.0)
+    score = score - np.where(shaky, (vibration - VIBRATION_LIMIT) * 15, 0.0)
+    score = score - np.where(low, (PRESSURE_LIMIT - pressure) * 8, 0.0)
+
+    health_score = np.full(len(temperature), 100.0)
+    alert_message = np.full(len(temperature), "", dtype=object)
+
+    idx = np.flatnonzero(is_anomaly)
+    health_score[idx] = [max(0.0, min(100.0, round(x, 1))) for x in score[idx].tolist()]
+
+    messages = []
+    for i, h, s, l, t, v, p in zip(
+        idx.tolist(), hot[idx].tolist(), shaky[idx].tolist(), low[idx].tolist(),
+        temperature[idx].tolist(), vibration[idx].tolist(), pressure[idx].tolist()
+    ):
+        issues = []
+        if h:
+            issues.append(f"High temp ({t}°C)")
+        if s:
+            issues.append(f"High vibration ({v} mm/s)")
+        if l:
+            issues.append(f"Low pressure ({p} bar)")
+        messages.append(f"ALERT: {machine_ids[i]} — " + ", ".join(issues))
+    alert_message[idx] = messages
+
+    return health_score, is_anomaly, alert_message
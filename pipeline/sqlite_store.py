@@ -0,0 +1,307 @@
+"""
+SQLite (WAL) interchange between the sensor pipeline and the backend.
+
+The pipeline is the only writer: every Pathway batch is one transaction
+that upserts the latest reading per machine and appends the readings to
+the history table. Any number of backend workers read the same file
+concurrently over read-only connections; WAL lets them read while the
+pipeline writes.
+
+    latest_readings  one row per machine (newest timestamp wins), indexed
+                     on is_anomaly (alerts) and version (change feed)
+    readings         full history, indexed on (machine_id, timestamp)
+    meta             version (bumped per transaction), reset_version and
+                     epoch (new database / pipeline restart)
+"""
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+
+COLUMNS = [
+    "machine_id", "timestamp", "temperature", "vibration",
+    "pressure", "health_score", "is_anomaly", "alert_message",
+    "deviation_score",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS latest_readings (
+    machine_id    TEXT PRIMARY KEY,
+    timestamp     TEXT NOT NULL,
+    temperature   REAL,
+    vibration     REAL,
+    pressure      REAL,
+    health_score  REAL,
+    is_anomaly    INTEGER NOT NULL,
+    alert_message TEXT,
+    deviation_score REAL,
+    version       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS latest_readings_is_anomaly ON latest_readings (is_anomaly);
+CREATE INDEX IF NOT EXISTS latest_readings_version ON latest_readings (version);
+
+CREATE TABLE IF NOT EXISTS readings (
+    machine_id    TEXT NOT NULL,
+    timestamp     TEXT NOT NULL,
+    temperature   REAL,
+    vibration     REAL,
+    pressure      REAL,
+    health_score  REAL,
+    is_anomaly    INTEGER NOT NULL,
+    alert_message TEXT,
+    deviation_score REAL
+);
+CREATE INDEX IF NOT EXISTS readings_machine_timestamp ON readings (machine_id, timestamp);
+CREATE INDEX IF NOT EXISTS readings_is_anomaly ON readings (is_anomaly);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+UPSERT_LATEST = f"""
+INSERT INTO latest_readings ({", ".join(COLUMNS)}, version)
+VALUES ({", ".join("?" * len(COLUMNS))}, ?)
+ON CONFLICT (machine_id) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in COLUMNS[1:])},
+    version = excluded.version
+WHERE excluded.timestamp >= latest_readings.timestamp
+"""
+
+INSERT_HISTORY = f"INSERT INTO readings ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+def connect_writer(path, schema):
+    """Writer connection in WAL mode (readers never block it), with `schema` applied."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(schema)
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _row(values):
+    row = dict(zip(COLUMNS, values))
+    row["is_anomaly"] = bool(row["is_anomaly"])
+    return row
+
+
+class SqliteWriter:
+    """
+    pw.io.subscribe sink. Rows are buffered in on_change and written in
+    one transaction per Pathway batch in on_time_end. Like the JSONL sinks
+    it starts from empty state, since a restarted pipeline replays its
+    input, unless `resume` is set (the pipeline resumes from persisted
+    state and only emits new rows).
+    """
+
+    def __init__(self, path, resume=False):
+        self.conn = connect_writer(path, SCHEMA)
+        self._buffer = []
+
+        # Databases written before readings carried a deviation_score
+        for table in ("latest_readings", "readings"):
+            existing = {r[1] for r in self.conn.execute(f"PRAGMA table_info({table})")}
+            if "deviation_score" not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN deviation_score REAL")
+
+        with transaction(self.conn):
+            version = self._meta("version", 0) + 1
+            if not resume:
+                self.conn.execute("DELETE FROM latest_readings")
+                self.conn.execute("DELETE FROM readings")
+                self._set_meta("reset_version", version)
+            self._set_meta("version", version)
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'epoch'").fetchone() is None:
+                self._set_meta("epoch", uuid.uuid4().hex[:8])
+        self.version = version
+
+    def _meta(self, key, default):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+
+    def on_change(self, key, row, time, is_addition):
+        # Processed readings are append-only, retractions carry nothing new
+        if is_addition:
+            self._buffer.append(tuple(
+                int(row[c]) if c == "is_anomaly" else row[c] for c in COLUMNS
+            ))
+
+    def on_time_end(self, time):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        # Pathway does not keep input order within a batch: oldest first,
+        # so the newest reading per machine is the one left in latest_readings
+        rows.sort(key=lambda r: r[1])
+        with transaction(self.conn):
+            self.version += 1
+            self.conn.executemany(UPSERT_LATEST, [r + (self.version,) for r in rows])
+            self.conn.executemany(INSERT_HISTORY, rows)
+            self._set_meta("version", self.version)
+
+
+class SqliteReader:
+    """
+    Pool of read-only connections to a database written by the pipeline.
+    Every worker process gets its own pool over the shared file.
+    """
+
+    def __init__(self, path, pool_size=4):
+        self.path = path
+        self._pool = queue.LifoQueue()
+        self._pool_size = pool_size
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self._pool_size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _query(self, sql, params=()):
+        """Rows of `sql`, or None while the pipeline has not created the database yet."""
+        try:
+            with self.connection() as conn:
+                return conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError:
+            return None
+
+
+class SqliteStateStore(SqliteReader):
+    """
+    Backend view of the database, with the same interface as
+    LatestStateCache (snapshot, readings, changes_since) plus indexed
+    queries for alerts and history.
+    """
+
+    def __init__(self, path, pool_size=4):
+        super().__init__(path, pool_size)
+        self.bytes_parsed = 0
+
+    def _meta(self):
+        rows = self._query("SELECT key, value FROM meta")
+        return dict(rows) if rows else {}
+
+    @property
+    def epoch(self):
+        return self._meta().get("epoch")
+
+    def refresh(self):
+        return int(self._meta().get("version", 0))
+
+    def snapshot(self):
+        """Returns (version, readings) read in one transaction."""
+        try:
+            with self.connection() as conn:
+                conn.execute("BEGIN")
+                try:
+                    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                    rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM latest_readings").fetchall()
+                finally:
+                    conn.execute("COMMIT")
+        except sqlite3.OperationalError:
+            return 0, {}
+        return int(row[0]) if row else 0, {r[0]: _row(r) for r in rows}
+
+    def readings(self):
+        return self.snapshot()[1]
+
+    def anomalous(self):
+        """Latest readings of the machines in alert, via the is_anomaly index."""
+        rows = self._query(f"SELECT {', '.join(COLUMNS)} FROM latest_readings WHERE is_anomaly = 1") or []
+        return {r[0]: _row(r) for r in rows}
+
+    def changes_since(self, version):
+        """Same contract as LatestStateCache.changes_since, via the version index."""
+        meta = self._meta()
+        current = int(meta.get("version", 0))
+        if version is None or version < int(meta.get("reset_version", 0)) or version > current:
+            return current, self.readings(), True
+        rows = self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM latest_readings WHERE version > ?", (version,)
+        ) or []
+        return current, {r[0]: _row(r) for r in rows}, False
+
+    def history(self, machine_id, start=None, end=None, limit=10_000):
+        """
+        Same response as HistoryStore.query, from the (machine_id, timestamp)
+        index: readings with start <= timestamp <= end, evenly downsampled
+        to at most `limit` points.
+        """
+        where = "machine_id = ?"
+        params = [machine_id]
+        if start:
+            where += " AND timestamp >= ?"
+            params.append(start)
+        if end:
+            where += " AND timestamp <= ?"
+            params.append(end)
+
+        count = (self._query(f"SELECT COUNT(*) FROM readings WHERE {where}", params) or [(0,)])[0][0]
+        step = max(1, -(-count // limit)) if limit else 1
+        rows = self._query(
+            f"""SELECT {", ".join(COLUMNS)} FROM (
+                    SELECT *, ROW_NUMBER() OVER (ORDER BY timestamp) - 1 AS n
+                    FROM readings WHERE {where}
+                ) WHERE n % ? = 0 ORDER BY timestamp""",
+            params + [step]
+        ) or []
+
+        # Same points as the columnar history: the signals, health and anomaly flag
+        signals = COLUMNS[1:7]
+        points = {c: [] for c in signals}
+        for r in rows:
+            for c, value in zip(signals, r[1:7]):
+                points[c].append(value)
+        points["is_anomaly"] = [bool(x) for x in points["is_anomaly"]]
+        return {
+            "machine_id": machine_id,
+            "count": count,
+            "returned": len(rows),
+            "points": points,
+        }
@@ -1,3 +1,4 @@
+import argparse
 import csv
 import time
 import random
@@ -5,17 +6,48 @@ import os
 from datetime import datetime
 
 MACHINES = ["PUMP_A", "PUMP_B", "MOTOR_C", "COMPRESSOR_D"]
+FIELDNAMES = ["machine_id", "timestamp", "temperature", "vibration", "pressure"]
 
-def generate_reading(machine_id, tick):
-    if machine_id == "PUMP_A" and tick > 10:
-        temperature = round(random.uniform(82, 95), 2)
-        vibration   = round(random.uniform(3.2, 4.8), 3)
-        pressure    = round(random.uniform(2.0, 3.0), 2)
-    else:
-        temperature = round(random.uniform(62, 74), 2)
-        vibration   = round(random.uniform(1.0, 2.4), 3)
-        pressure    = round(random.uniform(3.6, 4.8), 2)
+# ── Value ranges: (low, high, decimals) per signal ──
+NORMAL_PROFILE = {
+    "temperature": (62, 74, 2),
+    "vibration":   (1.0, 2.4, 3),
+    "pressure":    (3.6, 4.8, 2),
+}
+
+# Fault profiles override the normal range of some signals once active
+FAULT_PROFILES = {
+    "overheat": {
+        "temperature": (82, 95, 2),
+        "vibration":   (3.2, 4.8, 3),
+        "pressure":    (2.0, 3.0, 2),
+    },
+    "bearing": {
+        "vibration":   (3.2, 4.8, 3),
+    },
+    "leak": {
+        "pressure":    (2.0, 2.9, 2),
+    },
+}
+
+# Faults start after this many ticks (one tick = one reading per machine)
+DEFAULT_FAULT_AFTER = 10
+
+# The demo's faulty machine, also the load generator's default
+DEMO_FAULTS = {"PUMP_A": "overheat"}
 
+
+def signal_ranges(profile=None):
+    """Temperature, vibration and pressure ranges under a fault profile (None = normal)."""
+    ranges = {**NORMAL_PROFILE, **FAULT_PROFILES[profile]} if profile else NORMAL_PROFILE
+    return [ranges[signal] for signal in ("temperature", "vibration", "pressure")]
+
+
+def generate_reading(machine_id, tick, faults=DEMO_FAULTS, fault_after=DEFAULT_FAULT_AFTER):
+    profile = faults.get(machine_id) if tick > fault_after else None
+    temperature, vibration, pressure = (
+        round(random.uniform(low, high), decimals) for low, high, decimals in signal_ranges(profile)
+    )
     return {
         "machine_id":  machine_id,
         "timestamp":   datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -24,16 +56,156 @@ def generate_reading(machine_id, tick):
         "pressure":    pressure,
     }
 
-def main():
+
+def machine_ids(count):
+    """The demo machines first, then MACHINE_00004, MACHINE_00005, ..."""
+    return MACHINES[:count] + [f"MACHINE_{i:05d}" for i in range(len(MACHINES), count)]
+
+
+def fault_spec(value):
+    """argparse type for --fault: a known profile, and a fraction between 0 and 1."""
+    if "=" in value:
+        machine, profile = value.split("=", 1)
+        if not machine:
+            raise argparse.ArgumentTypeError(f"missing machine id in {value!r}")
+    else:
+        profile, _, fraction = value.partition(":")
+        try:
+            share = float(fraction or 1)
+        except ValueError:
+            share = None
+        if share is None or not 0 <= share <= 1:
+            raise argparse.ArgumentTypeError(f"fraction must be a number between 0 and 1, got {fraction!r}")
+    if profile not in FAULT_PROFILES:
+        raise argparse.ArgumentTypeError(f"unknown fault profile {profile!r} (choose from {', '.join(FAULT_PROFILES)})")
+    return value
+
+
+def assign_faults(machines, specs, rng):
+    """
+    Maps machine_id -> fault profile. Each spec is either
+    MACHINE_ID=PROFILE (one machine) or PROFILE:FRACTION (a seeded random
+    share of the fleet, e.g. overheat:0.01).
+    """
+    faults = {}
+    for spec in specs:
+        if "=" in spec:
+            machine, profile = spec.split("=", 1)
+            targets = [machine] if machine in machines else []
+        else:
+            profile, _, fraction = spec.partition(":")
+            share = float(fraction or 1)
+            targets = rng.sample(machines, round(len(machines) * share))
+        if profile not in FAULT_PROFILES:
+            raise ValueError(f"Unknown fault profile: {profile} (choose from {', '.join(FAULT_PROFILES)})")
+        for machine in targets:
+            faults[machine] = profile
+    return faults
+
+
+class FleetGenerator:
+    """
+    Deterministic readings for a fleet: the same seed, machine count and
+    fault specs always produce the same values in the same order. Rows are
+    produced tick by tick (every machine once per tick) and formatted
+    straight into CSV lines, so batches can be written with one call.
+    """
+
+    def __init__(self, machines, faults=None, fault_after=DEFAULT_FAULT_AFTER, seed=None):
+        self.machines = machines
+        self.fault_after = fault_after
+        self.rng = random.Random(seed)
+        self.tick = 0
+        self._next = 0
+        faults = faults or {}
+        # Ranges per machine: normal, and the fault ranges once the fault is active
+        self._normal = signal_ranges()
+        self._faulty = {machine: signal_ranges(profile) for machine, profile in faults.items()}
+
+    def lines(self, count, timestamp):
+        """The next `count` readings as CSV lines, all stamped `timestamp`."""
+        rng = self.rng.random
+        machines = self.machines
+        out = []
+        for _ in range(count):
+            machine = machines[self._next]
+            ranges = self._normal
+            if self.tick > self.fault_after:
+                ranges = self._faulty.get(machine, ranges)
+            values = [
+                f"{low + (high - low) * rng():.{decimals}f}"
+                for low, high, decimals in ranges
+            ]
+            out.append(f"{machine},{timestamp},{values[0]},{values[1]},{values[2]}\n")
+            self._next += 1
+            if self._next == len(machines):
+                self._next = 0
+                self.tick += 1
+        return out
+
+
+def run_load(args):
+    """
+    Writes readings at a target rate with buffered, batched appends and
+    reports the rate actually achieved. Row n is due at start + n / rate;
+    the generator sleeps only when it is ahead of that schedule, so short
+    stalls are caught up instead of lowering the average rate.
+    """
+    rng = random.Random(args.seed)
+    machines = machine_ids(args.machines)
+    fault_specs = args.fault or [f"{m}={profile}" for m, profile in DEMO_FAULTS.items() if m in machines]
+    faults = assign_faults(machines, fault_specs, rng)
+    generator = FleetGenerator(machines, faults, args.fault_after, seed=args.seed)
+
+    rate = args.rate or len(machines) / 2
+    batch_size = args.batch_size or max(1, min(len(machines), int(rate / 20) or 1))
+    max_rows = args.rows or (int(args.duration * rate) if args.duration else None)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    print(f"✅ Load generator: {len(machines)} machines, target {rate:,.0f} rows/s, "
+          f"batch {batch_size}, seed {args.seed}, {len(faults)} faulty machines")
+
+    written = 0
+    start = time.perf_counter()
+    last_report, last_written = start, 0
+    with open(args.output, "w", buffering=1 << 20) as f:
+        f.write(",".join(FIELDNAMES) + "\n")
+        f.flush()
+        try:
+            while max_rows is None or written < max_rows:
+                count = batch_size if max_rows is None else min(batch_size, max_rows - written)
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                f.writelines(generator.lines(count, timestamp))
+                f.flush()
+                written += count
+
+                now = time.perf_counter()
+                if now - last_report >= args.report_every:
+                    print(f"  {written:>12,} rows | {(written - last_written) / (now - last_report):>10,.0f} rows/s")
+                    last_report, last_written = now, written
+
+                ahead = start + written / rate - now
+                if ahead > 0:
+                    time.sleep(ahead)
+        except KeyboardInterrupt:
+            pass
+
+    elapsed = time.perf_counter() - start
+    achieved = written / elapsed if elapsed else 0.0
+    print(f"✅ Wrote {written:,} rows in {elapsed:.2f} s: {achieved:,.0f} rows/s "
+          f"({achieved / rate:.0%} of target {rate:,.0f})")
+    return written, elapsed
+
+
+def main(append=False):
     os.makedirs("data", exist_ok=True)
     filepath = "data/sensor_readings.csv"
 
-    with open(filepath, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "machine_id", "timestamp",
-            "temperature", "vibration", "pressure"
-        ])
-        writer.writeheader()
+    # A running pipeline sees a truncated file as every reading retracted
+    if not (append and os.path.exists(filepath) and os.path.getsize(filepath)):
+        with open(filepath, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
 
     print("✅ Simulator started!")
     print("⏳ PUMP_A anomaly begins after ~20 seconds")
@@ -41,10 +213,7 @@ def main():
     tick = 0
     while True:
         with open(filepath, "a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                "machine_id", "timestamp",
-                "temperature", "vibration", "pressure"
-            ])
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
             for machine in MACHINES:
                 reading = generate_reading(machine, tick)
                 writer.writerow(reading)
@@ -53,5 +222,37 @@ def main():
         tick += 1
         time.sleep(2)
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Sensor simulator. Without --load it runs the 4-machine demo."
+    )
+    parser.add_argument("--load", action="store_true", help="High-rate load-generator mode")
+    parser.add_argument("--machines", type=int, default=len(MACHINES), help="Fleet size (up to 100000)")
+    parser.add_argument("--rate", type=float, default=None, help="Target rows/sec (default: one tick per 2 s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fault", action="append", default=None, type=fault_spec,
+                        help="MACHINE_ID=PROFILE or PROFILE:FRACTION (0 to 1), repeatable "
+                             f"(profiles: {', '.join(FAULT_PROFILES)}; default PUMP_A=overheat)")
+    parser.add_argument("--fault-after", type=int, default=DEFAULT_FAULT_AFTER, help="Ticks before faults start")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per write (default: ~20 writes/s)")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--rows", type=int, default=None, help="Stop after this many rows")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Seconds between rate reports")
+    parser.add_argument("--output", default="data/sensor_readings.csv")
+    parser.add_argument("--append", action="store_true",
+                        help="Demo mode: keep the readings already in the file and add to them")
+    args = parser.parse_args()
+    if not 1 <= args.machines <= 100_000:
+        parser.error("--machines must be between 1 and 100000")
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive")
+    return args
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.load:
+        run_load(args)
+    else:
+        main(append=args.append)
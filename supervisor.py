@@ -0,0 +1,265 @@
+"""
+Process supervisor for the services app.py starts next to the dashboard.
+
+Every service is launched as a subprocess at the same time and is ready
+once its probe passes: the backend answers HTTP, a pipeline's output file
+has been written since launch (or, for a pipeline resuming from a
+PATHWAY_PERSISTENCE_DIR snapshot, which only writes what is new, already
+holds its earlier output). A child that exits is restarted after a
+backoff that doubles with each crash in a row (reset once a child has
+stayed up for STABLE_SECONDS); the simulator is restarted appending to
+data/sensor_readings.csv, since the sensor pipeline would take a
+truncated file as every reading retracted. Startup time is reported per
+service, so a cold start takes as long as the slowest service.
+
+    python supervisor.py    # run the services without the dashboard
+"""
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+PYTHON = sys.executable
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, "pipeline"))
+from persistence import PERSISTENCE_DIR, will_resume
+
+# ── Readiness and restart policy ──
+READY_TIMEOUT   = float(os.getenv("SUPERVISOR_READY_TIMEOUT", "60"))
+BACKOFF_INITIAL = float(os.getenv("SUPERVISOR_BACKOFF_INITIAL", "1"))
+BACKOFF_MAX     = float(os.getenv("SUPERVISOR_BACKOFF_MAX", "30"))
+STABLE_SECONDS  = float(os.getenv("SUPERVISOR_STABLE_SECONDS", "60"))
+POLL_INTERVAL   = 0.1
+
+BACKEND_URL = os.getenv("SUPERVISOR_BACKEND_URL", "http://127.0.0.1:8000/")
+
+
+class HttpProbe:
+    """Ready once `url` answers with anything but a server error."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def reset(self):
+        pass
+
+    def __call__(self):
+        try:
+            with urllib.request.urlopen(self.url, timeout=1) as response:
+                return response.status < 500
+        except urllib.error.HTTPError as e:
+            return e.code < 500
+        except (OSError, ValueError):
+            return False
+
+
+class FileProbe:
+    """
+    Ready once `path` is non-empty and has changed since the launch, or
+    just non-empty when `resuming()` was true at the launch.
+    """
+
+    def __init__(self, path, resuming=lambda: False):
+        self.path = path
+        self.resuming = resuming
+        self._before = None
+        self._resuming = False
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def reset(self):
+        self._before = self._stat()
+        self._resuming = self.resuming()
+
+    def __call__(self):
+        now = self._stat()
+        return now is not None and now[0] > 0 and (self._resuming or now != self._before)
+
+
+class Service:
+    """One supervised child process and its restart bookkeeping."""
+
+    def __init__(self, name, args, probe, restart_args=None):
+        self.name = name
+        self.args = args
+        self.restart_args = restart_args or args
+        self.probe = probe
+        self.process = None
+        self.launched_at = None
+        self.ready_at = None
+        self.restart_at = None
+        self.restarts = 0
+        self.crashes_in_a_row = 0
+
+    @property
+    def startup_seconds(self):
+        if self.ready_at is None:
+            return None
+        return round(self.ready_at - self.launched_at, 2)
+
+
+class Supervisor:
+    """
+    Launches `services` in parallel and watches them from one daemon
+    thread: readiness probes until a service is up, exits and restarts
+    after that.
+    """
+
+    def __init__(self, services, cwd=BASE_DIR, backoff_initial=BACKOFF_INITIAL,
+                 backoff_max=BACKOFF_MAX, stable_seconds=STABLE_SECONDS):
+        self.services = services
+        self.cwd = cwd
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+        self.started_at = None
+        self._stopping = threading.Event()
+        self._ready = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.monotonic()
+        for service in self.services:
+            self._launch(service)
+        self._thread = threading.Thread(target=self._watch, name="supervisor", daemon=True)
+        self._thread.start()
+
+    def _launch(self, service, args=None):
+        service.probe.reset()
+        service.launched_at = time.monotonic()
+        service.ready_at = None
+        service.restart_at = None
+        service.process = subprocess.Popen(args or service.args, cwd=self.cwd)
+
+    def _watch(self):
+        while not self._stopping.wait(POLL_INTERVAL):
+            now = time.monotonic()
+            for service in self.services:
+                if service.restart_at is not None:
+                    if now >= service.restart_at:
+                        service.restarts += 1
+                        print(f"🔄 Restarting {service.name} (restart {service.restarts})")
+                        self._launch(service, service.restart_args)
+                    continue
+
+                code = service.process.poll()
+                if code is not None:
+                    self._on_exit(service, code, now)
+                elif service.ready_at is None and service.probe():
+                    with self._ready:
+                        service.ready_at = time.monotonic()
+                        print(f"✅ {service.name} ready in {service.startup_seconds} s")
+                        self._ready.notify_all()
+
+    def _on_exit(self, service, code, now):
+        if self._stopping.is_set():
+            return
+        if now - service.launched_at >= self.stable_seconds:
+            service.crashes_in_a_row = 0
+        delay = min(self.backoff_initial * 2 ** service.crashes_in_a_row, self.backoff_max)
+        service.crashes_in_a_row += 1
+        service.restart_at = now + delay
+        with self._ready:
+            service.ready_at = None
+        print(f"⚠️  {service.name} exited with code {code}, restarting in {delay:g} s")
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        """
+        Blocks until every service is ready or `timeout` runs out.
+        Returns {name: startup seconds, None if not ready}.
+        """
+        deadline = time.monotonic() + timeout
+        with self._ready:
+            self._ready.wait_for(
+                lambda: all(s.ready_at is not None for s in self.services),
+                timeout=max(0.0, deadline - time.monotonic())
+            )
+        return {s.name: s.startup_seconds for s in self.services}
+
+    def status(self):
+        return {
+            s.name: {
+                "pid": s.process.pid if s.process else None,
+                "running": s.process is not None and s.process.poll() is None,
+                "ready": s.ready_at is not None,
+                "startup_seconds": s.startup_seconds,
+                "restarts": s.restarts,
+            }
+            for s in self.services
+        }
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        # No restarts once the watcher is gone
+        if self._thread is not None:
+            self._thread.join()
+        running = [s.process for s in self.services if s.process and s.process.poll() is None]
+        for process in running:
+            process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in running:
+            try:
+                process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def default_services():
+    """The simulator, both pipelines and the backend, as app.py runs them."""
+    simulator = [PYTHON, "simulators/sensor_simulator.py"]
+    return [
+        # A pipeline resuming from persisted state expects the readings it
+        # has already seen to stay in the file
+        Service("simulator", simulator + ["--append"] if PERSISTENCE_DIR else simulator,
+                FileProbe(os.path.join(BASE_DIR, "data", "sensor_readings.csv")),
+                restart_args=simulator + ["--append"]),
+        Service("sensor pipeline", [PYTHON, "pipeline/pathway_pipeline.py"],
+                FileProbe(os.path.join(BASE_DIR, "data", "processed_readings.jsonl"),
+                          lambda: will_resume("sensor_pipeline", BASE_DIR))),
+        Service("document pipeline", [PYTHON, "pipeline/pathway_rag_server.py"],
+                FileProbe(os.path.join(BASE_DIR, "data", "documents_index.jsonl"),
+                          lambda: will_resume("rag_server", BASE_DIR))),
+        Service("backend", [PYTHON, "backend/app.py"], HttpProbe(BACKEND_URL)),
+    ]
+
+
+def report(supervisor, startup):
+    """Prints per-service startup times; returns True when all are ready."""
+    for name, seconds in startup.items():
+        print(f"   {name:<18} {'not ready' if seconds is None else f'{seconds} s'}")
+    total = round(time.monotonic() - supervisor.started_at, 2)
+    ready = all(seconds is not None for seconds in startup.values())
+    if ready:
+        print(f"✅ All services ready in {total} s")
+    else:
+        print(f"⚠️  Not all services ready after {total} s, continuing")
+    return ready
+
+
+def main():
+    # Stop the children on `kill` as well as on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    supervisor = Supervisor(default_services())
+    print("🚀 Starting background services...")
+    supervisor.start()
+    report(supervisor, supervisor.wait_ready())
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
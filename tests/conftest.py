@@ -0,0 +1,134 @@
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "pipeline"))
+sys.path.insert(0, os.path.join(REPO_DIR, "backend"))
+
+SENSOR_COLUMNS = ["machine_id", "timestamp", "temperature", "vibration", "pressure"]
+
+
+@pytest.fixture(autouse=True)
+def clear_pathway_graph():
+    """Tables built by one test must not end up in the next test's run."""
+    yield
+    if "pathway" in sys.modules:
+        from pathway.internals.parse_graph import G
+        G.clear()
+
+
+def readings(machine_id, start_second, count, temperature=70.0, vibration=1.5, pressure=4.0, step=1.0):
+    """`count` readings one second apart, signals rising by `step` per reading."""
+    return [
+        (machine_id, f"2026-01-01 00:{(start_second + i) // 60:02d}:{(start_second + i) % 60:02d}",
+         temperature + i * step, vibration, pressure)
+        for i in range(count)
+    ]
+
+
+def sensor_table(batches):
+    """
+    Static Pathway table of sensor readings arriving in `batches`, a list
+    of (rows, diff) processed one engine time after the other.
+    """
+    import pandas as pd
+    import pathway as pw
+    from pathway_pipeline import SensorSchema
+
+    records = []
+    for i, (rows, diff) in enumerate(batches):
+        records.extend((*row, 2 * (i + 1), diff) for row in rows)
+    frame = pd.DataFrame(records, columns=SENSOR_COLUMNS + ["__time__", "__diff__"])
+    return pw.debug.table_from_pandas(frame, schema=SensorSchema)
+
+
+def write_csv(path, rows, mode="w"):
+    with open(path, mode) as f:
+        if mode == "w":
+            f.write(",".join(SENSOR_COLUMNS) + "\n")
+        for row in rows:
+            f.write(",".join(str(value) for value in row) + "\n")
+
+
+def wait_until(predicate, timeout=60, process=None, log=None):
+    """Polls `predicate` until it is truthy; fails early if `process` dies."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        value = predicate()
+        if value:
+            return value
+        if process is not None and process.poll() is not None:
+            output = open(log).read()[-3000:] if log else ""
+            pytest.fail(f"pipeline exited with {process.returncode}:\n{output}")
+        time.sleep(0.2)
+    pytest.fail(f"timed out after {timeout} s waiting for {predicate.__name__}")
+
+
+@contextlib.contextmanager
+def sensor_pipeline(workdir, **env):
+    """
+    Runs pipeline/pathway_pipeline.py in `workdir` (reading
+    workdir/data/sensor_readings.csv) with metrics, ingest and episodes
+    off unless given in `env`. Yields the process; its output goes to
+    workdir/pipeline.log.
+    """
+    pytest.importorskip("pathway")
+    environment = {
+        **os.environ,
+        "PIPELINE_METRICS_PORT": "",
+        "INGEST_ADDR": "",
+        "EPISODES_DB": "",
+        "HISTORY_DIR": "",
+        "PYTHONUNBUFFERED": "1",
+        **env,
+    }
+    log_path = os.path.join(workdir, "pipeline.log")
+    with open(log_path, "a") as log:
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, "pipeline", "pathway_pipeline.py")],
+            cwd=workdir, env=environment, stdout=log, stderr=subprocess.STDOUT,
+        )
+    process.log = log_path
+    try:
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def jsonl_rows(path):
+    """Added rows of a JSONL sink (snapshot included), in file order."""
+    from compaction import read_jsonl, snapshot_path_for
+
+    rows = list(read_jsonl(snapshot_path_for(str(path))))
+    return rows + [row for row in read_jsonl(str(path)) if row.get("diff", 1) > 0]
+
+
+def run_backend(workdir, script, **env):
+    """
+    Runs `script` in a fresh process with backend/ and pipeline/ importable
+    and `workdir` as the current directory; returns its last stdout line
+    parsed as JSON. backend/app.py configures itself at import time, so
+    every setting has to be in `env` before it is imported.
+    """
+    pytest.importorskip("fastapi")
+    pytest.importorskip("groq")
+    result = subprocess.run(
+        [sys.executable, "-c", "import json, os\n" + script], cwd=workdir,
+        capture_output=True, text=True, timeout=60,
+        env={**os.environ, "GROQ_API_KEY": "fake", **env, "PYTHONPATH": os.pathsep.join(
+            [os.path.join(REPO_DIR, "backend"), os.path.join(REPO_DIR, "pipeline")]
+        )},
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.splitlines()[-1])
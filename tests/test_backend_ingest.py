@@ -0,0 +1,56 @@
+from conftest import run_backend
+
+READING = {
+    "machine_id": "PUMP_A", "timestamp": "2026-01-01 00:00:00",
+    "temperature": 70.0, "vibration": 1.5, "pressure": 4.0,
+}
+
+OFF = f"""
+from fastapi.testclient import TestClient
+import app
+response = TestClient(app.app).post("/ingest", json=[{READING!r}])
+print(json.dumps(response.status_code))
+"""
+
+PARTIAL = f"""
+import queue, threading
+from ingest import IngestServer
+batches = queue.Queue()
+server = IngestServer("127.0.0.1:0", batches.put)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+os.environ["INGEST_ADDR"] = "127.0.0.1:%d" % server.server_address[1]
+
+from fastapi.testclient import TestClient
+import app
+assert app.ingest_client.wait_connected(timeout=30)
+reading = {READING!r}
+response = TestClient(app.app).post("/ingest", json=[
+    reading,
+    dict(reading, timestamp=1767225600),
+    dict(reading, machine_id=7, temperature="70"),
+    dict(reading, timestamp="2026-01-01 00:00:01", pressure=4),
+])
+print(json.dumps([response.status_code, response.json(), batches.get(timeout=30)]))
+"""
+
+
+def test_ingest_is_off_with_an_empty_ingest_addr(tmp_path):
+    assert run_backend(tmp_path, OFF, INGEST_ADDR="") == 503
+
+
+def test_ingest_queues_the_valid_rows_and_describes_the_rest(tmp_path):
+    status, body, batch = run_backend(tmp_path, PARTIAL)
+    assert status == 202
+    assert body["accepted"] == 2
+    assert body["rejected"] == 2
+    assert body["errors"] == [
+        {"index": 1, "error": "invalid or missing timestamp"},
+        {"index": 2, "error": "invalid or missing machine_id, temperature"},
+    ]
+    assert batch == {
+        "machine_id": ["PUMP_A", "PUMP_A"],
+        "timestamp": ["2026-01-01 00:00:00", "2026-01-01 00:00:01"],
+        "temperature": [70.0, 70.0],
+        "vibration": [1.5, 1.5],
+        "pressure": [4.0, 4.0],
+    }
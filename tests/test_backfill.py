@@ -0,0 +1,45 @@
+import argparse
+import json
+import random
+
+import pytest
+
+from backfill import backfill, worker_count
+from conftest import readings, sensor_table, write_csv
+
+
+def test_workers_below_one_are_rejected():
+    assert worker_count("2") == 2
+    with pytest.raises(argparse.ArgumentTypeError):
+        worker_count("0")
+
+
+def test_backfill_scores_like_the_live_pipeline(tmp_path):
+    pw = pytest.importorskip("pathway")
+    from pathway_pipeline import score_stream
+
+    rows = []
+    for machine_id, swing in (("PUMP_A", 3.0), ("PUMP_B", 7.0)):
+        rows += [
+            (m, ts, round(t + swing * ((i * 7) % 5), 2), round(v + 0.1 * (i % 3), 3), p)
+            for i, (m, ts, t, v, p) in enumerate(readings(machine_id, 0, 60, step=0.0))
+        ]
+    # Archived files are not in timestamp order, and neither is a live batch
+    random.Random(7).shuffle(rows)
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    write_csv(archive / "a.csv", rows[:70])
+    write_csv(archive / "b.csv", rows[70:])
+
+    output = tmp_path / "processed_readings.jsonl"
+    backfill(str(archive), str(output), workers=2)
+    with open(output) as f:
+        backfilled = {(r["machine_id"], r["timestamp"]): r["deviation_score"] for r in map(json.loads, f)}
+
+    frame = pw.debug.table_to_pandas(score_stream(sensor_table([(rows, 1)])))
+    live = {
+        (m, ts): None if d != d else d
+        for m, ts, d in zip(frame["machine_id"], frame["timestamp"], frame["deviation_score"])
+    }
+    assert backfilled == live
+    assert sum(d is None for d in live.values()) == 2 * 30
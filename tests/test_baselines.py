@@ -0,0 +1,50 @@
+import pytest
+
+from baselines import MachineBaseline
+from conftest import readings, sensor_table
+
+
+def test_baseline_warms_up_again_once_every_reading_is_retracted():
+    baseline = MachineBaseline(warmup=3)
+    scores = [baseline.update(70.0 + i, 1.5, 4.0) for i in range(4)]
+    assert scores[:3] == [None] * 3 and scores[3] is not None
+
+    for _ in range(4):
+        baseline.retract()
+    assert baseline.update(70.0, 1.5, 4.0) is None
+
+
+def _scored(table):
+    """Per machine, in timestamp order: whether each reading got a deviation score."""
+    pw = pytest.importorskip("pathway")
+    from pathway_pipeline import score_stream
+
+    frame = pw.debug.table_to_pandas(score_stream(table))
+    return frame.sort_values(["machine_id", "timestamp"]).groupby("machine_id")["deviation_score"].apply(
+        lambda scores: list(scores.notna())
+    )
+
+
+def test_warm_up_follows_timestamps_not_batch_order():
+    pytest.importorskip("pathway")
+    from pathway_pipeline import BASELINE_WARMUP
+
+    pump_a = readings("PUMP_A", 0, BASELINE_WARMUP + 5)
+    pump_b = readings("PUMP_B", 0, BASELINE_WARMUP + 5, temperature=60.0)
+    # One batch, newest readings first and the machines interleaved
+    batch = [row for pair in zip(reversed(pump_a), reversed(pump_b)) for row in pair]
+
+    for scored in _scored(sensor_table([(batch, 1)])):
+        assert scored == [False] * BASELINE_WARMUP + [True] * 5
+
+
+def test_rewritten_input_restarts_the_baseline():
+    pytest.importorskip("pathway")
+    from pathway_pipeline import BASELINE_WARMUP
+
+    old = readings("PUMP_A", 0, BASELINE_WARMUP + 5)
+    new = readings("PUMP_A", 100, 3, temperature=80.0)
+    # data/sensor_readings.csv rewritten: every old row retracted, new rows
+    # added. The old rows were scored when they arrived and stay scored.
+    [scored] = _scored(sensor_table([(old, 1), (old, -1), (new, 1)]))
+    assert scored[-3:] == [False] * 3
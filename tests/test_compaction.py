@@ -0,0 +1,65 @@
+import os
+import time
+
+from compaction import RotatingJsonlSink, prune_segments, read_jsonl, segments_for
+
+
+def rotate_n(sink, n):
+    for i in range(n):
+        sink.on_change(None, {"machine_id": "PUMP_A", "timestamp": f"2026-01-01 00:00:{i:02d}"}, i, True)
+        sink.rotate()
+
+
+def test_rotation_keeps_the_newest_segments(tmp_path, monkeypatch):
+    import compaction
+
+    monkeypatch.setattr(compaction, "COMPACTION_MAX_SEGMENTS", 3)
+    path = str(tmp_path / "processed_readings.jsonl")
+    rotate_n(RotatingJsonlSink(path, "machine_id"), 5)
+
+    segments = segments_for(path)
+    assert len(segments) == 3
+    kept = [row["timestamp"][-2:] for segment in segments for row in read_jsonl(segment)]
+    assert kept == ["02", "03", "04"]
+    # The snapshot still has the latest state
+    assert [row["timestamp"] for row in read_jsonl(str(tmp_path / "processed_readings.snapshot.jsonl"))] == ["2026-01-01 00:00:04"]
+
+
+def test_old_segments_expire_by_age(tmp_path):
+    path = str(tmp_path / "processed_readings.jsonl")
+    rotate_n(RotatingJsonlSink(path, "machine_id", append=True), 3)
+    old = segments_for(path)[0]
+    week_ago = time.time() - 8 * 24 * 3600
+    os.utime(old, (week_ago, week_ago))
+
+    assert prune_segments(path, max_segments=0, max_age_hours=168) == [old]
+    assert len(segments_for(path)) == 2
+
+
+def test_other_logs_segments_are_left_alone(tmp_path):
+    path = str(tmp_path / "processed_readings.jsonl")
+    other = str(tmp_path / "processed_readings_archive.jsonl")
+    rotate_n(RotatingJsonlSink(path, "machine_id"), 2)
+    rotate_n(RotatingJsonlSink(other, "machine_id"), 2)
+
+    prune_segments(path, max_segments=1, max_age_hours=0)
+    assert len(segments_for(path)) == 1
+    assert len(segments_for(other)) == 2
+
+
+def test_snapshot_drops_a_key_whose_row_was_retracted(tmp_path):
+    path = str(tmp_path / "machine_features.jsonl")
+    sink = RotatingJsonlSink(path, "machine_id")
+    old = {"machine_id": "PUMP_A", "timestamp": "2026-01-01 00:00:01"}
+    new = {"machine_id": "PUMP_A", "timestamp": "2026-01-01 00:00:02"}
+    gone = {"machine_id": "PUMP_B", "timestamp": "2026-01-01 00:00:01"}
+    for row in (old, gone):
+        sink.on_change(None, row, 0, True)
+    # An upsert, retraction first, and a retraction with no replacement
+    sink.on_change(None, old, 2, False)
+    sink.on_change(None, new, 2, True)
+    sink.on_change(None, gone, 2, False)
+    sink.rotate()
+
+    snapshot = list(read_jsonl(str(tmp_path / "machine_features.snapshot.jsonl")))
+    assert [(row["machine_id"], row["timestamp"]) for row in snapshot] == [("PUMP_A", "2026-01-01 00:00:02")]
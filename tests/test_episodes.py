@@ -0,0 +1,113 @@
+from episodes import EpisodeStore, EpisodeTracker, EpisodeWriter
+from forecast import DEFAULT_LIMITS
+from scoring import compute_health_score
+
+
+def _ts(second):
+    return f"2026-01-01 00:{second // 60:02d}:{second % 60:02d}"
+
+
+def _feed(tracker, start_second, temperatures, step=2):
+    """One reading every `step` s; returns {second: episode} for the ones written."""
+    written = {}
+    for i, temperature in enumerate(temperatures):
+        second = start_second + i * step
+        episode = tracker.update(
+            "PUMP_A", _ts(second), temperature, 1.5, 4.0,
+            compute_health_score(temperature, 1.5, 4.0), f"temp {temperature}"
+        )
+        if episode is not None:
+            written[second] = dict(episode)
+    return written
+
+
+def _tracker(min_seconds=10, clear_seconds=30):
+    return EpisodeTracker(DEFAULT_LIMITS, clear_seconds=clear_seconds, min_seconds=min_seconds)
+
+
+def test_a_single_reading_past_the_limit_opens_nothing():
+    tracker = _tracker()
+    assert _feed(tracker, 0, [70.0, 85.0, 70.0, 70.0, 85.0] + [70.0] * 10) == {}
+    assert tracker.open == {}
+
+
+def test_an_episode_opens_once_trouble_lasts_min_seconds():
+    tracker = _tracker()
+    written = _feed(tracker, 0, [70.0] + [85.0] * 8)
+    # First reading past the limit at 2 s, open at 12 s
+    assert list(written) == [12]
+    episode = written[12]
+    assert episode["status"] == "open"
+    assert episode["started_at"] == _ts(2)
+    assert episode["readings"] == 6
+    assert episode["peak_level"] == "warning"
+    assert episode["signals"] == "temperature"
+
+    assert tracker.open["PUMP_A"]["episode_id"] == f"PUMP_A@{_ts(2)}"
+    assert _feed(_tracker(min_seconds=0), 0, [85.0])[0]["readings"] == 1
+
+
+def test_hovering_inside_the_hysteresis_band_keeps_the_episode_pending():
+    tracker = _tracker()
+    # 79 °C is inside the 80 °C warning limit but not by the 2 °C margin
+    written = _feed(tracker, 0, [85.0, 79.0, 79.0, 85.0, 79.0, 79.0])
+    assert list(written) == [10]
+    assert written[10]["started_at"] == _ts(0)
+    assert written[10]["readings"] == 6
+
+
+def test_escalation_is_written_only_when_the_peak_changes():
+    tracker = _tracker(min_seconds=0)
+    written = _feed(tracker, 0, [85.0, 84.0, 92.0, 91.0, 96.0, 85.0])
+    assert list(written) == [0, 4, 8]
+    assert [written[s]["peak_level"] for s in (0, 4, 8)] == ["warning", "critical", "shutdown"]
+    assert written[8]["peak_health_score"] == compute_health_score(96.0, 1.5, 4.0)
+    assert written[8]["alert_message"] == "temp 96.0"
+    assert all(e["episode_id"] == f"PUMP_A@{_ts(0)}" for e in written.values())
+
+
+def test_an_episode_closes_after_clear_seconds_back_in_range():
+    tracker = _tracker(min_seconds=0, clear_seconds=30)
+    written = _feed(tracker, 0, [85.0, 85.0])
+    # Clear from 4 s, but the 79 °C reading at 20 s restarts the countdown
+    written.update(_feed(tracker, 4, [70.0] * 8 + [79.0] + [70.0] * 16))
+    closed = [s for s, e in written.items() if e["status"] == "closed"]
+    assert closed == [52]
+    assert written[52]["ended_at"] == _ts(22)
+    assert written[52]["last_seen"] == _ts(52)
+    assert tracker.open == {}
+
+    # The next stretch of trouble is a new episode
+    reopened = _feed(tracker, 100, [85.0])
+    assert reopened[100]["episode_id"] == f"PUMP_A@{_ts(100)}"
+
+
+def test_writer_upserts_changes_and_resumes_open_episodes(tmp_path):
+    path = str(tmp_path / "episodes.db")
+
+    def write(writer, start_second, temperatures):
+        for i, temperature in enumerate(temperatures):
+            writer.on_change(None, {
+                "machine_id": "PUMP_A", "timestamp": _ts(start_second + 2 * i), "temperature": temperature,
+                "vibration": 1.5, "pressure": 4.0, "health_score": compute_health_score(temperature, 1.5, 4.0),
+                "alert_message": "",
+            }, 0, True)
+        writer.on_time_end(0)
+
+    writer = EpisodeWriter(path, clear_seconds=10, min_seconds=0)
+    write(writer, 0, [85.0, 85.0, 92.0])
+    # Opened and escalated in the same batch: one upsert
+    assert writer.writes == 1
+    [episode] = EpisodeStore(path).query(status="open")
+    assert episode["peak_level"] == "critical"
+    assert episode["signals"] == ["temperature"]
+
+    resumed = EpisodeWriter(path, clear_seconds=10, min_seconds=0, resume=True)
+    write(resumed, 6, [70.0] * 7)
+    [episode] = EpisodeStore(path).query()
+    assert episode["status"] == "closed"
+    assert episode["readings"] == 9
+    assert EpisodeStore(path).query(status="open") == []
+
+    EpisodeWriter(path)
+    assert EpisodeStore(path).query() == []
@@ -0,0 +1,76 @@
+import pytest
+
+from conftest import readings, sensor_table
+from features import MachineFeatures, RollingWindow
+
+
+def test_remove_takes_sample_out_of_sums_and_extremes():
+    window = RollingWindow(60)
+    for t, x in enumerate([5.0, 1.0, 9.0, 3.0]):
+        window.push(float(t), x)
+    assert window.remove(2.0, 9.0)
+    assert window.n == 3
+    assert window.mean() == pytest.approx(3.0)
+    assert window.max() == 5.0
+    assert window.min() == 1.0
+
+
+def test_remove_of_evicted_sample_is_a_no_op():
+    window = RollingWindow(10)
+    window.push(0.0, 1.0)
+    window.push(20.0, 2.0)
+    assert not window.remove(0.0, 1.0)
+    assert window.n == 1
+    assert window.mean() == 2.0
+
+
+def test_remove_matches_out_of_order_sample_by_key():
+    window = RollingWindow(60)
+    window.push(10.0, 1.0, "b")
+    # Counted at t=10, but removed by the key it was pushed with
+    window.push(5.0, 3.0, "a")
+    assert window.remove("a", 3.0)
+    assert window.n == 1
+    assert window.mean() == 1.0
+
+
+def test_removing_every_sample_empties_the_window():
+    window = RollingWindow(60)
+    window.push(0.0, 1.0)
+    window.push(1.0, 2.0)
+    window.remove(0.0, 1.0)
+    window.remove(1.0, 2.0)
+    assert window.n == 0
+    assert window.mean() is None
+    window.push(2.0, 7.0)
+    assert window.mean() == 7.0
+
+
+def test_retract_moves_window_end_back():
+    features = MachineFeatures(60)
+    for _, timestamp, t, v, p in readings("M", 0, 3):
+        features.update(timestamp, t, v, p)
+    features.retract("2026-01-01 00:00:02", 72.0, 1.5, 4.0)
+    result = features.features()
+    assert result["window_count"] == 2
+    assert result["window_end"] == "2026-01-01 00:00:01"
+    assert result["temperature_max"] == 71.0
+
+
+def test_rewritten_input_replaces_the_window():
+    pw = pytest.importorskip("pathway")
+    from pathway_pipeline import FeatureAccumulator
+
+    old = readings("PUMP_A", 0, 10)
+    new = readings("PUMP_A", 60, 3, temperature=80.0, step=0.0)
+    # data/sensor_readings.csv rewritten: every old row retracted, new rows added
+    table = sensor_table([(old, 1), (old, -1), (new, 1)])
+    features = table.groupby(pw.this.machine_id).reduce(
+        features=pw.reducers.udf_reducer(FeatureAccumulator)(
+            pw.this.timestamp, pw.this.temperature, pw.this.vibration, pw.this.pressure
+        )
+    )
+    [result] = pw.debug.table_to_pandas(features)["features"].map(lambda j: j.value)
+    assert result["window_count"] == 3
+    assert result["window_end"] == "2026-01-01 00:01:02"
+    assert result["temperature_mean"] == 80.0
@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import readings, sensor_table
+from forecast import DEFAULT_LIMITS, LinearTrend, MachineForecast
+from scoring import compute_health_score
+
+
+def _trend(samples):
+    trend = LinearTrend(half_life=60)
+    last = None
+    for t, x in samples:
+        trend.update(0.0 if last is None else t - last, x)
+        last = t
+    return trend
+
+
+def test_retract_matches_a_trend_that_never_saw_the_reading():
+    samples = [(0, 1.0), (10, 2.5), (25, 2.0), (40, 4.0), (70, 5.5)]
+    trend = _trend(samples)
+    trend.retract(70 - 25, 2.0)
+
+    expected = _trend(samples[:2] + samples[3:])
+    assert trend.n == expected.n
+    assert trend.fit() == pytest.approx(expected.fit())
+
+
+def test_retracting_every_reading_starts_over():
+    forecast = MachineForecast(DEFAULT_LIMITS, half_life=60, min_readings=2)
+    rows = [(ts, t, v, p, compute_health_score(t, v, p)) for _, ts, t, v, p in readings("PUMP_A", 0, 5)]
+    for row in rows:
+        forecast.update(*row)
+    for row in rows:
+        forecast.retract(*row)
+    result = forecast.forecast()
+    assert result["readings"] == 0
+    assert result["timestamp"] is None
+    assert result["signals"] == {}
+
+
+def test_rewritten_input_replaces_the_trends():
+    pw = pytest.importorskip("pathway")
+    from pathway_pipeline import ForecastAccumulator
+
+    old = readings("PUMP_A", 0, 20)
+    new = readings("PUMP_A", 60, 20, temperature=60.0, step=0.5)
+    # data/sensor_readings.csv rewritten: every old row retracted, new rows added
+    table = sensor_table([(old, 1), (old, -1), (new, 1)])
+    forecasts = table.groupby(pw.this.machine_id).reduce(
+        forecast=pw.reducers.udf_reducer(ForecastAccumulator)(
+            pw.this.timestamp, pw.this.temperature, pw.this.vibration, pw.this.pressure
+        )
+    )
+    [result] = pw.debug.table_to_pandas(forecasts)["forecast"].map(lambda j: j.value)
+    assert result["readings"] == 20
+    assert result["timestamp"] == "2026-01-01 00:01:19"
+    temperature = result["signals"]["temperature"]
+    assert temperature["level"] == pytest.approx(69.5)
+    assert temperature["slope_per_hour"] == pytest.approx(0.5 * 3600)
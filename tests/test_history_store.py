@@ -0,0 +1,71 @@
+import os
+
+from conftest import readings
+from history_store import HistoryStore, HistoryWriter
+
+
+def write(writer, rows):
+    for machine_id, timestamp, t, v, p in rows:
+        writer.append({
+            "machine_id": machine_id, "timestamp": timestamp, "temperature": t,
+            "vibration": v, "pressure": p, "health_score": 100.0, "is_anomaly": False,
+        })
+    writer.flush()
+
+
+def timestamps(root, machine_id="PUMP_A"):
+    return HistoryStore(root).query(machine_id)["points"]["timestamp"]
+
+
+def test_fresh_start_clears_earlier_history(tmp_path):
+    root = str(tmp_path / "history")
+    write(HistoryWriter(root), readings("PUMP_A", 0, 5))
+    unrelated = tmp_path / "history" / "README"
+    unrelated.write_text("kept")
+
+    # A restart without persistence replays the whole CSV
+    write(HistoryWriter(root), readings("PUMP_A", 0, 5))
+    assert len(timestamps(root)) == 5
+    assert unrelated.read_text() == "kept"
+
+
+def test_resume_skips_rows_already_stored(tmp_path):
+    root = str(tmp_path / "history")
+    write(HistoryWriter(root), readings("PUMP_A", 0, 5))
+
+    writer = HistoryWriter(root, resume=True)
+    ts_file = os.path.join(root, "PUMP_A", "2026-01-01", "ts.bin")
+    before = os.stat(ts_file).st_mtime_ns
+    write(writer, readings("PUMP_A", 0, 5))
+    # Nothing new, so the partition was not rewritten either
+    assert os.stat(ts_file).st_mtime_ns == before
+
+    write(writer, readings("PUMP_A", 3, 4))
+    assert timestamps(root) == [r[1] for r in readings("PUMP_A", 0, 7)]
+
+
+def test_late_reading_after_resume_is_merged_in_order(tmp_path):
+    root = str(tmp_path / "history")
+    write(HistoryWriter(root), readings("PUMP_A", 0, 3))
+    writer = HistoryWriter(root, resume=True)
+    write(writer, readings("PUMP_A", 10, 2))
+    write(writer, readings("PUMP_A", 5, 1))
+    assert timestamps(root) == [r[1] for r in readings("PUMP_A", 0, 3) + readings("PUMP_A", 5, 1) + readings("PUMP_A", 10, 2)]
+
+
+def test_pipeline_restart_without_persistence_does_not_duplicate(tmp_path):
+    from conftest import jsonl_rows, sensor_pipeline, wait_until, write_csv
+
+    (tmp_path / "data").mkdir()
+    write_csv(tmp_path / "data" / "sensor_readings.csv", readings("PUMP_A", 0, 20))
+    processed = tmp_path / "data" / "processed_readings.jsonl"
+    root = str(tmp_path / "data" / "history")
+
+    for _ in range(2):
+        if processed.exists():
+            processed.unlink()
+        with sensor_pipeline(tmp_path, HISTORY_DIR=root) as pipeline:
+            def all_rows_stored():
+                return len(jsonl_rows(processed)) == 20 and len(timestamps(root)) >= 20
+            wait_until(all_rows_stored, process=pipeline, log=pipeline.log)
+    assert timestamps(root) == [r[1] for r in readings("PUMP_A", 0, 20)]
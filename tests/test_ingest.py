@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from ingest import MAX_ERRORS, parse_body, validate
+
+READING = {
+    "machine_id": "PUMP_A", "timestamp": "2026-01-01 00:00:00",
+    "temperature": 70.0, "vibration": 1.5, "pressure": 4.0,
+}
+
+
+def _errors(records):
+    _, _, errors = validate(records)
+    return {e["index"]: e["error"] for e in errors}
+
+
+def test_parse_body_reads_arrays_objects_and_ndjson():
+    assert parse_body(json.dumps([READING, READING]).encode()) == [READING, READING]
+    assert parse_body(json.dumps(READING).encode()) == [READING]
+    ndjson = (json.dumps(READING) + "\n\n" + json.dumps(READING) + "\n").encode()
+    assert parse_body(ndjson, "application/x-ndjson") == [READING, READING]
+    # NDJSON sent without its content type
+    assert parse_body(ndjson) == [READING, READING]
+    assert parse_body(b"  ") == []
+    with pytest.raises(ValueError):
+        parse_body(b'[{"machine_id": "PUMP_A",')
+    with pytest.raises(ValueError):
+        parse_body(b"\xff")
+
+
+def test_values_of_the_wrong_type_are_rejected_not_raised():
+    # A column where no value is a string used to break the .str accessor
+    assert _errors([dict(READING, machine_id=7)]) == {0: "invalid or missing machine_id"}
+    assert _errors([dict(READING, timestamp=1767225600)]) == {0: "invalid or missing timestamp"}
+    assert _errors([
+        dict(READING, temperature="70", vibration=True, pressure=[4.0]),
+        dict(READING, machine_id=["PUMP_A"], timestamp={"s": 0}),
+        "PUMP_A,2026-01-01 00:00:00,70,1.5,4",
+    ]) == {
+        0: "invalid or missing temperature, vibration, pressure",
+        1: "invalid or missing machine_id, timestamp",
+        2: "not an object",
+    }
+
+
+def test_missing_fields_are_named():
+    reading = {k: v for k, v in READING.items() if k not in ("timestamp", "pressure")}
+    assert _errors([reading, dict(READING, vibration=None)]) == {
+        0: "invalid or missing timestamp, pressure",
+        1: "invalid or missing vibration",
+    }
+
+
+def test_non_finite_and_out_of_range_values_are_rejected():
+    records = parse_body(b'[{"temperature": NaN, "vibration": Infinity, "pressure": 1e400}]')
+    assert _errors([dict(READING, **records[0])]) == {0: "invalid or missing temperature, vibration, pressure"}
+    assert _errors([
+        dict(READING, temperature=10 ** 400),
+        dict(READING, timestamp="2026-02-30 00:00:00"),
+        dict(READING, timestamp="2026-01-01T00:00:00"),
+        dict(READING, machine_id="../etc"),
+        dict(READING, machine_id="P" * 65),
+    ]) == {
+        0: "invalid or missing temperature",
+        1: "invalid or missing timestamp",
+        2: "invalid or missing timestamp",
+        3: "invalid or missing machine_id",
+        4: "invalid or missing machine_id",
+    }
+
+
+def test_valid_rows_are_kept_in_order_and_errors_capped():
+    records = [dict(READING, timestamp=f"2026-01-01 00:00:{i:02d}", pressure=i) for i in range(3)]
+    records += [dict(READING, machine_id="")] * (MAX_ERRORS + 5)
+    columns, accepted, errors = validate(records)
+    assert accepted == 3
+    assert columns["timestamp"] == ["2026-01-01 00:00:00", "2026-01-01 00:00:01", "2026-01-01 00:00:02"]
+    assert columns["pressure"] == [0.0, 1.0, 2.0]
+    assert len(errors) == MAX_ERRORS
+    assert errors[0]["index"] == 3
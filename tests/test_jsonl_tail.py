@@ -0,0 +1,135 @@
+import json
+import os
+
+from jsonl_tail import HEAD_BYTES, JsonlTail, LatestStateCache
+
+
+def _line(machine_id, second, diff=1, time=0, **fields):
+    row = {"machine_id": machine_id, "timestamp": f"2026-01-01 00:00:{second:02d}", **fields}
+    return json.dumps({**row, "diff": diff, "time": time}) + "\n"
+
+
+def _write(path, *lines, mode="a"):
+    with open(path, mode) as f:
+        f.write("".join(lines))
+
+
+def _seconds(records):
+    return [int(r["timestamp"][-2:]) for r in records]
+
+
+def test_a_partial_trailing_line_waits_for_its_newline(tmp_path):
+    path = tmp_path / "processed_readings.jsonl"
+    line = _line("PUMP_A", 1)
+    _write(path, _line("PUMP_A", 0), line[:10])
+    tail = JsonlTail(str(path))
+    assert _seconds(tail.poll()[1]) == [0]
+    assert tail.poll() == (False, [])
+
+    _write(path, line[10:-1])
+    assert tail.poll() == (False, [])
+    _write(path, "\n", _line("PUMP_A", 2))
+    assert tail.poll() == (False, [json.loads(line), json.loads(_line("PUMP_A", 2))])
+    assert tail.bytes_parsed == os.path.getsize(path)
+
+
+def test_truncation_starts_over(tmp_path):
+    path = tmp_path / "processed_readings.jsonl"
+    _write(path, *[_line("PUMP_A", s) for s in range(5)])
+    tail = JsonlTail(str(path))
+    tail.poll()
+
+    # Truncated and rewritten with less than was consumed
+    _write(path, _line("PUMP_A", 9), mode="w")
+    assert tail.poll() == (True, [json.loads(_line("PUMP_A", 9))])
+    _write(path, _line("PUMP_A", 10))
+    assert _seconds(tail.poll()[1]) == [10]
+
+
+def test_rotation_is_noticed_by_inode_and_by_the_first_line(tmp_path):
+    path = tmp_path / "processed_readings.jsonl"
+    _write(path, _line("PUMP_A", 0))
+    tail = JsonlTail(str(path))
+    tail.poll()
+
+    # Replaced by a new file of the same size
+    replacement = tmp_path / "replacement.jsonl"
+    _write(replacement, _line("PUMP_B", 0))
+    os.replace(replacement, path)
+    reset, records = tail.poll()
+    assert reset and [r["machine_id"] for r in records] == ["PUMP_B"]
+
+    # Rewritten in place (same inode), longer than before
+    inode = os.stat(path).st_ino
+    _write(path, _line("PUMP_C", 0), _line("PUMP_C", 1), mode="w")
+    assert os.stat(path).st_ino == inode
+    reset, records = tail.poll()
+    assert reset and _seconds(records) == [0, 1]
+
+    # Appending never changes the head, even past HEAD_BYTES
+    _write(path, *[_line("PUMP_C", s) for s in range(2, 2 + HEAD_BYTES // 40)])
+    reset, records = tail.poll()
+    assert not reset and len(records) == HEAD_BYTES // 40
+
+    os.remove(path)
+    assert tail.poll() == (True, [])
+    assert tail.poll() == (False, [])
+
+
+def test_every_start_over_replays_the_snapshot(tmp_path):
+    path = tmp_path / "processed_readings.jsonl"
+    snapshot = tmp_path / "processed_readings.snapshot.jsonl"
+    _write(snapshot, _line("PUMP_A", 0), _line("PUMP_B", 0))
+    _write(path, _line("PUMP_A", 1))
+    tail = JsonlTail(str(path), str(snapshot))
+    assert _seconds(tail.poll()[1]) == [0, 0, 1]
+    _write(path, _line("PUMP_A", 2))
+    assert _seconds(tail.poll()[1]) == [2]
+
+    # Compaction: a new snapshot, then the log starts over empty
+    _write(snapshot, _line("PUMP_A", 2), _line("PUMP_B", 0), mode="w")
+    _write(path, "", mode="w")
+    reset, records = tail.poll()
+    assert reset and _seconds(records) == [2, 0]
+    _write(path, _line("PUMP_B", 3))
+    assert _seconds(tail.poll()[1]) == [3]
+
+
+def test_cache_keeps_the_newest_row_and_hands_out_changes(tmp_path):
+    path = tmp_path / "processed_readings.jsonl"
+    _write(path, _line("PUMP_A", 2), _line("PUMP_A", 1), _line("PUMP_B", 1))
+    cache = LatestStateCache(str(path))
+    version, readings = cache.snapshot()
+    assert {m: r["timestamp"][-2:] for m, r in readings.items()} == {"PUMP_A": "02", "PUMP_B": "01"}
+
+    _write(path, _line("PUMP_B", 2, time=2))
+    current, rows, full = cache.changes_since(version)
+    assert (current, list(rows), full) == (version + 1, ["PUMP_B"], False)
+    assert cache.changes_since(current) == (current, {}, False)
+    assert cache.changes_since(None)[2]
+
+
+def test_cache_drops_a_machine_whose_row_is_retracted(tmp_path):
+    path = tmp_path / "machine_features.jsonl"
+    _write(path, _line("PUMP_A", 1, window_count=1), _line("PUMP_B", 1, window_count=1))
+    cache = LatestStateCache(str(path))
+    version = cache.refresh()
+
+    # An upsert, retraction first, is an ordinary change
+    _write(path, _line("PUMP_A", 1, diff=-1, time=2, window_count=1), _line("PUMP_A", 2, time=2, window_count=2))
+    current, rows, full = cache.changes_since(version)
+    assert not full and rows["PUMP_A"]["window_count"] == 2
+
+    # Retracting something the cache no longer holds changes nothing
+    _write(path, _line("PUMP_B", 0, diff=-1, time=4, window_count=1))
+    assert cache.refresh() == current
+
+    # The input was rewritten without PUMP_B: its row goes and clients start over
+    _write(path, _line("PUMP_B", 1, diff=-1, time=6, window_count=1))
+    version, rows, full = cache.changes_since(current)
+    assert version == current + 1
+    assert full and list(rows) == ["PUMP_A"]
+    assert cache.changes_since(version) == (version, {}, False)
+
+    _write(path, _line("PUMP_B", 5, time=8, window_count=1))
+    assert list(cache.changes_since(version)[1]) == ["PUMP_B"]
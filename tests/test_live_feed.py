@@ -0,0 +1,55 @@
+import json
+
+from jsonl_tail import LatestStateCache
+from live_feed import FleetFeed
+
+
+def status_of(score):
+    return ("healthy",) if score >= 80 else ("warning",)
+
+
+def issues_of(row):
+    return tuple(s for s, past in (("temperature", row["temperature"] > 80), ("vibration", row["vibration"] > 3)) if past)
+
+
+def append(path, second, temperature, vibration=1.5):
+    anomaly = temperature > 80 or vibration > 3
+    row = {
+        "machine_id": "PUMP_A", "timestamp": f"2026-01-01 00:00:{second:02d}",
+        "temperature": temperature, "vibration": vibration, "pressure": 4.0,
+        "health_score": 70.0 if anomaly else 100.0, "is_anomaly": anomaly,
+        "alert_message": f"ALERT: PUMP_A — High temp ({temperature}°C)" if anomaly else "",
+        "diff": 1, "time": second,
+    }
+    with open(path, "a") as f:
+        f.write(json.dumps(row) + "\n")
+
+
+def alert_transition(feed, cursor):
+    version, _, rows, transitions = feed.deltas(cursor)
+    assert "PUMP_A" in rows
+    return version, (transitions.get("PUMP_A") or {}).get("alert")
+
+
+def test_alert_is_raised_once_per_set_of_issues(tmp_path):
+    path = tmp_path / "processed_readings.jsonl"
+    append(path, 0, 70.0)
+    feed = FleetFeed(LatestStateCache(str(path)), status_of, issues_of)
+    cursor, _, _, _ = feed.deltas(None)
+
+    append(path, 1, 85.0)
+    cursor, alert = alert_transition(feed, cursor)
+    assert alert == "raised"
+
+    # Same issue, new values in the message: not a new alert
+    append(path, 2, 86.5)
+    cursor, alert = alert_transition(feed, cursor)
+    assert alert is None
+
+    append(path, 3, 87.0, vibration=3.5)
+    cursor, alert = alert_transition(feed, cursor)
+    assert alert == "raised"
+
+    append(path, 4, 70.0)
+    cursor, alert = alert_transition(feed, cursor)
+    assert alert == "cleared"
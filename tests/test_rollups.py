@@ -0,0 +1,130 @@
+from conftest import run_backend
+from rollups import UNASSIGNED, FleetRollup, RollupWriter
+
+METADATA = {
+    "PUMP_A": ("plant_1", "line_1", "pump"),
+    "PUMP_B": ("plant_1", "line_2", "pump"),
+    "MOTOR_C": ("plant_2", "line_1", "motor"),
+}
+
+
+def _rollup():
+    rollup = FleetRollup(dict(METADATA))
+    rollup.update("PUMP_A", 92.0, False, "2026-01-01 00:00:00")
+    rollup.update("PUMP_B", 55.0, True, "2026-01-01 00:00:00")
+    rollup.update("MOTOR_C", 71.5, False, "2026-01-01 00:00:00")
+    rollup.update("FAN_D", 35.0, True, "2026-01-01 00:00:00")
+    return rollup
+
+
+def _row(rollup, key):
+    return rollup.groups[key].row(key)
+
+
+def test_machines_count_in_every_group_on_their_path():
+    rollup = _rollup()
+    assert rollup.update("PUMP_A", 90.0, False, "2026-01-01 00:00:01") == (
+        "fleet", "site:plant_1", "line:plant_1/line_1", "machine_type:pump"
+    )
+    assert {key: stats.machines for key, stats in rollup.groups.items()} == {
+        "fleet": 4,
+        "site:plant_1": 2, "site:plant_2": 1, f"site:{UNASSIGNED}": 1,
+        "line:plant_1/line_1": 1, "line:plant_1/line_2": 1, "line:plant_2/line_1": 1,
+        f"line:{UNASSIGNED}/{UNASSIGNED}": 1,
+        "machine_type:pump": 2, "machine_type:motor": 1, f"machine_type:{UNASSIGNED}": 1,
+    }
+    fleet = _row(rollup, "fleet")
+    assert (fleet["healthy"], fleet["warning"], fleet["critical"], fleet["danger"]) == (1, 1, 1, 1)
+    assert fleet["anomalies"] == 2
+    assert fleet["mean_health"] == round((90.0 + 55.0 + 71.5 + 35.0) / 4, 1)
+    assert fleet["min_health"] == 35.0
+    assert _row(rollup, "line:plant_2/line_1")["site"] == "plant_2"
+
+
+def test_set_metadata_moves_machines_and_unlisted_ones_become_unassigned():
+    rollup = _rollup()
+    # The new map replaces the old one: PUMP_B moves, MOTOR_C is no longer listed
+    changed = rollup.set_metadata({
+        "PUMP_A": METADATA["PUMP_A"],
+        "PUMP_B": ("plant_2", "line_1", "pump"),
+        "FAN_D": ("plant_2", "line_3", "fan"),
+    })
+    assert "fleet" not in changed
+    assert "machine_type:pump" not in changed
+    assert "line:plant_1/line_1" not in changed
+    assert {"site:plant_1", "line:plant_1/line_2", "machine_type:motor", "machine_type:fan"} <= changed
+
+    machines = {key: stats.machines for key, stats in rollup.groups.items()}
+    assert machines["site:plant_1"] == 1
+    assert machines["line:plant_1/line_2"] == 0
+    assert machines["site:plant_2"] == 2
+    assert machines["line:plant_2/line_1"] == 1
+    assert machines[f"site:{UNASSIGNED}"] == 1
+    assert machines["machine_type:motor"] == 0
+    assert machines[f"machine_type:{UNASSIGNED}"] == 1
+    assert machines["fleet"] == 4
+    assert _row(rollup, "line:plant_1/line_2")["mean_health"] is None
+    assert _row(rollup, "line:plant_2/line_1")["min_health"] == 55.0
+    assert rollup.set_metadata(rollup.metadata) == set()
+
+
+def test_older_readings_are_ignored():
+    rollup = _rollup()
+    rollup.update("PUMP_A", 45.0, True, "2026-01-01 00:00:05")
+    assert rollup.update("PUMP_A", 99.0, False, "2026-01-01 00:00:04") == ()
+    pump = _row(rollup, "machine_type:pump")
+    assert pump["machines"] == 2
+    assert pump["anomalies"] == 2
+    assert pump["min_health"] == 45.0
+    assert pump["timestamp"] == "2026-01-01 00:00:05"
+    # Same timestamp: the later reading wins
+    rollup.update("PUMP_A", 99.0, False, "2026-01-01 00:00:05")
+    assert _row(rollup, "machine_type:pump")["min_health"] == 55.0
+
+
+SUMMARY = """
+from fastapi.testclient import TestClient
+import app
+client = TestClient(app.app)
+print(json.dumps([client.get("/summary", params={"group_by": level}).json() for level in ("site", "line")]
+                 + [client.get("/summary").json(), client.get("/summary?group_by=shift").status_code]))
+"""
+
+
+def test_summary_group_by_serves_the_written_rollups(tmp_path):
+    (tmp_path / "data").mkdir()
+    metadata_path = tmp_path / "data" / "machine_metadata.csv"
+    metadata_path.write_text(
+        "machine_id,site,line,machine_type\n" +
+        "".join(f"{m},{site},{line},{kind}\n" for m, (site, line, kind) in METADATA.items())
+    )
+    writer = RollupWriter(str(tmp_path / "data" / "fleet_rollups.jsonl"), str(metadata_path))
+    batches = [
+        [("PUMP_A", 92.0, False, "00:00"), ("PUMP_B", 55.0, True, "00:00"), ("MOTOR_C", 71.5, False, "00:00")],
+        [("PUMP_B", 85.0, False, "00:01"), ("FAN_D", 35.0, True, "00:01")],
+    ]
+    for time, batch in enumerate(batches):
+        for machine_id, health_score, is_anomaly, timestamp in batch:
+            writer.on_change(None, {
+                "machine_id": machine_id, "health_score": health_score,
+                "is_anomaly": is_anomaly, "timestamp": f"2026-01-01 00:{timestamp}",
+            }, time, True)
+        writer.on_time_end(time)
+
+    sites, lines, fleet, bad_level = run_backend(tmp_path, SUMMARY)
+    assert sites["group_by"] == "site"
+    assert [(g["name"], g["machines"], g["healthy"], g["anomalies"]) for g in sites["groups"]] == [
+        ("plant_1", 2, 2, 0), ("plant_2", 1, 0, 0), (UNASSIGNED, 1, 0, 1),
+    ]
+    assert [(g["group"], g["site"], g["machines"]) for g in lines["groups"]] == [
+        ("line:plant_1/line_1", "plant_1", 1),
+        ("line:plant_1/line_2", "plant_1", 1),
+        ("line:plant_2/line_1", "plant_2", 1),
+        (f"line:{UNASSIGNED}/{UNASSIGNED}", UNASSIGNED, 1),
+    ]
+    assert "diff" not in sites["groups"][0] and "time" not in sites["groups"][0]
+    assert fleet == {
+        "total_machines": 4, "healthy_machines": 3, "anomaly_machines": 1,
+        "average_health_score": round((92.0 + 85.0 + 71.5 + 35.0) / 4, 1),
+    }
+    assert bad_level == 400
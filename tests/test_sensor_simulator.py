@@ -0,0 +1,51 @@
+import argparse
+import os
+import random
+import sys
+
+import pytest
+
+from conftest import REPO_DIR
+
+sys.path.insert(0, os.path.join(REPO_DIR, "simulators"))
+
+from sensor_simulator import (
+    FAULT_PROFILES, NORMAL_PROFILE, FleetGenerator, assign_faults, fault_spec, generate_reading, machine_ids,
+)
+
+
+def _within(reading, profile):
+    return all(
+        low <= reading[signal] <= high and round(reading[signal], decimals) == reading[signal]
+        for signal, (low, high, decimals) in profile.items()
+    )
+
+
+def test_demo_and_load_readings_follow_the_profiles():
+    overheat = {**NORMAL_PROFILE, **FAULT_PROFILES["overheat"]}
+    leak = {**NORMAL_PROFILE, **FAULT_PROFILES["leak"]}
+    for tick in (0, 10, 11, 50):
+        assert _within(generate_reading("PUMP_B", tick), NORMAL_PROFILE)
+        assert _within(generate_reading("PUMP_A", tick), overheat if tick > 10 else NORMAL_PROFILE)
+    assert _within(generate_reading("PUMP_B", 11, faults={"PUMP_B": "leak"}, fault_after=5), leak)
+
+    generator = FleetGenerator(["PUMP_A", "PUMP_B"], {"PUMP_B": "leak"}, fault_after=1, seed=3)
+    rows = [line.strip().split(",") for line in generator.lines(3 * 2, "2026-01-01 00:00:00")]
+    for i, (machine, _, *values) in enumerate(rows):
+        reading = dict(zip(("temperature", "vibration", "pressure"), map(float, values)))
+        assert _within(reading, leak if machine == "PUMP_B" and i // 2 > 1 else NORMAL_PROFILE)
+
+
+def test_fault_specs_are_checked_when_parsed():
+    assert fault_spec("PUMP_A=bearing") == "PUMP_A=bearing"
+    assert fault_spec("overheat:0.25") == "overheat:0.25"
+    assert fault_spec("leak") == "leak"
+    for spec in ("overheat:1.5", "overheat:-0.1", "overheat:half", "melt:0.1", "PUMP_A=melt", "=leak"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            fault_spec(spec)
+
+    machines = machine_ids(100)
+    faults = assign_faults(machines, ["overheat:0.1", "MOTOR_C=leak"], random.Random(1))
+    assert sum(profile == "overheat" for m, profile in faults.items() if m != "MOTOR_C") in (9, 10)
+    assert faults["MOTOR_C"] == "leak"
+    assert assign_faults(machines, ["overheat:1"], random.Random(1)).keys() == set(machines)
@@ -0,0 +1,127 @@
+from sqlite_store import COLUMNS, SqliteStateStore, SqliteWriter
+
+
+def _reading(machine_id, second, health_score=90.0, is_anomaly=False):
+    return {
+        "machine_id": machine_id, "timestamp": f"2026-01-01 00:00:{second:02d}",
+        "temperature": 70.0 + second, "vibration": 1.5, "pressure": 4.0,
+        "health_score": health_score, "is_anomaly": is_anomaly,
+        "alert_message": "High temperature" if is_anomaly else "",
+        "deviation_score": None,
+    }
+
+
+def _write(writer, *rows, retracted=()):
+    for row in rows:
+        writer.on_change(None, row, 0, True)
+    for row in retracted:
+        writer.on_change(None, row, 0, False)
+    writer.on_time_end(0)
+
+
+def test_latest_readings_keep_the_newest_timestamp(tmp_path):
+    path = str(tmp_path / "state.db")
+    writer = SqliteWriter(path)
+    store = SqliteStateStore(path)
+    # Out of order within a batch, and an older reading in a later batch
+    _write(writer, _reading("PUMP_A", 5), _reading("PUMP_A", 3), _reading("PUMP_B", 1, 30.0, True))
+    _write(writer, _reading("PUMP_A", 4, 10.0, True))
+
+    readings = store.readings()
+    assert readings["PUMP_A"] == _reading("PUMP_A", 5)
+    assert readings["PUMP_B"] == _reading("PUMP_B", 1, 30.0, True)
+    assert list(store.anomalous()) == ["PUMP_B"]
+    # History keeps every reading, the late one included
+    assert store.history("PUMP_A")["points"]["temperature"] == [73.0, 74.0, 75.0]
+
+
+def test_retractions_are_not_written(tmp_path):
+    path = str(tmp_path / "state.db")
+    writer = SqliteWriter(path)
+    store = SqliteStateStore(path)
+    _write(writer, _reading("PUMP_A", 1))
+    version = store.refresh()
+
+    # A retraction alone is not a batch worth a transaction
+    _write(writer, retracted=[_reading("PUMP_A", 1)])
+    assert store.refresh() == version
+    # Next to an addition it is dropped, and the reading stays
+    _write(writer, _reading("PUMP_B", 2), retracted=[_reading("PUMP_A", 1)])
+    assert set(store.readings()) == {"PUMP_A", "PUMP_B"}
+    assert store.history("PUMP_A")["count"] == 1
+
+
+def test_readers_see_each_batch_once_it_is_committed(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = SqliteStateStore(path, pool_size=2)
+    # Before the pipeline has created the database
+    assert store.snapshot() == (0, {})
+    assert store.anomalous() == {}
+    assert store.history("PUMP_A")["count"] == 0
+
+    writer = SqliteWriter(path)
+    assert writer.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    version, readings = store.snapshot()
+    assert readings == {}
+
+    writer.on_change(None, _reading("PUMP_A", 1), 0, True)
+    assert store.snapshot() == (version, {})
+    writer.on_time_end(0)
+    assert store.snapshot() == (version + 1, {"PUMP_A": _reading("PUMP_A", 1)})
+
+    # A reader in the middle of a read transaction keeps its view while
+    # the pipeline commits the next batch
+    with store.connection() as conn:
+        conn.execute("BEGIN")
+        assert conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0] == 1
+        _write(writer, _reading("PUMP_A", 2))
+        assert conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0] == 1
+        conn.execute("COMMIT")
+        assert conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0] == 2
+
+
+def test_changes_since_returns_changed_machines_or_a_reset(tmp_path):
+    path = str(tmp_path / "state.db")
+    writer = SqliteWriter(path)
+    store = SqliteStateStore(path)
+    _write(writer, _reading("PUMP_A", 1), _reading("PUMP_B", 1))
+    version = store.refresh()
+
+    _write(writer, _reading("PUMP_B", 2, 50.0, True))
+    current, changed, reset = store.changes_since(version)
+    assert (current, reset) == (version + 1, False)
+    assert changed == {"PUMP_B": _reading("PUMP_B", 2, 50.0, True)}
+    assert store.changes_since(current) == (current, {}, False)
+    assert store.changes_since(None)[2]
+    assert store.changes_since(current + 1)[2]
+
+    # A restarted pipeline replays its input into an emptied database;
+    # the epoch is kept, clients behind the reset start over
+    epoch = store.epoch
+    writer.conn.close()
+    writer = SqliteWriter(path)
+    _write(writer, _reading("PUMP_A", 3))
+    current, readings, reset = store.changes_since(current)
+    assert reset
+    assert readings == {"PUMP_A": _reading("PUMP_A", 3)}
+    assert store.epoch == epoch
+
+    # Resuming from persisted state keeps what is there
+    writer.conn.close()
+    SqliteWriter(path, resume=True)
+    assert store.changes_since(current)[1:] == ({}, False)
+    assert set(store.readings()) == {"PUMP_A"}
+
+
+def test_history_filters_by_time_and_downsamples(tmp_path):
+    path = str(tmp_path / "state.db")
+    writer = SqliteWriter(path)
+    store = SqliteStateStore(path)
+    _write(writer, *[_reading("PUMP_A", s, is_anomaly=s % 4 == 0) for s in range(10)], _reading("PUMP_B", 0))
+
+    history = store.history("PUMP_A", start="2026-01-01 00:00:02", end="2026-01-01 00:00:08", limit=3)
+    assert (history["count"], history["returned"]) == (7, 3)
+    assert history["points"]["temperature"] == [72.0, 75.0, 78.0]
+    assert history["points"]["is_anomaly"] == [False, False, True]
+    assert set(history["points"]) == set(COLUMNS[1:7])
+    assert store.history("PUMP_C")["points"]["temperature"] == []
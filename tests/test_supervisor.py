@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+from conftest import REPO_DIR, readings, wait_until, write_csv
+
+sys.path.insert(0, REPO_DIR)
+
+from supervisor import FileProbe, Service, Supervisor
+
+
+def test_file_probe_waits_for_a_write_unless_resuming(tmp_path):
+    path = tmp_path / "processed_readings.jsonl"
+    path.write_text('{"machine_id":"PUMP_A"}\n')
+
+    fresh = FileProbe(str(path))
+    fresh.reset()
+    assert not fresh()
+    resumed = FileProbe(str(path), resuming=lambda: True)
+    resumed.reset()
+    assert resumed()
+
+    path.write_text("")
+    resumed.reset()
+    assert not resumed()
+
+
+def test_restart_uses_restart_args(tmp_path):
+    crash = [sys.executable, "-c", "raise SystemExit(1)"]
+    stay_up = [sys.executable, "-c", "open('restarted', 'w').write('up'); import time; time.sleep(60)"]
+    service = Service("child", crash, FileProbe(str(tmp_path / "restarted")), restart_args=stay_up)
+    supervisor = Supervisor([service], cwd=str(tmp_path), backoff_initial=0.1)
+    supervisor.start()
+    try:
+        assert supervisor.wait_ready(timeout=30)["child"] is not None
+        assert service.restarts == 1
+    finally:
+        supervisor.stop()
+
+
+def test_simulator_append_keeps_earlier_readings(tmp_path):
+    os.makedirs(tmp_path / "data")
+    csv_path = tmp_path / "data" / "sensor_readings.csv"
+    earlier = readings("PUMP_A", 0, 3)
+    write_csv(csv_path, earlier)
+
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, "simulators", "sensor_simulator.py"), "--append"],
+        cwd=tmp_path, stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_until(lambda: len(csv_path.read_text().splitlines()) > 1 + len(earlier), timeout=30, process=process)
+    finally:
+        process.terminate()
+        process.wait()
+
+    lines = csv_path.read_text().splitlines()
+    assert lines[0] == "machine_id,timestamp,temperature,vibration,pressure"
+    assert lines[1:4] == [",".join(str(v) for v in row) for row in earlier]
+    assert lines.count(lines[0]) == 1